@@ -1,3 +1,6 @@
+import asyncio
+import signal
+
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,8 +10,18 @@ from routes.flight_plan import router as FlightPlanRouter
 from routes.constraint_management import router as ConstraintManagementRouter
 from routes.subscription_management import router as SubscriptionManagementRouter
 from routes.log_sets import router as LogSetsRouter
-from auth.auth_check import AuthCheck
+from routes.metrics import router as MetricsRouter
+from auth.auth_check import AuthCheck, PublicKeyStore
 from config.config import init_database
+from config.logger import LogWriter
+from config.metrics import MetricsMiddleware
+from services.dss_service import DSSService
+from services.gauges import register_gauges
+from services.uss_service import USSServiceRegistry
+from services.auth_service import AuthService
+from services.notification_outbox_worker import NotificationOutboxWorker
+from services.volume_index import VolumeIndex
+from utils.geometry import GeometryProcessPool
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
@@ -17,8 +30,32 @@ async def lifespan(app: FastAPI):
     Lifespan event for the FastAPI application.
     """
     await init_database()
+    await VolumeIndex.get_instance().load()
+
+    # Reload the public keys of the auth server on SIGHUP
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP,
+            lambda: PublicKeyStore.get_instance().reload(),
+        )
+    except (NotImplementedError, RuntimeError, AttributeError):
+        pass
+
+    app.state.dss = DSSService()
+    register_gauges(app.state.dss)
+
+    app.state.outbox_worker = NotificationOutboxWorker()
+    await app.state.outbox_worker.start()
+
     yield
 
+    await app.state.outbox_worker.stop()
+    await app.state.dss.close()
+    await USSServiceRegistry.get_instance().close()
+    await AuthService.close_instance()
+    GeometryProcessPool.get_instance().shutdown()
+    LogWriter.get_instance().close()
+
 app = FastAPI(
     title="USS API",
     description="USS example API",
@@ -46,10 +83,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Required routers
 app.include_router(OperationalIntentsRouter, tags=["Operational Intents"], prefix="/uss/v1/operational_intents", dependencies=[Depends(AuthCheck())])
 app.include_router(ConstraintRouter, tags=["Constraints"], prefix="/uss/v1/constraints", dependencies=[Depends(AuthCheck())])
 app.include_router(LogSetsRouter, tags=["Log Sets"], prefix="/uss/v1/log_sets")
+app.include_router(MetricsRouter, tags=["Metrics"])
 
 # Operator router
 app.include_router(FlightPlanRouter, tags=["Flight Plan"], prefix="/uss/v1/flight_plan")
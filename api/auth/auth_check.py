@@ -1,6 +1,12 @@
+import hashlib
 import jwt
+import os
+import time
 
+from collections import OrderedDict
 from http import HTTPStatus
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from cryptography.hazmat.backends import default_backend
@@ -9,16 +15,168 @@ from cryptography.hazmat.primitives import serialization
 from config.config import Settings
 from schemas.error import ResponseError
 
+class PublicKeyStore:
+    """
+    Public keys used to verify the tokens of other USSs, loaded once from the
+    PEM files listed in DSS_PEM.
+
+    DSS_PEM is a comma separated list of PEM files or directories containing
+    them. Each key is identified by its file name without the extension, which
+    is matched against the kid header of the token. A token without a known
+    kid is only verified when a single key is configured. The files are
+    reloaded when they change, checked at most every DSS_PEM_RELOAD_INTERVAL
+    seconds, or when reload is called.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        self._paths = [path.strip() for path in (settings.DSS_PEM or "").split(",") if path.strip()]
+        self._reload_interval = settings.DSS_PEM_RELOAD_INTERVAL
+
+        self._keys: Dict[str, Any] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._checked_at = 0.0
+        self.version = 0
+
+        self.reload()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def is_configured(self) -> bool:
+        return len(self._paths) != 0
+
+    def reload(self):
+        """
+        Load the keys from the PEM files.
+        """
+        keys: Dict[str, Any] = {}
+        mtimes: Dict[str, float] = {}
+
+        for filename in self._list_files():
+            with open(filename, "rb") as key_file:
+                keys[self._get_kid(filename)] = serialization.load_pem_public_key(
+                    key_file.read(),
+                    backend=default_backend()
+                )
+            mtimes[filename] = os.stat(filename).st_mtime
+
+        self._keys = keys
+        self._mtimes = mtimes
+        self._checked_at = time.monotonic()
+        self.version += 1
+
+    def get_keys(self, kid: Optional[str]) -> List[Any]:
+        """
+        Get the key identified by kid. When kid is missing or unknown, the key
+        is only returned if it is the single key configured, since any key of
+        a directory could otherwise verify the token.
+        """
+        self._reload_if_changed()
+
+        if kid is not None and kid in self._keys:
+            return [self._keys[kid]]
+
+        if len(self._keys) == 1:
+            return list(self._keys.values())
+
+        return []
+
+    def _reload_if_changed(self):
+        if time.monotonic() - self._checked_at < self._reload_interval:
+            return
+
+        self._checked_at = time.monotonic()
+
+        try:
+            files = self._list_files()
+            if set(files) != set(self._mtimes) or any(
+                os.stat(filename).st_mtime != self._mtimes[filename] for filename in files
+            ):
+                self.reload()
+        except OSError:
+            # A file being replaced is read on the next check, the loaded keys are kept
+            return
+
+    def _list_files(self) -> List[str]:
+        files: List[str] = []
+
+        for path in self._paths:
+            if os.path.isdir(path):
+                files += sorted(
+                    os.path.join(path, filename)
+                    for filename in os.listdir(path)
+                    if filename.endswith(".pem")
+                )
+            else:
+                files.append(path)
+
+        return files
+
+    @staticmethod
+    def _get_kid(filename: str) -> str:
+        return os.path.splitext(os.path.basename(filename))[0]
+
+class VerifiedTokenCache:
+    """
+    Bounded cache of the hashes of already verified tokens, each one kept
+    until the token expires.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._tokens: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+
+    def contains(self, token: str, key_version: int) -> bool:
+        digest = self._hash(token)
+        cached = self._tokens.get(digest)
+
+        if cached is None:
+            return False
+
+        exp, version = cached
+        if exp <= time.time() or version != key_version:
+            # Expired tokens or tokens verified by replaced keys are verified again
+            del self._tokens[digest]
+            return False
+
+        self._tokens.move_to_end(digest)
+        return True
+
+    def add(self, token: str, exp: Optional[float], key_version: int):
+        if exp is None:
+            return
+
+        self._tokens[self._hash(token)] = (exp, key_version)
+
+        while len(self._tokens) > self._size:
+            self._tokens.popitem(last=False)
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
 class AuthCheck(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
+        settings = Settings()
+        self._manager = settings.MANAGER
+        self._verified_tokens = VerifiedTokenCache(settings.AUTH_VERIFIED_TOKEN_CACHE_SIZE)
+
     async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
         credentials = await super().__call__(request)
-        key_filename = Settings().DSS_PEM
-        manager = Settings().MANAGER
+        key_store = PublicKeyStore.get_instance()
 
-        if not key_filename:
+        if not key_store.is_configured():
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail=ResponseError(
@@ -27,7 +185,7 @@ class AuthCheck(HTTPBearer):
                 ).model_dump(mode="json"),
             )
 
-        if not manager:
+        if not self._manager:
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail=ResponseError(
@@ -35,15 +193,15 @@ class AuthCheck(HTTPBearer):
                     data=None,
                 ).model_dump(mode="json"),
             )
-        
-        with open(key_filename, "rb") as key_file:
-            pub_key = serialization.load_pem_public_key(
-                key_file.read(),
-                backend=default_backend()
-            )
+
+        token = credentials.credentials
+
+        if self._verified_tokens.contains(token, key_store.version):
+            return credentials
 
         try:
-            jwt.decode(credentials.credentials, pub_key, audience=manager, algorithms=['RS256', ])
+            kid = jwt.get_unverified_header(token).get("kid")
+            payload = self._decode(token, key_store.get_keys(kid))
         except jwt.ExpiredSignatureError:
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
@@ -68,3 +226,21 @@ class AuthCheck(HTTPBearer):
                     data=None,
                 ).model_dump(mode="json"),
             )
+
+        self._verified_tokens.add(token, payload.get("exp"), key_store.version)
+
+        return credentials
+
+    def _decode(self, token: str, keys: List[Any]) -> Dict[str, Any]:
+        """
+        Verify the token with the first key matching its signature.
+        """
+        error: jwt.InvalidTokenError = jwt.InvalidSignatureError("No public key matches the kid of the token")
+
+        for key in keys:
+            try:
+                return jwt.decode(token, key, audience=self._manager, algorithms=['RS256', ])
+            except jwt.InvalidSignatureError as e:
+                error = e
+
+        raise error
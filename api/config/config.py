@@ -1,7 +1,7 @@
 import os
 import models
 
-from typing import Optional
+from typing import Dict, Optional
 from beanie import init_beanie
 from pydantic_settings import BaseSettings
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -15,6 +15,78 @@ class Settings(BaseSettings):
     DSS_PEM: Optional[str] = None
     MANAGER: Optional[str] = None
 
+    # Cache of the access tokens requested to the auth server
+    AUTH_TOKEN_RENEWAL_MARGIN: float = 60.0
+    AUTH_TOKEN_CACHE_SIZE: int = 256
+    AUTH_TOKEN_IDLE_TIMEOUT: float = 900.0
+
+    # Verification of the tokens received from other USSs
+    DSS_PEM_RELOAD_INTERVAL: float = 5.0
+    AUTH_VERIFIED_TOKEN_CACHE_SIZE: int = 4096
+
+    # Connection pool of the shared DSS client
+    DSS_MAX_CONNECTIONS: int = 100
+    DSS_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    DSS_KEEPALIVE_EXPIRY: float = 30.0
+    DSS_HTTP2: bool = False
+    DSS_QUERY_CONCURRENCY: int = 8
+
+    # Registry of long-lived clients to other USSs
+    USS_MAX_CLIENTS: int = 64
+    USS_CLIENT_IDLE_TIMEOUT: float = 300.0
+    USS_MAX_CONNECTIONS: int = 10
+    USS_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    USS_KEEPALIVE_EXPIRY: float = 30.0
+    USS_QUERY_CONCURRENCY: int = 16
+    USS_QUERY_CONCURRENCY_PER_PEER: int = 4
+    USS_QUERY_TIMEOUT: float = 5.0
+    QUERY_CONFLICTS_BUDGET: float = 8.0
+    REMOTE_ENTITY_CACHE_SIZE: int = 4096
+
+    # Local mirror of the airspace of the subscriptions, only for a single process
+    AIRSPACE_MIRROR_ENABLED: bool = False
+    AIRSPACE_MIRROR_MAX_AGE: float = 300.0
+
+    # Intersection of volumes, large sets are split across processes
+    GEOMETRY_PROCESS_POOL_WORKERS: int = 2
+    GEOMETRY_PROCESS_POOL_THRESHOLD: int = 1000000
+    VOLUME_INDEX_INITIAL_CAPACITY: int = 1024
+
+    # Concurrent notification of subscribers
+    NOTIFICATION_MAX_CONCURRENCY: int = 32
+    NOTIFICATION_MAX_CONCURRENCY_PER_PEER: int = 4
+    NOTIFICATION_TIMEOUT: float = 10.0
+
+    # Background delivery of the notification outbox
+    OUTBOX_WORKERS: int = 4
+    OUTBOX_BATCH_SIZE: int = 16
+    OUTBOX_POLL_INTERVAL: float = 0.5
+    OUTBOX_LEASE: float = 60.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE: float = 1.0
+    OUTBOX_BACKOFF_MAX: float = 300.0
+    OUTBOX_FAILED_RETENTION: float = 604800.0
+
+    # Background writer of the logs, each process writes its own shard
+    LOG_SHARD_ID: Optional[str] = None
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_MAX_BODY_SIZE: int = 65536
+    LOG_BODY_SAMPLE_RATE: float = 1.0
+    LOG_BODY_SAMPLING_THRESHOLD: float = 0.8
+    LOG_FLUSH_TIMEOUT: float = 5.0
+
+    # Capture of the messages exchanged with the DSS and other USSs
+    LOG_MESSAGE_VERBOSITY: str = "full"
+    LOG_MESSAGE_ENDPOINT_VERBOSITY: Dict[str, str] = {}
+    LOG_MAX_CAPTURED_BODY_SIZE: int = 1048576
+
+    # Sidecar indexes of the log files kept in memory by the log queries
+    LOG_INDEX_CACHE_SIZE: int = 128
+
+    # Bearer token of the scrapes of /metrics, which lists the peers of the USS.
+    # Without it the endpoint is open and must only be reachable by the monitoring.
+    METRICS_TOKEN: Optional[str] = None
+
     class Config:
         env_file = f".env.{os.getenv('ENV', 'dev')}"
         from_attributes = True
@@ -1,29 +1,492 @@
-from threading import Lock
+import asyncio
+import atexit
+import io
+import json
 import os
-from typing import List
+import queue
+import random
+import re
+import zipfile
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Union
 from fastapi import HTTPException
 from functools import wraps
-from typing import Any
-from datetime import timezone
-import json
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlsplit
+from uuid import UUID
+from pydantic import BaseModel
+from pydantic_core import from_json, to_jsonable_python
+from starlette.responses import Response as StarletteResponse
 from loguru._logger import Logger, Core
 
+from config.config import Settings
+
+# Fields of the logged data holding message bodies, truncated and sampled
+BODY_FIELDS = ("body", "response")
+
+# Daily log files of each shard, plain or compressed once rotated
+LOG_FILE_PATTERN = re.compile(r"^(?P<day>\d{4}-\d{2}-\d{2})(\.(?P<shard>.+?))?\.log(\.zip)?$")
+LOG_RETENTION_DAYS = 30
+
+# Sidecar index of each log file, with the offset, timestamp and keys of its entries
+INDEX_SUFFIX = ".idx"
+UUID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+PEER_PATTERN = re.compile(r'"aud": "([^"]+)"|https?://([^/":?]+)')
+
+class RawJSON:
+    """
+    JSON text logged as is, without being serialized again. The text is
+    parsed once when the entry is written, and text that is not a valid JSON
+    object or array is logged as a string. Bytes are only decoded when the
+    entry is written.
+    """
+    __slots__ = ("_content", "_text", "_valid")
+
+    def __init__(self, content: Union[bytes, str]):
+        self._content = content
+        self._text: Optional[str] = None
+        self._valid: Optional[bool] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            content = self._content
+            if isinstance(content, bytes):
+                content = content.decode("utf-8", errors="replace")
+            self._text = content.strip()
+        return self._text
+
+    def is_json(self) -> bool:
+        if self._valid is None:
+            text = self.text
+            self._valid = (
+                ((text.startswith("{") and text.endswith("}")) or (text.startswith("[") and text.endswith("]")))
+                and _parses(text)
+            )
+        return self._valid
+
+def _parses(text: str) -> bool:
+    try:
+        from_json(text, allow_inf_nan=False)
+    except ValueError:
+        return False
+    return True
+
+class Lazy:
+    """
+    Value of a log entry computed only when the entry is written.
+    """
+    __slots__ = ("_func", "_args")
+
+    def __init__(self, func: Callable[..., Any], *args: Any):
+        self._func = func
+        self._args = args
+
+    def get(self) -> Any:
+        return self._func(*self._args)
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, Lazy):
+        return value.get()
+
+    if isinstance(value, RawJSON):
+        return value.text
+
+    # Models are dumped here, in the writer thread, rather than by the caller
+    return to_jsonable_python(value)
+
 def serialize(record):
+    extra = record.get("extra", {})
+    return serialize_entry(extra.get("timestamp", record["time"]), record["message"], extra.get("data", {}))
+
+def serialize_entry(timestamp: datetime, message: str, data: Any) -> str:
     subset = {
-        "timestamp": record["time"].astimezone(timezone.utc).isoformat('T').replace("+00:00", "") + 'Z',
-        "message": record["message"],
-        "data": record.get("extra", {}).get("data", {}),
+        "timestamp": format_timestamp(timestamp),
+        "message": message,
+        "data": data,
     }
-    return json.dumps(subset)
+    return _dumps(subset)
+
+def _dumps_key(key: Any) -> str:
+    if isinstance(key, str):
+        return json.dumps(key)
+    if isinstance(key, (bool, int, float)) or key is None:
+        return json.dumps(json.dumps(key))
+    return json.dumps(str(key))
+
+def _dumps(value: Any) -> str:
+    """
+    Serialize the value as JSON, splicing in the text of the valid raw JSON
+    values it contains rather than serializing them again.
+    """
+    if isinstance(value, RawJSON):
+        if not value.is_json():
+            return json.dumps(value.text)
+
+        # Newlines are only whitespace in valid JSON, and log lines must not have them
+        return value.text.replace("\r", "").replace("\n", "")
+
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{_dumps_key(key)}: {_dumps(item)}" for key, item in value.items()) + "}"
+
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_dumps(item) for item in value) + "]"
+
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return json.dumps(value)
+
+    # Lazy values and models may hold raw JSON themselves
+    return _dumps(_to_jsonable(value))
+
+def get_shard() -> str:
+    """
+    Get the shard of the logs written by this process.
+    """
+    shard = Settings().LOG_SHARD_ID or str(os.getpid())
+    return re.sub(r"[^A-Za-z0-9_-]", "-", shard)
+
+def format_timestamp(timestamp: datetime) -> str:
+    """
+    Format a timestamp as in the log entries. Naive timestamps are in UTC.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).isoformat('T', timespec="microseconds").replace("+00:00", "") + 'Z'
+
+def get_timestamp(line: str) -> str:
+    """
+    Get the timestamp of a log entry without parsing it, as it is always the
+    first field.
+    """
+    start = len('{"timestamp": "')
+    timestamp = line[start:line.index('"', start)]
+
+    # Entries written before the timestamps had a fixed precision
+    if "." not in timestamp:
+        timestamp = timestamp[:-1] + ".000000Z"
+
+    return timestamp
+
+def read_log_file(path: str) -> Iterator[str]:
+    """
+    Read the lines of a plain or zip compressed log file, one at a time.
+    """
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                with archive.open(member) as f:
+                    for line in io.TextIOWrapper(f, encoding="utf-8"):
+                        if line.strip():
+                            yield line.rstrip("\n")
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            # The last line of the current file may still be partially written
+            if not line.endswith("\n"):
+                return
+            if line.strip():
+                yield line.rstrip("\n")
+
+def get_index_keys(line: str) -> List[str]:
+    """
+    Get the keys of a log entry in the index: the ids and the peers it
+    mentions, found without parsing it.
+    """
+    keys = {f"id:{match.lower()}" for match in UUID_PATTERN.findall(line)}
+
+    for aud, host in PEER_PATTERN.findall(line):
+        keys.add(f"peer:{(aud or host).lower()}")
+
+    return sorted(keys)
+
+def get_index_path(log_path: str) -> str:
+    """
+    Get the sidecar index of a log file, shared by its compressed copy.
+    """
+    if log_path.endswith(".zip"):
+        log_path = log_path[:-len(".zip")]
+    return log_path + INDEX_SUFFIX
+
+def read_log_lines(path: str, offsets: List[int]) -> Iterator[str]:
+    """
+    Read the lines at the byte offsets, in ascending order, of a plain or zip
+    compressed log file.
+    """
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            # Rotated files hold a single log
+            with archive.open(archive.namelist()[0]) as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    yield f.readline().decode("utf-8").rstrip("\n")
+        return
+
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield f.readline().decode("utf-8").rstrip("\n")
 
 def formatter(record):
-    record["extra"]["serialized"] = serialize(record)
+    # Entries of the LogWriter are serialized before being written
+    if "serialized" not in record["extra"]:
+        record["extra"]["serialized"] = serialize(record)
     return "{extra[serialized]}\n"
 
+class DailyLogFile:
+    """
+    Sink of an AppLogger appending the entries of a shard to one file per
+    UTC day, with the byte offset, timestamp and keys of each entry in the
+    sidecar index. The files of the previous days are compressed when the
+    day changes, then on_rotation is called.
+    """
+
+    def __init__(self, path: str, shard: str, on_rotation: Callable[[], None]):
+        self._path = path
+        self._shard = shard
+        self._on_rotation = on_rotation
+        os.makedirs(path, exist_ok=True)
+
+        self._day: Optional[date] = None
+        self._file = None
+        self._index_file = None
+        self._offset = 0
+
+    def __call__(self, message):
+        day = message.record["time"].astimezone(timezone.utc).date()
+        if day != self._day:
+            self._open(day)
+
+        line = message.rstrip("\n")
+        content = message.encode("utf-8")
+
+        self._file.write(content)
+        self._index_file.write(f"{self._offset}\t{get_timestamp(line)}\t{' '.join(get_index_keys(line))}\n")
+        self._offset += len(content)
+
+    def _open(self, day: date):
+        self.close()
+
+        self._day = day
+        file_path = os.path.join(self._path, f"{day.isoformat()}.{self._shard}.log")
+
+        # Unbuffered, the entries are readable as soon as they are written
+        self._file = open(file_path, "ab", buffering=0)
+        self._offset = self._file.tell()
+        self._index_file = open(get_index_path(file_path), "a", buffering=1, encoding="utf-8")
+
+        self._compress_previous_days()
+        self._on_rotation()
+
+    def _compress_previous_days(self):
+        for name in os.listdir(self._path):
+            match = LOG_FILE_PATTERN.match(name)
+            if match is None or match.group("shard") != self._shard or name.endswith(".zip"):
+                continue
+
+            if date.fromisoformat(match.group("day")) >= self._day:
+                continue
+
+            file_path = os.path.join(self._path, name)
+            with zipfile.ZipFile(file_path + ".zip", "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.write(file_path, name)
+            os.remove(file_path)
+
+    def close(self):
+        for f in (self._file, self._index_file):
+            if f is not None:
+                f.close()
+
+        self._file = None
+        self._index_file = None
+
+class LogWriter:
+    """
+    Background thread writing the entries of every AppLogger.
+
+    Loggers only put their entries in a bounded queue, so serialization,
+    file writes and the daily compression do not run in the event loop.
+    When the queue is filled above LOG_BODY_SAMPLING_THRESHOLD, bodies are
+    left out of the new entries, and bodies longer than LOG_MAX_BODY_SIZE are
+    truncated. When the queue is full, entries submitted from the event loop
+    are dropped, and other threads wait up to LOG_FLUSH_TIMEOUT for room
+    before dropping theirs. The dropped entries are counted.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self._max_body_size = settings.LOG_MAX_BODY_SIZE
+        self._body_sample_rate = settings.LOG_BODY_SAMPLE_RATE
+        self._body_sampling_depth = int(settings.LOG_QUEUE_SIZE * settings.LOG_BODY_SAMPLING_THRESHOLD)
+        self._flush_timeout = settings.LOG_FLUSH_TIMEOUT
+
+        # Counters of the callers and of the writer thread, each updated by one side
+        self._submitted = 0
+        self._dropped = 0
+        self._bodies_dropped = 0
+        self._max_depth = 0
+        self._written = 0
+        self._bodies_truncated = 0
+        self._errors = 0
+
+        self._thread = Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def submit(self, logger: "AppLogger", message: str, data: Any):
+        """
+        Queue an entry of the logger. Entries that do not fit in the queue
+        are dropped, the event loop never waits for the writer.
+        """
+        self._submitted += 1
+
+        depth = self._queue.qsize()
+        self._max_depth = max(self._max_depth, depth)
+
+        keep_bodies = depth < self._body_sampling_depth and (
+            self._body_sample_rate >= 1 or random.random() < self._body_sample_rate
+        )
+        if not keep_bodies:
+            self._bodies_dropped += 1
+
+        entry = (logger, datetime.now(timezone.utc), message, data, keep_bodies)
+
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except queue.Full:
+            pass
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Threads without an event loop can wait for the writer
+            try:
+                self._queue.put(entry, timeout=self._flush_timeout)
+                return
+            except queue.Full:
+                pass
+
+        self._dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the entries queued so far are written.
+        """
+        timeout = self._flush_timeout if timeout is None else timeout
+
+        if not self._thread.is_alive():
+            return True
+
+        written = Event()
+        try:
+            self._queue.put(written, timeout=timeout)
+        except queue.Full:
+            return False
+
+        return written.wait(timeout)
+
+    def close(self):
+        """
+        Write the queued entries and stop the writer thread.
+        """
+        if not self._thread.is_alive():
+            return
+
+        try:
+            self._queue.put(None, timeout=self._flush_timeout)
+        except queue.Full:
+            return
+
+        self._thread.join(self._flush_timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "max_depth": self._max_depth,
+            "submitted": self._submitted,
+            "written": self._written,
+            "dropped": self._dropped,
+            "bodies_dropped": self._bodies_dropped,
+            "bodies_truncated": self._bodies_truncated,
+            "errors": self._errors,
+        }
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+
+            if entry is None:
+                return
+
+            if isinstance(entry, Event):
+                entry.set()
+                continue
+
+            self._write(entry)
+            self._written += 1
+
+    def _write(self, entry: Tuple["AppLogger", datetime, str, Any, bool]):
+        logger, timestamp, message, data, keep_bodies = entry
+
+        try:
+            line = serialize_entry(timestamp, message, self._cap_bodies(data, keep_bodies))
+
+            logger.trace(message, serialized=line)
+        except Exception:
+            # A failing entry must not stop the writer
+            self._errors += 1
+
+    def _cap_bodies(self, data: Any, keep_bodies: bool) -> Any:
+        if not isinstance(data, dict):
+            return data
+
+        capped = {}
+
+        for key, value in data.items():
+            if key not in BODY_FIELDS or value is None:
+                capped[key] = self._cap_bodies(value, keep_bodies)
+            elif not keep_bodies:
+                capped[key] = {"omitted": True}
+            else:
+                capped[key] = self._cap_body(value)
+
+        return capped
+
+    def _cap_body(self, body: Any) -> Any:
+        text = body.text if isinstance(body, RawJSON) else json.dumps(body, default=_to_jsonable)
+
+        if len(text) <= self._max_body_size:
+            # Serialized once, and spliced as is into the entry
+            return body if isinstance(body, RawJSON) else RawJSON(text)
+
+        self._bodies_truncated += 1
+
+        return {
+            "truncated": True,
+            "size": len(text),
+            "head": text[:self._max_body_size],
+        }
+
 class AppLogger(Logger):
     """
     Custom logger class that extends loguru's Logger.
     This class can be used to log messages with a specific format.
+    Entries are written by the LogWriter thread.
     """
     NAME = "app"
 
@@ -43,11 +506,12 @@ class AppLogger(Logger):
             patchers=[],
             extra={}
         )
+        # Processes never share a file, each one appends to and rotates its own shard
+        self.shard = get_shard()
+        self._remove_expired_shards()
+
         self.add(
-            f"{self.get_path()}/{{time:YYYY-MM-DD}}.log",
-            rotation="1 day",
-            retention="30 days",
-            compression="zip",
+            DailyLogFile(self.get_path(), self.shard, on_rotation=self._remove_expired_shards),
             level="TRACE",
             format=formatter,
         )
@@ -58,17 +522,57 @@ class AppLogger(Logger):
         """
         return f"logs/{self.NAME}"
 
-    def export(self) -> List[str]:
+    def get_files(self, first_day: Optional[date] = None, last_day: Optional[date] = None) -> List[Tuple[date, str, str]]:
         """
-        Export the logs to a list of strings.
+        Get the plain and compressed log files of every shard of the days
+        between the first and the last day, as (day, shard, path) sorted by
+        day. Days are taken from the file names, so the files of other days
+        are not opened.
         """
-        logs = []
-        for log in sorted(os.listdir(self.get_path())):
-            if log.endswith(".log"):
-                with open(os.path.join(self.get_path(), log), "r") as f:
-                    logs += f.readlines()
+        path = self.get_path()
+
+        if not os.path.isdir(path):
+            return []
+
+        files = []
+        for name in os.listdir(path):
+            match = LOG_FILE_PATTERN.match(name)
+            if match is None:
+                continue
+
+            day = date.fromisoformat(match.group("day"))
+            if (first_day is None or first_day <= day) and (last_day is None or day <= last_day):
+                files.append((day, match.group("shard") or "", os.path.join(path, name)))
 
-        return logs
+        return sorted(files)
+
+    def read_entries(self, shard: str, paths: List[str], first: int = 0) -> Iterator[Tuple[str, str, str, int, str]]:
+        """
+        Read the entries of the files of a shard for a day as (timestamp,
+        logger name, shard, line number, line) tuples, one line at a time,
+        from the line number first.
+        """
+        number = 0
+
+        for path in paths:
+            for line in read_log_file(path):
+                if number >= first:
+                    yield get_timestamp(line), self.NAME, shard, number, line
+                number += 1
+
+    def _remove_expired_shards(self):
+        """
+        Remove the files of every shard past the retention. Rotations only
+        remove the files of their own shard, and process ids change on restarts.
+        """
+        last_expired = datetime.now(timezone.utc).date() - timedelta(days=LOG_RETENTION_DAYS + 1)
+
+        for _, _, path in self.get_files(last_day=last_expired):
+            for expired in (path, get_index_path(path)):
+                try:
+                    os.remove(expired)
+                except OSError:
+                    pass
 
     @classmethod
     def get_instance(cls):
@@ -81,9 +585,37 @@ class AppLogger(Logger):
     @classmethod
     def log(cls, message, data: Any = None):
         """
-        Log a message at the TRACE level.
+        Queue a message at the TRACE level. Models in the data are serialized
+        by the writer thread, so they must not be modified afterwards.
         """
-        cls.get_instance().trace(message, data=data)
+        LogWriter.get_instance().submit(cls.get_instance(), message, data)
+
+def _is_route_input(value: Any) -> bool:
+    """
+    Check if a route argument was provided by the operator, rather than being
+    a service injected by a FastAPI dependency.
+    """
+    return isinstance(value, (BaseModel, UUID, str, int, float, bool, list, dict, type(None)))
+
+def _log_response(response: Any) -> Any:
+    """
+    Get the loggable content of a route response.
+    """
+    # Models are dumped by the writer thread
+    if isinstance(response, BaseModel):
+        return response
+
+    if isinstance(getattr(response, "model", None), BaseModel):
+        return response.model
+
+    if isinstance(response, StarletteResponse):
+        # Streamed responses are not buffered just to be logged
+        return {
+            "status_code": response.status_code,
+            "media_type": response.media_type,
+        }
+
+    return response
 
 def log_route_handler(Logger: type[AppLogger], action: str):
     def decorator(func):
@@ -91,13 +623,13 @@ def log_route_handler(Logger: type[AppLogger], action: str):
         async def wrapper(*args, **kwargs):
             data = {
                 "args": [str(arg) for arg in args],
-                "kwargs": {k: str(v) for k, v in kwargs.items()},
+                "kwargs": {k: str(v) for k, v in kwargs.items() if _is_route_input(v)},
             }
 
             try:
                 response = await func(*args, **kwargs)
 
-                data["response"] = response.model_dump(mode="json") if hasattr(response, "model_dump") else response
+                data["response"] = _log_response(response)
                 Logger.log(
                     action,
                     data = data,
@@ -132,3 +664,117 @@ class PlanningAttemptLogger(AppLogger):
 
     def __init__(self):
         super().__init__()
+
+class MessageCapture:
+    """
+    Capture of the messages exchanged with the DSS and other USSs for the
+    messages log.
+
+    Every message is logged, with more or less of it depending on the
+    verbosity of its endpoint, the longest path prefix configured in
+    LOG_MESSAGE_ENDPOINT_VERBOSITY:
+    - metadata: method, url, status code, audience and scope
+    - headers: metadata and response headers
+    - full: headers and bodies
+
+    Headers and bodies are kept as received, and only decoded by the writer
+    thread. Bodies longer than LOG_MAX_CAPTURED_BODY_SIZE bytes are cut.
+    """
+    METADATA = "metadata"
+    HEADERS = "headers"
+    FULL = "full"
+
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        self._verbosity = settings.LOG_MESSAGE_VERBOSITY
+        self._max_body_size = settings.LOG_MAX_CAPTURED_BODY_SIZE
+
+        # Longest prefixes first
+        self._endpoint_verbosity = sorted(
+            settings.LOG_MESSAGE_ENDPOINT_VERBOSITY.items(),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get_verbosity(self, url: str) -> str:
+        """
+        Get the verbosity of the endpoint, from the url relative to the base url.
+        """
+        path = urlsplit(url).path
+
+        for prefix, verbosity in self._endpoint_verbosity:
+            if path.startswith(prefix):
+                return verbosity
+
+        return self._verbosity
+
+    def request(self, verbosity: str, method: str, base_url: str, url: str, aud: str, scope: Any, body: Any) -> Dict[str, Any]:
+        """
+        Get the data logged for a request sent.
+        """
+        data = {
+            "method": method,
+            "base_url": base_url,
+            "url": url,
+            "aud": aud,
+            "scope": scope,
+        }
+
+        if verbosity == self.FULL:
+            data["body"] = body
+
+        return data
+
+    def response(self, verbosity: str, url: str, status_code: int, headers: Mapping[str, str], content: bytes) -> Dict[str, Any]:
+        """
+        Get the data logged for a response received.
+        """
+        data: Dict[str, Any] = {
+            "status_code": status_code,
+            "url": url,
+        }
+
+        if verbosity in (self.HEADERS, self.FULL):
+            data["headers"] = Lazy(dict, headers)
+
+        if verbosity == self.FULL:
+            data["body"] = self.capture_body(content)
+
+        return data
+
+    def capture_body(self, content: bytes) -> Any:
+        if not content:
+            return None
+
+        if len(content) <= self._max_body_size:
+            return RawJSON(content)
+
+        return {
+            "truncated": True,
+            "size": len(content),
+            "head": Lazy(bytes.decode, content[:self._max_body_size], "utf-8", "replace"),
+        }
+
+def _reset_after_fork():
+    """
+    Forked workers start their own writer thread and shards, as the ones of
+    the parent do not run in the child.
+    """
+    LogWriter._instance = None
+    for logger_type in (AppLogger, *AppLogger.__subclasses__()):
+        logger_type._instance = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
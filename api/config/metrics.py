@@ -0,0 +1,304 @@
+import inspect
+import math
+import time
+
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException
+
+from config.logger import get_shard
+
+Labels = Tuple[str, ...]
+
+# Upper bounds in seconds of the latency buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(shard: str, names: Sequence[str], values: Sequence[Any]) -> str:
+    # Every series is labelled with the shard of the process, as each worker exposes its own metrics
+    names = ("shard", *names)
+    values = (shard, *values)
+
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+class Counter:
+    """
+    Monotonic count per label values.
+    """
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, shard: str) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(shard, self.labels, labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """
+    Distribution of observed values per label values, in fixed buckets.
+    """
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Count per bucket, then the sum and the count of the observations
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0] * (len(self.buckets) + 3)
+
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def render(self, shard: str) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+
+        for labels, values in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(shard, names, labels + (_format_value(bound),))} {cumulative}")
+
+            lines.append(f"{self.name}_sum{_format_labels(shard, self.labels, labels)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(shard, self.labels, labels)} {values[-1]}")
+
+        return lines
+
+GaugeValues = Union[float, Dict[Labels, float]]
+
+class Gauge:
+    """
+    Value read from its callback when the metrics are rendered, either a
+    number or a number per label values. Callbacks may be coroutines.
+    """
+    TYPE = "gauge"
+
+    def __init__(self, name: str, description: str, callback: Callable[[], Union[GaugeValues, Awaitable[GaugeValues]]], labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.callback = callback
+
+    async def render(self, shard: str) -> List[str]:
+        values = self.callback()
+        if inspect.isawaitable(values):
+            values = await values
+
+        if not isinstance(values, dict):
+            values = {(): values}
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.TYPE}"]
+        for labels, value in values.items():
+            lines.append(f"{self.name}{_format_labels(shard, self.labels, labels)} {_format_value(value)}")
+        return lines
+
+class CounterCallback(Gauge):
+    """
+    Monotonic count kept by another object, read from its callback when the
+    metrics are rendered.
+    """
+    TYPE = "counter"
+
+class MetricsRegistry:
+    """
+    Metrics of the process, rendered in the Prometheus text format.
+
+    Metrics are recorded from the event loop, so they are aggregated in plain
+    dicts without locks. Each worker process exposes its own metrics, with
+    the shard of its logs as a label of every series.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram]] = {}
+        self._gauges: Dict[str, Gauge] = {}
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, description, labels, buckets))
+
+    def gauge(self, name: str, description: str, callback: Callable[[], Any], labels: Sequence[str] = ()) -> Gauge:
+        """
+        Register the gauge, replacing a previous gauge with the same name.
+        """
+        gauge = self._gauges[name] = Gauge(name, description, callback, labels)
+        return gauge
+
+    def counter_callback(self, name: str, description: str, callback: Callable[[], Any], labels: Sequence[str] = ()) -> CounterCallback:
+        """
+        Register the counter read from its callback, replacing a previous one
+        with the same name.
+        """
+        counter = self._gauges[name] = CounterCallback(name, description, callback, labels)
+        return counter
+
+    async def render(self) -> str:
+        lines: List[str] = []
+        shard = get_shard()
+
+        for metric in list(self._metrics.values()):
+            lines += metric.render(shard)
+
+        for gauge in list(self._gauges.values()):
+            try:
+                lines += await gauge.render(shard)
+            except Exception:
+                # A failing gauge must not hide the other metrics
+                continue
+
+        return "\n".join(lines) + "\n"
+
+def _get_status(error: Exception) -> str:
+    return str(error.status_code) if isinstance(error, HTTPException) else type(error).__name__
+
+def track(
+        duration: Histogram,
+        errors: Counter,
+        labels: Union[Labels, Callable[..., Labels]] = (),
+        name: Optional[str] = None,
+):
+    """
+    Record the duration of every call of an async function in the histogram,
+    and its failures in the counter with their status code or exception type.
+    The label values are the given labels, or the ones computed from the
+    arguments of the call, followed by the name, by default the name of the
+    function.
+    """
+    def decorator(func):
+        operation = name or func.__name__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            values = (labels(*args, **kwargs) if callable(labels) else labels) + (operation,)
+            start = time.perf_counter()
+
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                errors.inc(*values, _get_status(e))
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start, *values)
+        return wrapper
+    return decorator
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and the errors of every route,
+    labelled with the path template of the route rather than the actual path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"], path)
+            if status[0] >= 400:
+                HTTP_REQUEST_ERRORS.inc(scope["method"], path, str(status[0]))
+
+registry = MetricsRegistry.get_instance()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "uss_http_request_duration_seconds",
+    "Latency of the requests handled by the USS.",
+    ("method", "route"),
+)
+HTTP_REQUEST_ERRORS = registry.counter(
+    "uss_http_request_errors_total",
+    "Requests handled by the USS answered with an error status.",
+    ("method", "route", "status"),
+)
+DSS_REQUEST_DURATION = registry.histogram(
+    "uss_dss_request_duration_seconds",
+    "Latency of the calls to the DSS.",
+    ("operation",),
+)
+DSS_REQUEST_ERRORS = registry.counter(
+    "uss_dss_request_errors_total",
+    "Failed calls to the DSS.",
+    ("operation", "status"),
+)
+PEER_REQUEST_DURATION = registry.histogram(
+    "uss_peer_request_duration_seconds",
+    "Latency of the calls to other USSs.",
+    ("peer", "operation"),
+)
+PEER_REQUEST_ERRORS = registry.counter(
+    "uss_peer_request_errors_total",
+    "Failed calls to other USSs.",
+    ("peer", "operation", "status"),
+)
+TOKEN_REQUEST_DURATION = registry.histogram(
+    "uss_token_request_duration_seconds",
+    "Latency of the access token requests to the auth server.",
+    ("aud", "scope", "operation"),
+)
+TOKEN_REQUEST_ERRORS = registry.counter(
+    "uss_token_request_errors_total",
+    "Failed access token requests to the auth server.",
+    ("aud", "scope", "operation", "status"),
+)
+DATABASE_OPERATION_DURATION = registry.histogram(
+    "uss_database_operation_duration_seconds",
+    "Latency of the database operations of the controllers.",
+    ("controller", "operation"),
+)
+DATABASE_OPERATION_ERRORS = registry.counter(
+    "uss_database_operation_errors_total",
+    "Failed database operations of the controllers.",
+    ("controller", "operation", "status"),
+)
@@ -0,0 +1,115 @@
+from typing import List, Tuple, TypeVar, Union
+
+from controllers import constraint as constraint_controller
+from controllers import operational_intent as operational_intent_controller
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.constraint import ConstraintReferenceSchema, ConstraintSchema
+from schemas.operational_intent import OperationalIntentReferenceSchema, OperationalIntentSchema
+from schemas.remote_volume import RemoteEntityVolumesSchema
+from schema_types.fan_out import FanOutStatus
+from services.volume_index import VolumeIndex
+from utils.geometry import find_intersections, get_time_range, intersects_any
+
+Reference = TypeVar("Reference", ConstraintReferenceSchema, OperationalIntentReferenceSchema)
+
+def overlaps_in_time(
+        reference: Union[ConstraintReferenceSchema, OperationalIntentReferenceSchema],
+        area_of_interest: AreaOfInterestSchema,
+) -> bool:
+    """
+    Check if the time range of the reference overlaps the area of interest.
+    References that do not overlap can not conflict, so their volumes are
+    not retrieved.
+    """
+    start, end = get_time_range(area_of_interest)
+    return reference.time_start.value.timestamp() <= end and start <= reference.time_end.value.timestamp()
+
+def get_candidates(area_of_interest: AreaOfInterestSchema, references: List[Reference]) -> List[Reference]:
+    """
+    Get the references whose volumes have to be retrieved to check if they
+    conflict with the area of interest. References outside its time range,
+    references whose indexed volumes do not touch it, and references of the
+    entities managed by this USS, checked by get_local_conflicts, are discarded.
+    """
+    index = VolumeIndex.get_instance()
+    touching = index.query(area_of_interest)
+
+    return [
+        reference for reference in references
+        if overlaps_in_time(reference, area_of_interest)
+        and not index.owns(reference.id)
+        and (reference.id in touching or not index.contains(reference.id, reference.version))
+    ]
+
+async def get_local_conflicts(
+        area_of_interest: AreaOfInterestSchema,
+        constraint_references: List[ConstraintReferenceSchema],
+        operational_intent_references: List[OperationalIntentReferenceSchema],
+) -> Tuple[List[RemoteEntityVolumesSchema], List[RemoteEntityVolumesSchema]]:
+    """
+    Get the constraints and operational intents managed by this USS, among
+    the references, that intersect the area of interest. They are read from
+    the database through its geospatial index instead of being requested
+    from this USS, and the database is only queried when such references
+    were matched.
+    """
+    index = VolumeIndex.get_instance()
+
+    constraint_ids = {reference.id for reference in constraint_references if index.owns(reference.id)}
+    operational_intent_ids = {reference.id for reference in operational_intent_references if index.owns(reference.id)}
+
+    constraint_models = await constraint_controller.get_constraints_in_area(area_of_interest) if constraint_ids else []
+    operational_intent_models = await operational_intent_controller.get_operational_intents_in_area(area_of_interest) if operational_intent_ids else []
+
+    constraints = [
+        constraint_model.constraint for constraint_model in constraint_models
+        if constraint_model.constraint.reference.id in constraint_ids
+    ]
+    operational_intents = [
+        operational_intent_model.operational_intent for operational_intent_model in operational_intent_models
+        if operational_intent_model.operational_intent.reference.id in operational_intent_ids
+    ]
+
+    return (
+        [_to_entity_volumes(constraint) for constraint in constraints],
+        [_to_entity_volumes(operational_intent) for operational_intent in operational_intents],
+    )
+
+def _to_entity_volumes(entity: Union[ConstraintSchema, OperationalIntentSchema]) -> RemoteEntityVolumesSchema:
+    return RemoteEntityVolumesSchema(
+        entity_id=entity.reference.id,
+        uss_base_url=entity.reference.uss_base_url,
+        status=FanOutStatus.OK,
+        volumes=entity.details.volumes,
+    )
+
+def is_conflicting(area_of_interest: AreaOfInterestSchema, entity: RemoteEntityVolumesSchema) -> bool:
+    """
+    Check if any volume of the entity intersects the area of interest.
+    Entities whose volumes could not be retrieved are considered conflicting.
+    """
+    return entity.status != FanOutStatus.OK or intersects_any(area_of_interest, entity.volumes)
+
+async def filter_conflicting(
+        area_of_interest: AreaOfInterestSchema,
+        entities: List[RemoteEntityVolumesSchema],
+) -> List[RemoteEntityVolumesSchema]:
+    """
+    Keep the entities with a volume intersecting the area of interest, and
+    the ones whose volumes could not be retrieved.
+    """
+    volumes = [volume for entity in entities for volume in entity.volumes]
+    intersecting = (await find_intersections([area_of_interest], volumes))[0]
+
+    conflicting: List[RemoteEntityVolumesSchema] = []
+    offset = 0
+
+    for entity in entities:
+        count = len(entity.volumes)
+
+        if entity.status != FanOutStatus.OK or intersecting[offset:offset + count].any():
+            conflicting.append(entity)
+
+        offset += count
+
+    return conflicting
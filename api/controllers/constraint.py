@@ -1,14 +1,23 @@
+from beanie.odm.operators.update.general import Set
+from beanie.odm.queries.update import UpdateResponse
 from fastapi import HTTPException
 from http import HTTPStatus
+from pymongo.errors import DuplicateKeyError
 from uuid import UUID
 from typing import List, Optional
 
-from models.constraint import ConstraintModel
+from config.metrics import DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, track
+from models.constraint import ConstraintModel, ConstraintReferenceProjection
 from services.dss_service import DSSService
-from services.uss_service import USSService
-from schemas.constraint import ConstraintSchema
+from services.volume_index import VolumeIndex
+from services.uss_service import USSServiceRegistry
+from schemas.constraint import ConstraintReferenceSchema, ConstraintSchema
+from schema_types.notification import PendingNotificationSchema
 from schema_types.subscription import SubscriberSchema, SubscriptionBaseSchema
+from schemas.area_of_interest import AreaOfInterestSchema, to_geometry_collection
+from utils.geometry import intersects_any
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("constraint",))
 async def get_constraint(entity_id: UUID) -> ConstraintModel:
     """
     Retrieve the specified operational intent details
@@ -25,62 +34,114 @@ async def get_constraint(entity_id: UUID) -> ConstraintModel:
 
     return constraint
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("constraint",))
+async def get_constraint_reference(entity_id: UUID) -> ConstraintReferenceSchema:
+    """
+    Retrieve the reference of the specified constraint, without its volumes.
+    """
+    projection = await ConstraintModel.find_one(
+        {"constraint.reference.id": entity_id},
+        projection_model=ConstraintReferenceProjection,
+    )
+
+    if projection is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND.value,
+            detail="Constraint not found in the USS database"
+        )
+
+    return projection.constraint.reference
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("constraint",))
 async def create_constraint(constraint_model: ConstraintModel) -> ConstraintModel:
     """
     Create a new constraint in the USS database.
     """
-    existing_constraint = await ConstraintModel.find_one({
-        "constraint.reference.id": constraint_model.constraint.reference.id
-    })
-
-    if existing_constraint:
+    # The unique index on the entity id rejects duplicates
+    try:
+        constraint_model = await constraint_model.insert()
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT.value,
             detail="Constraint already exists in the USS database"
         )
 
-    return await constraint_model.save()
+    VolumeIndex.get_instance().put(constraint_model.constraint, owned=True)
+    return constraint_model
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("constraint",))
 async def delete_constraint(entity_id: UUID) -> None:
     """
     Delete a constraint from the USS database.
     """
-    constraint_model = await get_constraint(entity_id)
+    result = await ConstraintModel.find_one({
+        "constraint.reference.id": entity_id
+    }).delete()
 
-    if constraint_model is None:
+    if result is None or result.deleted_count == 0:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND.value,
             detail="Constraint not found in the USS database"
         )
 
-    await constraint_model.delete()
+    VolumeIndex.get_instance().remove(entity_id)
 
-async def update_constraint(entity_id: UUID, new_constraint: ConstraintSchema) -> ConstraintModel:
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("constraint",))
+async def update_constraint(
+        entity_id: UUID,
+        new_constraint: ConstraintSchema,
+        pending_notification: Optional[PendingNotificationSchema] = None,
+) -> ConstraintModel:
     """
     Update an existing constraint in the USS database.
+    The stored constraint is only replaced if it is not newer than the update.
+    The pending notification is written with the update.
     """
-    constraint_model = await get_constraint(entity_id)
+    changes = {
+        "constraint": new_constraint,
+        "geometry": to_geometry_collection(new_constraint.details.volumes),
+    }
+    if pending_notification is not None:
+        changes["pending_notification"] = pending_notification
+
+    constraint_model = await ConstraintModel.find_one({
+        "constraint.reference.id": entity_id,
+        "constraint.reference.version": {"$lte": new_constraint.reference.version},
+    }).update(
+        Set(changes),
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
 
     if constraint_model is None:
+        if await ConstraintModel.find_one({"constraint.reference.id": entity_id}).exists():
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT.value,
+                detail="Constraint was updated to a newer version"
+            )
+
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND.value,
             detail="Constraint not found in the USS database"
         )
 
-    constraint_model.constraint = new_constraint
-
-    return await constraint_model.save()
-    
-async def notify_subscribers(
-        subscribers: List[SubscriberSchema],
-        constraint_id: UUID,
-        constraint: Optional[ConstraintSchema],
-
-):
-    for subscriber in subscribers:
-        uss = USSService(base_url=subscriber.uss_base_url)
-        await uss.notify_constraint(
-            subscriptions=subscriber.subscriptions,
-            constraint_id=constraint_id,
-            constraint=constraint,
-        )
+    VolumeIndex.get_instance().put(new_constraint, owned=True)
+    return constraint_model
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("constraint",))
+async def get_constraints_in_area(area_of_interest: AreaOfInterestSchema) -> List[ConstraintModel]:
+    """
+    Retrieve the constraints of this USS intersecting the area and time
+    window of the area of interest.
+    """
+    constraint_models = await ConstraintModel.find({
+        "constraint.reference.time_start.value": {"$lte": area_of_interest.time_end.value},
+        "constraint.reference.time_end.value": {"$gte": area_of_interest.time_start.value},
+        "geometry": {"$geoIntersects": {"$geometry": area_of_interest.volume.to_geojson()}},
+    }).to_list()
+
+    # The outlines in the database are approximated, the altitudes are not indexed
+    return [
+        constraint_model
+        for constraint_model in constraint_models
+        if intersects_any(area_of_interest, constraint_model.constraint.details.volumes)
+    ]
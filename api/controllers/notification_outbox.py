@@ -0,0 +1,271 @@
+import random
+
+from beanie.odm.operators.update.general import Set
+from beanie.odm.queries.update import UpdateResponse
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from config.metrics import DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, track
+from models.constraint import ConstraintModel
+from models.notification_outbox import NotificationOutboxModel
+from models.operational_intent import OperationalIntentModel
+from schemas.constraint import ConstraintSchema
+from schemas.operational_intent import OperationalIntentSchema
+from schema_types.notification import NotificationEntityType, NotificationStatus
+from schema_types.operational_intent import OperationalIntentState
+from schema_types.subscription import SubscriberSchema
+
+async def enqueue_operational_intent_notifications(
+        subscribers: List[SubscriberSchema],
+        operational_intent_id: UUID,
+        operational_intent: Optional[OperationalIntentSchema],
+) -> None:
+    """
+    Enqueue the notification of the operational intent to every subscriber.
+    """
+    payload = operational_intent.model_dump(mode="json") if operational_intent else None
+
+    for subscriber in subscribers:
+        await enqueue_notification(
+            entity_type=NotificationEntityType.OPERATIONAL_INTENT,
+            entity_id=operational_intent_id,
+            subscriber=subscriber,
+            payload=payload,
+        )
+
+async def enqueue_constraint_notifications(
+        subscribers: List[SubscriberSchema],
+        constraint_id: UUID,
+        constraint: Optional[ConstraintSchema],
+) -> None:
+    """
+    Enqueue the notification of the constraint to every subscriber.
+    """
+    payload = constraint.model_dump(mode="json") if constraint else None
+
+    for subscriber in subscribers:
+        await enqueue_notification(
+            entity_type=NotificationEntityType.CONSTRAINT,
+            entity_id=constraint_id,
+            subscriber=subscriber,
+            payload=payload,
+        )
+
+async def enqueue_pending_operational_intent_notifications(operational_intent_model: OperationalIntentModel) -> None:
+    """
+    Enqueue the pending notification written with the operational intent,
+    then clear it unless a newer write replaced it meanwhile.
+    """
+    pending_notification = operational_intent_model.pending_notification
+    if pending_notification is None:
+        return
+
+    operational_intent = operational_intent_model.operational_intent
+    deleted = operational_intent.reference.state == OperationalIntentState.DELETED
+
+    await enqueue_operational_intent_notifications(
+        subscribers=pending_notification.subscribers,
+        operational_intent_id=operational_intent.reference.id,
+        operational_intent=None if deleted else operational_intent,
+    )
+
+    await OperationalIntentModel.find_one({
+        "operational_intent.reference.id": operational_intent.reference.id,
+        "pending_notification.id": pending_notification.id,
+    }).update(Set({OperationalIntentModel.pending_notification: None}))
+
+async def enqueue_pending_constraint_notifications(constraint_model: ConstraintModel) -> None:
+    """
+    Enqueue the pending notification written with the constraint, then clear
+    it unless a newer write replaced it meanwhile.
+    """
+    pending_notification = constraint_model.pending_notification
+    if pending_notification is None:
+        return
+
+    constraint = constraint_model.constraint
+
+    await enqueue_constraint_notifications(
+        subscribers=pending_notification.subscribers,
+        constraint_id=constraint.reference.id,
+        constraint=constraint,
+    )
+
+    await ConstraintModel.find_one({
+        "constraint.reference.id": constraint.reference.id,
+        "pending_notification.id": pending_notification.id,
+    }).update(Set({ConstraintModel.pending_notification: None}))
+
+async def enqueue_interrupted_notifications() -> None:
+    """
+    Enqueue the pending notifications left by a process stopped between the
+    write of an entity and the enqueue of its notifications. Enqueuing again
+    is harmless, a notification still pending is replaced.
+    """
+    async for operational_intent_model in OperationalIntentModel.find({"pending_notification": {"$ne": None}}):
+        await enqueue_pending_operational_intent_notifications(operational_intent_model)
+
+    async for constraint_model in ConstraintModel.find({"pending_notification": {"$ne": None}}):
+        await enqueue_pending_constraint_notifications(constraint_model)
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("notification_outbox",))
+async def enqueue_notification(
+        entity_type: NotificationEntityType,
+        entity_id: UUID,
+        subscriber: SubscriberSchema,
+        payload: Optional[Dict[str, Any]],
+) -> None:
+    """
+    Enqueue a notification to a subscriber.
+    A pending notification of the same entity to the same subscriber is
+    replaced, since only the latest state of the entity is relevant.
+    """
+    uss_base_url = str(subscriber.uss_base_url)
+    now = datetime.now(timezone.utc)
+
+    query = NotificationOutboxModel.find_one({
+        "entity_id": entity_id,
+        "uss_base_url": uss_base_url,
+        "status": NotificationStatus.PENDING.value,
+    })
+    changes = Set({
+        NotificationOutboxModel.entity_type: entity_type,
+        NotificationOutboxModel.subscriptions: subscriber.subscriptions,
+        NotificationOutboxModel.payload: payload,
+        NotificationOutboxModel.attempts: 0,
+        NotificationOutboxModel.next_attempt_at: now,
+        NotificationOutboxModel.last_error: None,
+    })
+    notification = NotificationOutboxModel(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        uss_base_url=uss_base_url,
+        subscriptions=subscriber.subscriptions,
+        payload=payload,
+        next_attempt_at=now,
+    )
+
+    try:
+        await query.upsert(changes, on_insert=notification)
+    except DuplicateKeyError:
+        # Another request inserted the pending notification concurrently
+        await query.update(changes)
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("notification_outbox",))
+async def claim_due_notifications(limit: int, lease: float) -> List[NotificationOutboxModel]:
+    """
+    Atomically claim up to limit notifications due for delivery.
+    Notifications whose lease expired, because the worker delivering them
+    stopped, are claimed again. A pending notification is not claimed while
+    an older one of the same entity to the same subscriber is in flight, so
+    the subscribers receive the states of an entity in order.
+    """
+    notifications: List[NotificationOutboxModel] = []
+
+    in_flight = [
+        {"entity_id": notification.entity_id, "uss_base_url": notification.uss_base_url}
+        for notification in await NotificationOutboxModel.find(
+            {"status": NotificationStatus.IN_FLIGHT.value},
+        ).to_list()
+    ]
+
+    for _ in range(limit):
+        now = datetime.now(timezone.utc)
+
+        pending = {
+            "status": NotificationStatus.PENDING.value,
+            "next_attempt_at": {"$lte": now},
+        }
+        if in_flight:
+            pending["$nor"] = in_flight
+
+        try:
+            notification = await NotificationOutboxModel.find_one({
+                "$or": [
+                    pending,
+                    {
+                        "status": NotificationStatus.IN_FLIGHT.value,
+                        "lease_expires_at": {"$lte": now},
+                    },
+                ],
+            }).update(
+                Set({
+                    NotificationOutboxModel.status: NotificationStatus.IN_FLIGHT,
+                    NotificationOutboxModel.lease_expires_at: now + timedelta(seconds=lease),
+                }),
+                response_type=UpdateResponse.NEW_DOCUMENT,
+                sort=[("next_attempt_at", 1)],
+            )
+        except DuplicateKeyError:
+            # Another worker claimed a notification of the same entity to the
+            # same subscriber meanwhile, the next batch skips it
+            break
+
+        if notification is None:
+            break
+
+        notifications.append(notification)
+        in_flight.append({"entity_id": notification.entity_id, "uss_base_url": notification.uss_base_url})
+
+    return notifications
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("notification_outbox",))
+async def complete_notification(notification: NotificationOutboxModel) -> None:
+    """
+    Remove a delivered notification from the outbox.
+    """
+    await notification.delete()
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("notification_outbox",))
+async def reschedule_notification(
+        notification: NotificationOutboxModel,
+        error: Any,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        failed_retention: float,
+) -> None:
+    """
+    Schedule a new delivery attempt using exponential backoff with jitter.
+    The notification is marked as failed after max_attempts, and removed by
+    the database after failed_retention seconds. It is dropped if a newer
+    notification of the same entity is already pending.
+    """
+    attempts = notification.attempts + 1
+
+    if attempts >= max_attempts:
+        await notification.set({
+            NotificationOutboxModel.status: NotificationStatus.FAILED,
+            NotificationOutboxModel.attempts: attempts,
+            NotificationOutboxModel.lease_expires_at: None,
+            NotificationOutboxModel.last_error: error,
+            NotificationOutboxModel.expires_at: datetime.now(timezone.utc) + timedelta(seconds=failed_retention),
+        })
+        return
+
+    delay = min(backoff_max, backoff_base * 2 ** (attempts - 1))
+    delay = random.uniform(delay / 2, delay)
+
+    try:
+        await notification.set({
+            NotificationOutboxModel.status: NotificationStatus.PENDING,
+            NotificationOutboxModel.attempts: attempts,
+            NotificationOutboxModel.next_attempt_at: datetime.now(timezone.utc) + timedelta(seconds=delay),
+            NotificationOutboxModel.lease_expires_at: None,
+            NotificationOutboxModel.last_error: error,
+        })
+    except DuplicateKeyError:
+        # Superseded by a newer pending notification
+        await notification.delete()
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("notification_outbox",))
+async def count_notifications() -> Dict[NotificationStatus, int]:
+    """
+    Count the notifications of the outbox by status.
+    """
+    return {
+        status: await NotificationOutboxModel.find({"status": status.value}).count()
+        for status in NotificationStatus
+    }
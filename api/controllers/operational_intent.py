@@ -1,17 +1,29 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from beanie.odm.operators.update.general import Set
+from beanie.odm.queries.update import UpdateResponse
 from fastapi import HTTPException
 from http import HTTPStatus
+from pymongo.errors import DuplicateKeyError
 from uuid import UUID
 
-from models.operational_intent import OperationalIntentModel
+from config.config import Settings
+from config.metrics import DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, track
+from models.operational_intent import OperationalIntentModel, OperationalIntentReferenceProjection
+from services.airspace_mirror import AirspaceMirror
 from services.dss_service import DSSService
-from services.uss_service import USSService
-from schemas.operational_intent import OperationalIntentSchema
+from services.volume_index import VolumeIndex
+from services.uss_service import USSServiceRegistry
+from schemas.constraint import ConstraintReferenceSchema
+from schemas.operational_intent import OperationalIntentReferenceSchema, OperationalIntentSchema
 from schema_types.subscription import SubscriberSchema, SubscriptionBaseSchema
-from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.area_of_interest import AreaOfInterestSchema, to_geometry_collection
+from schema_types.notification import PendingNotificationSchema
 from schema_types.operational_intent import OperationalIntentState
-from schema_types.ovn import ovn
+from schema_types.ovn import ovn, is_ovn_available
+from utils.fan_out import gather_bounded
+from utils.geometry import intersects_any
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
 async def entity_id_exists(entity_id: UUID) -> bool:
     """
     Check if the entity ID exists in the database.
@@ -20,6 +32,7 @@ async def entity_id_exists(entity_id: UUID) -> bool:
         "operational_intent.reference.id": entity_id
     }).exists()
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
 async def get_operational_intent(entity_id: UUID) -> OperationalIntentModel:
     """
     Retrieve the specified operational intent details
@@ -35,14 +48,42 @@ async def get_operational_intent(entity_id: UUID) -> OperationalIntentModel:
         )
     return operational_intent_model
 
-async def delete_operational_intent(entity_id: UUID) -> OperationalIntentModel:
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
+async def get_operational_intent_reference(entity_id: UUID) -> OperationalIntentReferenceSchema:
+    """
+    Retrieve the reference of the specified operational intent, without its volumes
+    """
+    projection = await OperationalIntentModel.find_one(
+        {"operational_intent.reference.id": entity_id},
+        projection_model=OperationalIntentReferenceProjection,
+    )
+
+    if projection is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND.value,
+            detail="Operational intent not found"
+        )
+    return projection.operational_intent.reference
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
+async def delete_operational_intent(
+        entity_id: UUID,
+        pending_notification: Optional[PendingNotificationSchema] = None,
+) -> OperationalIntentModel:
     """
     Delete the specified operational intent
+    The pending notification is written with the deletion.
     """
+    changes = {"operational_intent.reference.state": OperationalIntentState.DELETED.value}
+    if pending_notification is not None:
+        changes["pending_notification"] = pending_notification
 
     operational_intent_model = await OperationalIntentModel.find_one({
         "operational_intent.reference.id": entity_id
-    })
+    }).update(
+        Set(changes),
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
 
     if operational_intent_model is None:
         raise HTTPException(
@@ -50,86 +91,233 @@ async def delete_operational_intent(entity_id: UUID) -> OperationalIntentModel:
             detail="Operational intent not found"
         )
 
-    operational_intent_model.operational_intent.reference.state = OperationalIntentState.DELETED
-    return await operational_intent_model.save()
+    VolumeIndex.get_instance().remove(entity_id)
+    return operational_intent_model
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
 async def create_operational_intent(operational_intent_model: OperationalIntentModel) -> OperationalIntentModel:
     """
     Create a new operational intent
     """
-    # New entity id created to identify the operational intent
-    entity_id = operational_intent_model.operational_intent.reference.id
-
-    if await entity_id_exists(entity_id):
+    # The unique index on the entity id rejects duplicates
+    try:
+        operational_intent_model = await operational_intent_model.insert()
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT.value,
             detail="Operational intent with this entity ID already exists"
         )
 
-    return await operational_intent_model.save()
+    VolumeIndex.get_instance().put(operational_intent_model.operational_intent, owned=True)
+    return operational_intent_model
 
-async def update_operational_intent(entity_id: UUID, operational_intent: OperationalIntentSchema) -> OperationalIntentModel:
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
+async def update_operational_intent(
+        entity_id: UUID,
+        operational_intent: OperationalIntentSchema,
+        pending_notification: Optional[PendingNotificationSchema] = None,
+) -> OperationalIntentModel:
     """
     Activate the specified operational intent
+    The stored operational intent is only replaced if it is not newer than
+    the update, so concurrent updates can not roll it back. The pending
+    notification is written with the update.
     """
-    operational_intent_model = await get_operational_intent(entity_id)
+    changes = {
+        "operational_intent": operational_intent,
+        "geometry": to_geometry_collection(operational_intent.details.volumes),
+    }
+    if pending_notification is not None:
+        changes["pending_notification"] = pending_notification
+
+    operational_intent_model = await OperationalIntentModel.find_one({
+        "operational_intent.reference.id": entity_id,
+        "operational_intent.reference.version": {"$lte": operational_intent.reference.version},
+    }).update(
+        Set(changes),
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
 
     if operational_intent_model is None:
+        if await entity_id_exists(entity_id):
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT.value,
+                detail="Operational intent was updated to a newer version"
+            )
+
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND.value,
             detail="Operational intent not found"
         )
 
-    operational_intent_model.operational_intent = operational_intent
+    VolumeIndex.get_instance().put(operational_intent, owned=True)
+    return operational_intent_model
+
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("operational_intent",))
+async def get_operational_intents_in_area(area_of_interest: AreaOfInterestSchema) -> List[OperationalIntentModel]:
+    """
+    Retrieve the operational intents of this USS, not deleted, intersecting
+    the area and time window of the area of interest
+    """
+    operational_intent_models = await OperationalIntentModel.find({
+        "operational_intent.reference.state": {
+            "$in": [state.value for state in OperationalIntentState if state != OperationalIntentState.DELETED],
+        },
+        "operational_intent.reference.time_start.value": {"$lte": area_of_interest.time_end.value},
+        "operational_intent.reference.time_end.value": {"$gte": area_of_interest.time_start.value},
+        "geometry": {"$geoIntersects": {"$geometry": area_of_interest.volume.to_geojson()}},
+    }).to_list()
+
+    # The outlines in the database are approximated, the altitudes are not indexed
+    return [
+        operational_intent_model
+        for operational_intent_model in operational_intent_models
+        if intersects_any(area_of_interest, operational_intent_model.operational_intent.details.volumes)
+    ]
+
+async def get_close_references(
+        dss: DSSService,
+        areas_of_interest: List[AreaOfInterestSchema],
+        use_mirror: bool = False,
+) -> Tuple[Dict[UUID, ConstraintReferenceSchema], Dict[UUID, OperationalIntentReferenceSchema]]:
+    """
+    Query the constraint and operational intent references of all the areas
+    concurrently, merged by entity id.
+    With use_mirror, the areas covered by the airspace mirror are answered
+    locally and only the other ones are queried in the DSS.
+    """
+    limit = Settings().DSS_QUERY_CONCURRENCY
+    mirror = AirspaceMirror.get_instance()
+
+    async def query_constraints(area_of_interest: AreaOfInterestSchema) -> List[ConstraintReferenceSchema]:
+        if use_mirror:
+            references = mirror.query_constraint_references(area_of_interest)
+            if references is not None:
+                return references
 
-    return await operational_intent_model.save()
+        query = await dss.query_constraint_references(area_of_interest=area_of_interest)
+        return query.constraint_references
 
-async def get_close_ovns(areas_of_interest: List[AreaOfInterestSchema]) -> List[ovn]:
+    async def query_operations(area_of_interest: AreaOfInterestSchema) -> List[OperationalIntentReferenceSchema]:
+        if use_mirror:
+            references = mirror.query_operational_intent_references(area_of_interest)
+            if references is not None:
+                return references
+
+        query = await dss.query_operational_intent_references(area_of_interest=area_of_interest)
+        return query.operational_intent_references
+
+    # Both queries of every area share the same DSS concurrency limit
+    queried = await gather_bounded(
+        [
+            *(
+                lambda area_of_interest=area_of_interest: query_constraints(area_of_interest)
+                for area_of_interest in areas_of_interest
+            ),
+            *(
+                lambda area_of_interest=area_of_interest: query_operations(area_of_interest)
+                for area_of_interest in areas_of_interest
+            ),
+        ],
+        limit=limit,
+    )
+    constraints_queried = queried[:len(areas_of_interest)]
+    operations_queried = queried[len(areas_of_interest):]
+
+    # The same entity is returned once for each area it overlaps
+    constraint_references: Dict[UUID, ConstraintReferenceSchema] = {
+        constraint.id: constraint
+        for references in constraints_queried
+        for constraint in references
+    }
+    operational_intent_references: Dict[UUID, OperationalIntentReferenceSchema] = {
+        operation.id: operation
+        for references in operations_queried
+        for operation in references
+    }
+
+    return constraint_references, operational_intent_references
+
+def _require_ovn(value: Optional[str], entity: str, entity_id: UUID, uss_base_url: str) -> ovn:
+    """
+    Check the OVN of a conflicting entity fetched from the USS managing it.
+    The DSS rejects the keys without the OVN of every conflicting entity.
+    """
+    if not is_ovn_available(value):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_GATEWAY.value,
+            detail=f"USS at {uss_base_url} did not disclose the OVN of {entity} {entity_id}"
+        )
+    return value
+
+async def get_close_ovns(dss: DSSService, areas_of_interest: List[AreaOfInterestSchema]) -> List[ovn]:
     """
     Get the keys of obstacles in the area of interest.
-    This is a placeholder function and should be implemented based on actual requirements.
+    """
+    constraint_references, operational_intent_references = await get_close_references(
+        dss=dss,
+        areas_of_interest=areas_of_interest,
+    )
+
+    return await get_ovns(constraint_references, operational_intent_references)
+
+async def get_ovns(
+        constraint_references: Dict[UUID, ConstraintReferenceSchema],
+        operational_intent_references: Dict[UUID, OperationalIntentReferenceSchema],
+) -> List[ovn]:
+    """
+    Get the keys of the references already queried, as the DSS requires the
+    OVN of every entity it matched, even the ones not intersecting the area.
+    The OVNs are read from the references returned by the DSS, and only
+    fetched from the owning USS when the DSS does not disclose them.
     """
     # List of conflict ovns to be considered when creating the area with conflicts
-    keys: List[ovn] = []
+    keys: List[ovn] = [
+        reference.ovn
+        for reference in [*constraint_references.values(), *operational_intent_references.values()]
+        if is_ovn_available(reference.ovn)
+    ]
 
-    # Verify constraints
-    dss = DSSService()
-    for area_of_interest in areas_of_interest:
-        constraints_queried = await dss.query_constraint_references(
-            area_of_interest=area_of_interest
-        )
-        if len(constraints_queried.constraint_references) != 0:
-            for constraint in constraints_queried.constraint_references:
-                uss = USSService(base_url=constraint.uss_base_url)
-                original_constraint = await uss.get_constraint(
-                    entity_id=constraint.id,
-                )
-                keys.append(original_constraint.constraint.reference.ovn)
-
-        # Verify other Operational Intents
-        query_operations = await dss.query_operational_intent_references(
-            area_of_interest=area_of_interest,
-        )
-        if len(query_operations.operational_intent_references) != 0:
-            for operation in query_operations.operational_intent_references:
-                uss = USSService(base_url=operation.uss_base_url)
-                original_operation = await uss.get_operational_intent(
-                    entity_id=operation.id,
-                )
-                keys.append(original_operation.operational_intent.reference.ovn)
+    async def fetch_constraint_ovn(constraint: ConstraintReferenceSchema) -> ovn:
+        async with USSServiceRegistry.get_instance().lease(constraint.uss_base_url) as uss:
+            original_constraint = await uss.get_constraint(
+                entity_id=constraint.id,
+                version=constraint.version,
+            )
 
-    return keys
+            # Notifications may leave the OVN out of the cached constraint
+            if not is_ovn_available(original_constraint.constraint.reference.ovn):
+                original_constraint = await uss.get_constraint(entity_id=constraint.id)
 
-async def notify_subscribers(
-        subscribers: List[SubscriberSchema],
-        operational_intent_id: UUID,
-        operational_intent: Optional[OperationalIntentSchema],
-
-):
-    for subscriber in subscribers:
-        uss = USSService(base_url=subscriber.uss_base_url)
-        await uss.notify_operational_intent(
-            subscriptions=subscriber.subscriptions,
-            operational_intent_id=operational_intent_id,
-            operational_intent=operational_intent,
-        )
+        return _require_ovn(original_constraint.constraint.reference.ovn, "constraint", constraint.id, constraint.uss_base_url)
+
+    async def fetch_operation_ovn(operation: OperationalIntentReferenceSchema) -> ovn:
+        async with USSServiceRegistry.get_instance().lease(operation.uss_base_url) as uss:
+            original_operation = await uss.get_operational_intent(
+                entity_id=operation.id,
+                version=operation.version,
+            )
+
+            # Notifications may leave the OVN out of the cached operational intent
+            if not is_ovn_available(original_operation.operational_intent.reference.ovn):
+                original_operation = await uss.get_operational_intent(entity_id=operation.id)
+
+        return _require_ovn(original_operation.operational_intent.reference.ovn, "operational intent", operation.id, operation.uss_base_url)
+
+    keys += await gather_bounded(
+        [
+            *(
+                lambda constraint=constraint: fetch_constraint_ovn(constraint)
+                for constraint in constraint_references.values()
+                if not is_ovn_available(constraint.ovn)
+            ),
+            *(
+                lambda operation=operation: fetch_operation_ovn(operation)
+                for operation in operational_intent_references.values()
+                if not is_ovn_available(operation.ovn)
+            ),
+        ],
+        limit=Settings().USS_QUERY_CONCURRENCY,
+    )
+
+    return keys
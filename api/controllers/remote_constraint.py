@@ -1,22 +1,70 @@
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 
-from schemas.area_of_interest import AreaOfInterestSchema
-from services.uss_service import USSService
 from schemas.constraint import ConstraintReferenceSchema
+from schemas.fan_out import FanOutResult
+from schemas.remote_volume import RemoteEntityVolumesSchema
+from services.uss_service import USSServiceRegistry
+from utils.fan_out import FanOutCall, RemoteQueryFanOut
 
-async def get_constraints_volume(constraints: List[ConstraintReferenceSchema]) -> List[AreaOfInterestSchema]:
+async def get_constraints_volume(
+        constraints: List[ConstraintReferenceSchema],
+        budget: Optional[float] = None,
+) -> List[RemoteEntityVolumesSchema]:
     """
-    Extracts the volumes from a list of constraint references.
+    Retrieve concurrently the volumes of a list of constraint references.
+    Each constraint reports whether its volumes were retrieved, so partial
+    results are returned when some USSs fail or do not answer in time.
     """
-    volumes: List[AreaOfInterestSchema] = []
+    results = await RemoteQueryFanOut.get_instance().run(
+        _get_volumes_calls(constraints),
+        budget=budget,
+    )
 
-    for constraint in constraints:
-        try:
-            uss = USSService(constraint.uss_base_url)
-            res =  await uss.get_constraint(constraint.id)
-            volumes += res.constraint.details.volumes
-        except Exception as _:
-            pass
+    return [
+        _to_entity_volumes(constraint, result)
+        for constraint, result in zip(constraints, results)
+    ]
 
-    return volumes
+async def iter_constraints_volume(
+        constraints: List[ConstraintReferenceSchema],
+        budget: Optional[float] = None,
+) -> AsyncIterator[RemoteEntityVolumesSchema]:
+    """
+    Retrieve concurrently the volumes of a list of constraint references,
+    yielding each constraint as soon as the USS managing it answers.
+    """
+    references: Dict[str, ConstraintReferenceSchema] = {
+        str(constraint.id): constraint
+        for constraint in constraints
+    }
+
+    async for result in RemoteQueryFanOut.get_instance().iterate(
+        _get_volumes_calls(constraints),
+        budget=budget,
+    ):
+        yield _to_entity_volumes(references[result.key], result)
+
+def _get_volumes_calls(constraints: List[ConstraintReferenceSchema]) -> List[FanOutCall]:
+
+    async def get_volumes(constraint: ConstraintReferenceSchema):
+        async with USSServiceRegistry.get_instance().lease(constraint.uss_base_url) as uss:
+            res = await uss.get_constraint(constraint.id, version=constraint.version)
+        return res.constraint.details.volumes
+
+    return [
+        (
+            str(constraint.id),
+            str(constraint.uss_base_url),
+            lambda constraint=constraint: get_volumes(constraint),
+        )
+        for constraint in constraints
+    ]
 
+def _to_entity_volumes(constraint: ConstraintReferenceSchema, result: FanOutResult) -> RemoteEntityVolumesSchema:
+    return RemoteEntityVolumesSchema(
+        entity_id=constraint.id,
+        uss_base_url=constraint.uss_base_url,
+        status=result.status,
+        volumes=result.value or [],
+        error=result.error,
+    )
@@ -1,23 +1,70 @@
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 
-from schemas.area_of_interest import AreaOfInterestSchema
 from schemas.operational_intent import OperationalIntentReferenceSchema
-from services.uss_service import USSService
+from schemas.fan_out import FanOutResult
+from schemas.remote_volume import RemoteEntityVolumesSchema
+from services.uss_service import USSServiceRegistry
+from utils.fan_out import FanOutCall, RemoteQueryFanOut
 
-async def get_operational_intents_volume(operational_intents: List[OperationalIntentReferenceSchema]) -> List[AreaOfInterestSchema]:
+async def get_operational_intents_volume(
+        operational_intents: List[OperationalIntentReferenceSchema],
+        budget: Optional[float] = None,
+) -> List[RemoteEntityVolumesSchema]:
     """
-    Extracts the volumes from a list of operational intent references.
+    Retrieve concurrently the volumes of a list of operational intent references.
+    Each operational intent reports whether its volumes were retrieved, so partial
+    results are returned when some USSs fail or do not answer in time.
     """
-    volumes: List[AreaOfInterestSchema] = []
+    results = await RemoteQueryFanOut.get_instance().run(
+        _get_volumes_calls(operational_intents),
+        budget=budget,
+    )
 
-    for operational_intent in operational_intents:
-        try:
-            uss = USSService(operational_intent.uss_base_url)
-            res = await uss.get_operational_intent(operational_intent.id)
-            volumes += res.operational_intent.details.volumes
-        except Exception as _:
-            continue
+    return [
+        _to_entity_volumes(operational_intent, result)
+        for operational_intent, result in zip(operational_intents, results)
+    ]
 
+async def iter_operational_intents_volume(
+        operational_intents: List[OperationalIntentReferenceSchema],
+        budget: Optional[float] = None,
+) -> AsyncIterator[RemoteEntityVolumesSchema]:
+    """
+    Retrieve concurrently the volumes of a list of operational intent references,
+    yielding each operational intent as soon as the USS managing it answers.
+    """
+    references: Dict[str, OperationalIntentReferenceSchema] = {
+        str(operational_intent.id): operational_intent
+        for operational_intent in operational_intents
+    }
+
+    async for result in RemoteQueryFanOut.get_instance().iterate(
+        _get_volumes_calls(operational_intents),
+        budget=budget,
+    ):
+        yield _to_entity_volumes(references[result.key], result)
+
+def _get_volumes_calls(operational_intents: List[OperationalIntentReferenceSchema]) -> List[FanOutCall]:
+
+    async def get_volumes(operational_intent: OperationalIntentReferenceSchema):
+        async with USSServiceRegistry.get_instance().lease(operational_intent.uss_base_url) as uss:
+            res = await uss.get_operational_intent(operational_intent.id, version=operational_intent.version)
+        return res.operational_intent.details.volumes
 
-    return volumes
+    return [
+        (
+            str(operational_intent.id),
+            str(operational_intent.uss_base_url),
+            lambda operational_intent=operational_intent: get_volumes(operational_intent),
+        )
+        for operational_intent in operational_intents
+    ]
 
+def _to_entity_volumes(operational_intent: OperationalIntentReferenceSchema, result: FanOutResult) -> RemoteEntityVolumesSchema:
+    return RemoteEntityVolumesSchema(
+        entity_id=operational_intent.id,
+        uss_base_url=operational_intent.uss_base_url,
+        status=result.status,
+        volumes=result.value or [],
+        error=result.error,
+    )
@@ -1,8 +1,10 @@
 from typing import List
 from fastapi import HTTPException
 from http import HTTPStatus
+from pymongo.errors import DuplicateKeyError
 from uuid import UUID
 
+from config.metrics import DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, track
 from models.subscription import SubscriptionModel
 from services.dss_service import DSSService
 from services.uss_service import USSService
@@ -11,23 +13,22 @@ from schemas.area_of_interest import AreaOfInterestSchema
 from schema_types.operational_intent import OperationalIntentState
 from schema_types.ovn import ovn
 
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("subscription",))
 async def create_subscription(subscription: SubscriptionModel) -> SubscriptionModel:
     """
     Create a new subscription in the database.
     """
 
-    existing_subscription = await SubscriptionModel.find_one({
-        "subscription.id": subscription.subscription.id
-    })
-
-    if existing_subscription:
+    # The unique index on the subscription id rejects duplicates
+    try:
+        return await subscription.insert()
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT.value,
             detail="Subscription already exists"
         )
 
-    return await subscription.save()
-
+@track(DATABASE_OPERATION_DURATION, DATABASE_OPERATION_ERRORS, ("subscription",))
 async def get_subscription(subscription_id: UUID) -> SubscriptionModel:
     """
     Retrieve the specified subscription details.
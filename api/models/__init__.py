@@ -1,6 +1,7 @@
 from models.operational_intent import OperationalIntentModel
 from models.constraint import ConstraintModel
 from models.subscription import SubscriptionModel
+from models.notification_outbox import NotificationOutboxModel
 
 
-__all__ = [OperationalIntentModel, ConstraintModel, SubscriptionModel]
+__all__ = [OperationalIntentModel, ConstraintModel, SubscriptionModel, NotificationOutboxModel]
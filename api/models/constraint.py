@@ -1,9 +1,45 @@
-from beanie import Document
+from beanie import Document, Insert, Replace, Save, before_event
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
 
-from schemas.constraint import ConstraintSchema
+from schemas.area_of_interest import to_geometry_collection
+from schemas.constraint import ConstraintReferenceSchema, ConstraintSchema
+from schema_types.notification import PendingNotificationSchema
 
 class ConstraintModel(Document):
     constraint: ConstraintSchema
+    # GeoJSON outline of the volumes, derived on every write for spatial queries
+    geometry: Optional[Dict[str, Any]] = None
+    # Notifications not enqueued yet, enqueued again on startup
+    pending_notification: Optional[PendingNotificationSchema] = None
+
+    @before_event(Insert, Replace, Save)
+    def derive_geometry(self):
+        self.geometry = to_geometry_collection(self.constraint.details.volumes)
 
     class Settings:
         name = "constraint"
+        indexes = [
+            IndexModel(
+                [("constraint.reference.id", ASCENDING)],
+                unique=True,
+            ),
+            IndexModel([
+                ("constraint.reference.time_start.value", ASCENDING),
+                ("constraint.reference.time_end.value", ASCENDING),
+            ]),
+            IndexModel([("geometry", GEOSPHERE)]),
+        ]
+
+class ConstraintReferenceView(BaseModel):
+    reference: ConstraintReferenceSchema
+
+class ConstraintReferenceProjection(BaseModel):
+    """
+    Reference of a stored constraint, read without its volumes.
+    """
+    constraint: ConstraintReferenceView
+
+    class Settings:
+        projection = {"constraint.reference": 1}
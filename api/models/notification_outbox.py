@@ -0,0 +1,54 @@
+from beanie import Document
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from schema_types.notification import NotificationEntityType, NotificationStatus
+from schema_types.subscription import SubscriptionBaseSchema
+
+class NotificationOutboxModel(Document):
+    entity_type: NotificationEntityType
+    entity_id: UUID
+    uss_base_url: str
+    subscriptions: List[SubscriptionBaseSchema]
+    # Serialized entity sent to the subscriber. None notifies a deletion.
+    payload: Optional[Dict[str, Any]] = None
+    status: NotificationStatus = NotificationStatus.PENDING
+    attempts: int = 0
+    next_attempt_at: datetime
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[Any] = None
+    # Failed notifications are removed by the database after this date
+    expires_at: Optional[datetime] = None
+
+    class Settings:
+        name = "notification_outbox"
+        indexes = [
+            IndexModel([
+                ("status", ASCENDING),
+                ("next_attempt_at", ASCENDING),
+            ]),
+            # Only one pending notification per entity and subscriber
+            IndexModel(
+                [
+                    ("entity_id", ASCENDING),
+                    ("uss_base_url", ASCENDING),
+                ],
+                unique=True,
+                partialFilterExpression={"status": NotificationStatus.PENDING.value},
+            ),
+            # Only one notification in flight per entity and subscriber, so
+            # they are delivered in order. The status key tells it apart from
+            # the previous index on the same keys.
+            IndexModel(
+                [
+                    ("entity_id", ASCENDING),
+                    ("uss_base_url", ASCENDING),
+                    ("status", ASCENDING),
+                ],
+                unique=True,
+                partialFilterExpression={"status": NotificationStatus.IN_FLIGHT.value},
+            ),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
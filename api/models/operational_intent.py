@@ -1,9 +1,46 @@
-from beanie import Document
+from beanie import Document, Insert, Replace, Save, before_event
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
 
-from schemas.operational_intent import OperationalIntentSchema
+from schemas.area_of_interest import to_geometry_collection
+from schemas.operational_intent import OperationalIntentReferenceSchema, OperationalIntentSchema
+from schema_types.notification import PendingNotificationSchema
 
 class OperationalIntentModel(Document):
     operational_intent: OperationalIntentSchema
+    # GeoJSON outline of the volumes, derived on every write for spatial queries
+    geometry: Optional[Dict[str, Any]] = None
+    # Notifications not enqueued yet, enqueued again on startup
+    pending_notification: Optional[PendingNotificationSchema] = None
+
+    @before_event(Insert, Replace, Save)
+    def derive_geometry(self):
+        self.geometry = to_geometry_collection(self.operational_intent.details.volumes)
 
     class Settings:
         name = "operational_intent"
+        indexes = [
+            IndexModel(
+                [("operational_intent.reference.id", ASCENDING)],
+                unique=True,
+            ),
+            IndexModel([
+                ("operational_intent.reference.state", ASCENDING),
+                ("operational_intent.reference.time_start.value", ASCENDING),
+                ("operational_intent.reference.time_end.value", ASCENDING),
+            ]),
+            IndexModel([("geometry", GEOSPHERE)]),
+        ]
+
+class OperationalIntentReferenceView(BaseModel):
+    reference: OperationalIntentReferenceSchema
+
+class OperationalIntentReferenceProjection(BaseModel):
+    """
+    Reference of a stored operational intent, read without its volumes.
+    """
+    operational_intent: OperationalIntentReferenceView
+
+    class Settings:
+        projection = {"operational_intent.reference": 1}
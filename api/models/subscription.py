@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 
 from schemas.subscription import SubscriptionSchema
 
@@ -7,3 +8,13 @@ class SubscriptionModel(Document):
 
     class Settings:
         name = "subscription"
+        indexes = [
+            IndexModel(
+                [("subscription.id", ASCENDING)],
+                unique=True,
+            ),
+            IndexModel([
+                ("subscription.time_start.value", ASCENDING),
+                ("subscription.time_end.value", ASCENDING),
+            ]),
+        ]
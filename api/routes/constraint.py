@@ -4,9 +4,12 @@ from fastapi import APIRouter, HTTPException
 
 from config.logger import MessageLogger
 from controllers import constraint as constraint_controller
-from schemas.constraint import ConstraintNotificationRequest
+from schemas.constraint import ConstraintGetResponse, ConstraintNotificationRequest
 from services.dss_service import DSSService
+from services.airspace_mirror import AirspaceMirror
+from services.remote_entity_cache import RemoteEntityCache
 from schema_types.constraint import ConstraintState
+from utils.response import ModelResponse
 
 router = APIRouter()
 
@@ -23,24 +26,31 @@ async def handle_constraint_notification(
     Receive notification of new constraints in the area
     """
 
+    cache = RemoteEntityCache.get_instance()
+    AirspaceMirror.get_instance().apply_constraint_notification(notification)
+
     if notification.constraint is None:
-        # If the constraint is not provided, we cannot process the notification
+        # If the constraint is not provided, it was removed
+        cache.evict(notification.constraint_id)
+
         MessageLogger.log(
             f"Constraint Removed",
-            data=notification.model_dump(mode="json"),
+            data=notification,
         )
         return
 
+    cache.put(notification.constraint)
+
     # Log the received notification
     MessageLogger.log(
             f"Constraint Changed",
-        data=notification.model_dump(mode="json"),
+        data=notification,
     )
 
 @router.get(
     "/{entity_id}",
     response_description="Retrieve the specified constraint details",
-    response_model=dict,
+    response_model=ConstraintGetResponse,
     status_code=HTTPStatus.OK.value,
 )
 async def get_constraint(entity_id: UUID):
@@ -52,6 +62,6 @@ async def get_constraint(entity_id: UUID):
             detail="Constraint not found in the USS database"
         )
 
-    return {
-            "constraint": constraint_model.constraint.model_dump(mode="json"),
-    }
+    return ModelResponse(
+        ConstraintGetResponse(constraint=constraint_model.constraint),
+    )
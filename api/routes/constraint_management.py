@@ -1,15 +1,19 @@
 from http import HTTPStatus
 from uuid import uuid4, UUID
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from config.logger import OperatorInputLogger, log_route_handler
 from models.constraint import ConstraintModel
+from schema_types.notification import PendingNotificationSchema
 from schemas.response import Response
-from schemas.constraint import ConstraintDetailSchema, ConstraintSchema
-from schemas.area_of_interest import AreaOfInterestSchema
+from utils.response import ModelResponse
+from schemas.constraint import ConstraintDetailSchema, ConstraintGetResponse, ConstraintSchema, OperatorConstraintSchema
+from schemas.area_of_interest import AreaOfInterestSchema, OperatorAreaOfInterestSchema
 from controllers import constraint as constraint_controller
-from services.dss_service import DSSService
+from controllers import notification_outbox as notification_outbox_controller
+from services.airspace_mirror import AirspaceMirror
+from services.dss_service import DSSService, get_dss_service
 
 router = APIRouter()
 
@@ -22,12 +26,12 @@ DEFAULT_CONSTRAINT_TYPE = "uss.icea.non_utm_aircraft_operations"
 )
 @log_route_handler(OperatorInputLogger, "Constraint Added")
 async def add_constraint(
-    areas_of_interest: List[AreaOfInterestSchema]
+    areas_of_interest: List[OperatorAreaOfInterestSchema],
+    dss: DSSService = Depends(get_dss_service),
 ):
 
     entity_id = uuid4()
 
-    dss = DSSService()
     constraint_created = await dss.create_constraint_reference(
         entity_id=entity_id,
         areas_of_interest=areas_of_interest,
@@ -42,28 +46,30 @@ async def add_constraint(
         ),
     )
 
-    await constraint_controller.create_constraint(
+    constraint_model = await constraint_controller.create_constraint(
         constraint_model=ConstraintModel(
             constraint=constraint,
+            pending_notification=PendingNotificationSchema(subscribers=constraint_created.subscribers),
         )
     )
 
-    await constraint_controller.notify_subscribers(
-        subscribers=constraint_created.subscribers,
-        constraint_id=entity_id,
-        constraint=constraint,
-    )
+    AirspaceMirror.get_instance().put_constraint(constraint)
+
+    await notification_outbox_controller.enqueue_pending_constraint_notifications(constraint_model)
 
-    return Response(
-        status=HTTPStatus.CREATED.value,
-        message="Constraint created successfully.",
-        data=constraint_created.model_dump(mode="json"),
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.CREATED.value,
+            message="Constraint created successfully.",
+            data=constraint_created,
+        ),
+        status_code=HTTPStatus.CREATED.value,
     )
 
 @router.get(
     "/{entity_id}",
     response_description="Retrieve the specified constraint details",
-    response_model=dict,
+    response_model=ConstraintGetResponse,
     status_code=HTTPStatus.OK.value,
 )
 @log_route_handler(OperatorInputLogger, "Constraint Retrieved")
@@ -82,9 +88,9 @@ async def get_constraint(
             detail="Constraint not found in the USS database"
         )
 
-    return {
-        "constraint": constraint_model.constraint.model_dump(mode="json"),
-    }
+    return ModelResponse(
+        ConstraintGetResponse(constraint=constraint_model.constraint),
+    )
 
 @router.delete(
     "/{entity_id}",
@@ -94,30 +100,33 @@ async def get_constraint(
 @log_route_handler(OperatorInputLogger, "Constraint Deleted")
 async def delete_constraint(
     entity_id: UUID,
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Delete a constraint by its entity ID.
     """
-    dss = DSSService()
-
     # Verify if the Constraint exists
-    constraint = await constraint_controller.get_constraint(entity_id=entity_id)
+    constraint_reference = await constraint_controller.get_constraint_reference(entity_id=entity_id)
 
     # Delete the constraint reference in the DSS
     constraint_reference_deleted = await dss.delete_constraint_reference(
-        entity_id=constraint.reference.id,
-        ovn=constraint.reference.ovn,
+        entity_id=constraint_reference.id,
+        ovn=constraint_reference.ovn,
     )
 
-    # Delete the constraint in the USS database
-    await constraint_controller.delete_constraint(entity_id=entity_id)
-
-    await constraint_controller.notify_subscribers(
+    # The document is removed, so the notifications are enqueued first. The
+    # reference is already deleted in the DSS, so they hold either way.
+    await notification_outbox_controller.enqueue_constraint_notifications(
         subscribers=constraint_reference_deleted.subscribers,
         constraint_id=entity_id,
         constraint=None,
     )
 
+    # Delete the constraint in the USS database
+    await constraint_controller.delete_constraint(entity_id=entity_id)
+
+    AirspaceMirror.get_instance().remove_constraint(entity_id)
+
 @router.patch(
     "/",
     response_description="Update a constraint",
@@ -125,13 +134,12 @@ async def delete_constraint(
 )
 @log_route_handler(OperatorInputLogger, "Constraint Updated")
 async def update_constraint(
-    new_constraint: ConstraintSchema,
+    new_constraint: OperatorConstraintSchema,
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Update an existing constraint by its entity ID.
     """
-    dss = DSSService()
-
     # Update the constraint reference in the DSS
     constraint_reference_updated = await dss.update_constraint_reference(
         entity_id=new_constraint.reference.id,
@@ -145,17 +153,19 @@ async def update_constraint(
     updated_constraint = await constraint_controller.update_constraint(
         entity_id=new_constraint.reference.id,
         new_constraint=new_constraint,
+        pending_notification=PendingNotificationSchema(subscribers=constraint_reference_updated.subscribers),
     )
 
+    AirspaceMirror.get_instance().put_constraint(new_constraint)
+
     # Notify subscribers about the updated constraint
-    await constraint_controller.notify_subscribers(
-        subscribers=constraint_reference_updated.subscribers,
-        constraint_id=new_constraint.reference.id,
-        constraint=new_constraint,
-    )
+    await notification_outbox_controller.enqueue_pending_constraint_notifications(updated_constraint)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Constraint updated successfully.",
-        data=updated_constraint.model_dump(mode="json"),
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Constraint updated successfully.",
+            data=updated_constraint,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
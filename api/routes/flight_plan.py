@@ -1,22 +1,35 @@
-from fastapi import APIRouter, Body, HTTPException, Request
+import asyncio
+import json
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from functools import wraps
-from typing import List
+from typing import Annotated, AsyncIterator, List
 from uuid import uuid4, UUID
 from http import HTTPStatus
 
+from controllers import conflict as conflict_controller
 from controllers import operational_intent as operational_intent_controller
 from controllers import remote_constraint as remote_constraint_controller
 from controllers import remote_operational_intent as remote_operational_intent_controller
+from controllers import notification_outbox as notification_outbox_controller
+from config.config import Settings
 from config.logger import PlanningAttemptLogger, OperatorInputLogger, log_route_handler
 from models.operational_intent import OperationalIntentModel
-from services.dss_service import DSSService
+from services.airspace_mirror import AirspaceMirror
+from services.dss_service import DSSService, get_dss_service
+from schema_types.notification import PendingNotificationSchema
 from schema_types.operational_intent import OperationalIntentState
 from schema_types.ovn import OVN
-from schemas.operational_intent import OperationalIntentDetailSchema, OperationalIntentSchema
-from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.constraint import ConstraintReferenceSchema
+from schemas.operational_intent import OperationalIntentDetailSchema, OperationalIntentReferenceSchema, OperationalIntentSchema, OperatorOperationalIntentSchema
+from schemas.area_of_interest import AreaOfInterestSchema, OperatorAreaOfInterestSchema
 from schemas.response import Response
+from utils.response import ModelResponse
 from schemas.error import ResponseError
+from schemas.remote_volume import RemoteEntityVolumesSchema
 from services.uss_service import USSService
+from utils.fan_out import merge_iterators
 
 router = APIRouter()
 
@@ -31,7 +44,8 @@ router = APIRouter()
 )
 @log_route_handler(PlanningAttemptLogger, "Flight Created")
 async def create_flight_plan(
-    area_of_interest: AreaOfInterestSchema = Body(...),
+    area_of_interest: Annotated[OperatorAreaOfInterestSchema, Body()],
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Create a new operational intent
@@ -40,18 +54,40 @@ async def create_flight_plan(
     # New entity id created to identify the operational intent
     entity_id = uuid4()
 
-    # Verify constraints
-    dss = DSSService()
-    query_constraints = await dss.query_constraint_references(
-        area_of_interest=area_of_interest
+    # Verify constraints and other Operational Intents
+    constraint_references, operational_intent_references = await operational_intent_controller.get_close_references(
+        dss=dss,
+        areas_of_interest=[area_of_interest],
+        use_mirror=True,
+    )
+
+    # The DSS matches coarse cells, so the volumes of the references are
+    # retrieved to discard the ones that do not intersect the area. The
+    # entities of this USS are checked in the database
+    (local_constraints, local_operations), constraints, operational_intents = await asyncio.gather(
+        conflict_controller.get_local_conflicts(
+            area_of_interest,
+            list(constraint_references.values()),
+            list(operational_intent_references.values()),
+        ),
+        remote_constraint_controller.get_constraints_volume(
+            conflict_controller.get_candidates(area_of_interest, list(constraint_references.values())),
+            budget=Settings().QUERY_CONFLICTS_BUDGET,
+        ),
+        remote_operational_intent_controller.get_operational_intents_volume(
+            conflict_controller.get_candidates(area_of_interest, list(operational_intent_references.values())),
+            budget=Settings().QUERY_CONFLICTS_BUDGET,
+        ),
     )
-    conflicting_constraints = query_constraints.constraint_references
 
-    # Verify other Operational Intents
-    query_operations = await dss.query_operational_intent_references(
-        area_of_interest=area_of_interest,
-    )
-    conflicting_operations = query_operations.operational_intent_references
+    conflicting_constraints = [
+        constraint_references[constraint.entity_id]
+        for constraint in local_constraints + await conflict_controller.filter_conflicting(area_of_interest, constraints)
+    ]
+    conflicting_operations = [
+        operational_intent_references[operation.entity_id]
+        for operation in local_operations + await conflict_controller.filter_conflicting(area_of_interest, operational_intents)
+    ]
 
     if conflicting_constraints or conflicting_operations:
         raise HTTPException(
@@ -65,10 +101,15 @@ async def create_flight_plan(
             ).model_dump(mode="json"),
         )
 
+    # The DSS requires the OVN of every entity it matched, including the ones
+    # discarded above
+    ovns: List[OVN] = await operational_intent_controller.get_ovns(constraint_references, operational_intent_references)
+
     # Register the operational intent reference in the DSS
     create_operation = await dss.create_operational_intent(
         entity_id=entity_id,
         area_of_interest=area_of_interest,
+        keys=ovns,
     )
 
     operational_intent = OperationalIntentSchema(
@@ -81,23 +122,25 @@ async def create_flight_plan(
     )
      
     operation_model = OperationalIntentModel(
-        operational_intent=operational_intent
+        operational_intent=operational_intent,
+        pending_notification=PendingNotificationSchema(subscribers=create_operation.subscribers),
     )
 
-    await operational_intent_controller.create_operational_intent(
+    operation_model = await operational_intent_controller.create_operational_intent(
         operational_intent_model=operation_model,
     )
 
-    await operational_intent_controller.notify_subscribers(
-        subscribers=create_operation.subscribers,
-        operational_intent_id=entity_id,
-        operational_intent=operational_intent,
-    )
+    AirspaceMirror.get_instance().put_operational_intent(operational_intent)
+
+    await notification_outbox_controller.enqueue_pending_operational_intent_notifications(operation_model)
 
-    return Response(
-        status=HTTPStatus.CREATED.value,
-        message="Operational intent created successfully",
-        data=operational_intent.model_dump(mode="json"),
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.CREATED.value,
+            message="Operational intent created successfully",
+            data=operational_intent,
+        ),
+        status_code=HTTPStatus.CREATED.value,
     )
 
 @router.put(
@@ -108,7 +151,8 @@ async def create_flight_plan(
 )
 @log_route_handler(PlanningAttemptLogger, "Flight Plan Created With Conflict")
 async def create_flight_plan_with_conflict(
-    area_of_interest: AreaOfInterestSchema = Body(...),
+    area_of_interest: Annotated[OperatorAreaOfInterestSchema, Body()],
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Create a new operational intent
@@ -117,10 +161,9 @@ async def create_flight_plan_with_conflict(
     entity_id = uuid4()
 
     # List of conflict ovns to be considered when creating the area with conflicts
-    ovns: List[OVN] = await operational_intent_controller.get_close_ovns([area_of_interest])
+    ovns: List[OVN] = await operational_intent_controller.get_close_ovns(dss, [area_of_interest])
 
     # Register the operational intent reference in the DSS
-    dss = DSSService()
     create_operation = await dss.create_operational_intent(
         entity_id=entity_id,
         area_of_interest=area_of_interest,
@@ -138,22 +181,24 @@ async def create_flight_plan_with_conflict(
      
     operation_model = OperationalIntentModel(
         operational_intent=operational_intent,
+        pending_notification=PendingNotificationSchema(subscribers=create_operation.subscribers),
     )
 
-    await operational_intent_controller.create_operational_intent(
+    operation_model = await operational_intent_controller.create_operational_intent(
         operational_intent_model=operation_model,
     )
 
-    await operational_intent_controller.notify_subscribers(
-        subscribers=create_operation.subscribers,
-        operational_intent_id=entity_id,
-        operational_intent=operational_intent,
-    )
+    AirspaceMirror.get_instance().put_operational_intent(operational_intent)
 
-    return Response(
-        status=HTTPStatus.CREATED.value,
-        message="Operational intent created successfully",
-        data=operational_intent.model_dump(mode="json"),
+    await notification_outbox_controller.enqueue_pending_operational_intent_notifications(operation_model)
+
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.CREATED.value,
+            message="Operational intent created successfully",
+            data=operational_intent,
+        ),
+        status_code=HTTPStatus.CREATED.value,
     )
 
 @router.post(
@@ -164,35 +209,133 @@ async def create_flight_plan_with_conflict(
 )
 @log_route_handler(OperatorInputLogger, "Query Conflicts")
 async def query_conflicts(
-    area_of_interest: AreaOfInterestSchema = Body(...),
+    area_of_interest: Annotated[OperatorAreaOfInterestSchema, Body()],
+    stream: bool = Query(False, description="Stream each entity as NDJSON as soon as its USS answers"),
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Query conflicts in an area
     """
 
-    # Query constraints
-    dss = DSSService()
-    query_constraints = await dss.query_constraint_references(
-        area_of_interest=area_of_interest
-    )
-    constraint_volumes = await remote_constraint_controller.get_constraints_volume(query_constraints.constraint_references)
+    # Query constraints and operational intents
+    constraint_references, operational_intent_references = await operational_intent_controller.get_close_references(
+        dss=dss,
+        areas_of_interest=[area_of_interest],
+        use_mirror=True,
+    )
+
+    # References known not to touch the area are not retrieved
+    close_constraints = conflict_controller.get_candidates(area_of_interest, list(constraint_references.values()))
+    close_operations = conflict_controller.get_candidates(area_of_interest, list(operational_intent_references.values()))
+
+    # The entities of this USS are checked in the database
+    local_constraints, local_operations = await conflict_controller.get_local_conflicts(
+        area_of_interest,
+        list(constraint_references.values()),
+        list(operational_intent_references.values()),
+    )
+
+    # Retrieve the volumes from the USSs, within the budget of the request
+    budget = Settings().QUERY_CONFLICTS_BUDGET
+
+    if stream:
+        return StreamingResponse(
+            stream_conflicts(
+                area_of_interest=area_of_interest,
+                constraints=close_constraints,
+                operational_intents=close_operations,
+                local_constraints=local_constraints,
+                local_operational_intents=local_operations,
+                budget=budget,
+            ),
+            media_type="application/x-ndjson",
+        )
 
-    # Query operational intents
-    query_operations = await dss.query_operational_intent_references(
-        area_of_interest=area_of_interest,
+    constraints, operational_intents = await asyncio.gather(
+        remote_constraint_controller.get_constraints_volume(
+            close_constraints,
+            budget=budget,
+        ),
+        remote_operational_intent_controller.get_operational_intents_volume(
+            close_operations,
+            budget=budget,
+        ),
     )
-    conflicting_operations = query_operations.operational_intent_references
-    operational_intent_volumes = await remote_operational_intent_controller.get_operational_intents_volume(conflicting_operations)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Conflicts queried successfully",
-        data={
-            "constraints": [volume.model_dump(mode="json") for volume in constraint_volumes],
-            "operational_intents": [volume.model_dump(mode="json") for volume in operational_intent_volumes],
-        },
+    # Discard the entities matched by the DSS that do not intersect the area
+    constraints = local_constraints + await conflict_controller.filter_conflicting(area_of_interest, constraints)
+    operational_intents = local_operations + await conflict_controller.filter_conflicting(area_of_interest, operational_intents)
+
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Conflicts queried successfully",
+            data={
+                "constraints": [
+                    volume
+                    for constraint in constraints
+                    for volume in constraint.volumes
+                ],
+                "operational_intents": [
+                    volume
+                    for operational_intent in operational_intents
+                    for volume in operational_intent.volumes
+                ],
+                # Retrieval status of each entity, volumes are listed above
+                "entities": {
+                    "constraints": [
+                        constraint.model_dump(mode="json", exclude={"volumes"})
+                        for constraint in constraints
+                    ],
+                    "operational_intents": [
+                        operational_intent.model_dump(mode="json", exclude={"volumes"})
+                        for operational_intent in operational_intents
+                    ],
+                },
+            },
+        ),
+        status_code=HTTPStatus.OK.value,
     )
 
+async def stream_conflicts(
+    area_of_interest: AreaOfInterestSchema,
+    constraints: List[ConstraintReferenceSchema],
+    operational_intents: List[OperationalIntentReferenceSchema],
+    local_constraints: List[RemoteEntityVolumesSchema],
+    local_operational_intents: List[RemoteEntityVolumesSchema],
+    budget: float,
+) -> AsyncIterator[str]:
+    """
+    Yield one NDJSON line for each entity as soon as its volumes are retrieved,
+    skipping the entities that do not intersect the area. The conflicting
+    entities of this USS, already checked, come first.
+    """
+
+    def to_line(entity_type: str, entity: RemoteEntityVolumesSchema) -> str:
+        return json.dumps({
+            "type": entity_type,
+            **entity.model_dump(mode="json"),
+        }) + "\n"
+
+    for entity in local_constraints:
+        yield to_line("constraint", entity)
+
+    for entity in local_operational_intents:
+        yield to_line("operational_intent", entity)
+
+    async def tag(entity_type: str, entities: AsyncIterator[RemoteEntityVolumesSchema]):
+        async for entity in entities:
+            yield entity_type, entity
+
+    async for entity_type, entity in merge_iterators(
+        tag("constraint", remote_constraint_controller.iter_constraints_volume(constraints, budget=budget)),
+        tag("operational_intent", remote_operational_intent_controller.iter_operational_intents_volume(operational_intents, budget=budget)),
+    ):
+        if not conflict_controller.is_conflicting(area_of_interest, entity):
+            continue
+
+        yield to_line(entity_type, entity)
+
 @router.post(
     "/{entity_id}",
     response_description="Activate the flight plan",
@@ -202,6 +345,7 @@ async def query_conflicts(
 @log_route_handler(OperatorInputLogger, "Flight Plan Activated")
 async def activate_flight_plan(
     entity_id: UUID,
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Activate the flight plan
@@ -216,10 +360,10 @@ async def activate_flight_plan(
     operational_intent.reference.state = OperationalIntentState.ACTIVATED
 
     ovns: List[OVN] = await operational_intent_controller.get_close_ovns(
+        dss=dss,
         areas_of_interest=operational_intent.details.volumes
     )
 
-    dss = DSSService()
     operational_intent_reference_updated = await dss.update_operational_intent_reference(
         entity_id=entity_id,
         ovn=operational_intent.reference.ovn,
@@ -232,18 +376,20 @@ async def activate_flight_plan(
     operational_intent_model = await operational_intent_controller.update_operational_intent(
         entity_id=entity_id,
         operational_intent=operational_intent,
+        pending_notification=PendingNotificationSchema(subscribers=operational_intent_reference_updated.subscribers),
     )
 
-    await operational_intent_controller.notify_subscribers(
-        subscribers=operational_intent_reference_updated.subscribers,
-        operational_intent_id=entity_id,
-        operational_intent=operational_intent,
-    )
+    AirspaceMirror.get_instance().put_operational_intent(operational_intent)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Operational intent activated successfully",
-        data=operational_intent.model_dump(mode="json"),
+    await notification_outbox_controller.enqueue_pending_operational_intent_notifications(operational_intent_model)
+
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Operational intent activated successfully",
+            data=operational_intent,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
 
 @router.get(
@@ -264,10 +410,13 @@ async def get_flight_plan(
         entity_id=entity_id,
     )
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Operational intent retrieved successfully",
-        data=operational_intent.model_dump(mode="json"),
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Operational intent retrieved successfully",
+            data=operational_intent,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
 
 @router.delete(
@@ -279,39 +428,38 @@ async def get_flight_plan(
 @log_route_handler(OperatorInputLogger, "Flight Plan Deleted")
 async def delete_flight_plan(
     entity_id: UUID,
+    dss: DSSService = Depends(get_dss_service),
 ):
     """
     Delete the flight plan
     """
 
-    dss = DSSService()
-
-    operational_intent_model = await operational_intent_controller.get_operational_intent(
+    operational_intent_reference = await operational_intent_controller.get_operational_intent_reference(
         entity_id=entity_id,
     )
 
-    operational_intent = operational_intent_model.operational_intent
-
     # TODO: Notify the subscribers from the deleted operation area
     operational_intent_reference_deleted = await dss.delete_operational_intent_reference(
-        entity_id=operational_intent.reference.id,
-        ovn=operational_intent.reference.ovn,
+        entity_id=operational_intent_reference.id,
+        ovn=operational_intent_reference.ovn,
     )
 
     operational_intent_deleted = await operational_intent_controller.delete_operational_intent(
-        entity_id=operational_intent.reference.id,
+        entity_id=operational_intent_reference.id,
+        pending_notification=PendingNotificationSchema(subscribers=operational_intent_reference_deleted.subscribers),
     )
 
-    await operational_intent_controller.notify_subscribers(
-        subscribers=operational_intent_reference_deleted.subscribers,
-        operational_intent_id=entity_id,
-        operational_intent=None,
-    )
+    AirspaceMirror.get_instance().remove_operational_intent(entity_id)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Operational intent deleted successfully",
-        data = operational_intent_deleted.model_dump(mode="json"),
+    await notification_outbox_controller.enqueue_pending_operational_intent_notifications(operational_intent_deleted)
+
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Operational intent deleted successfully",
+            data=operational_intent_deleted,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
 
 
@@ -322,10 +470,9 @@ async def delete_flight_plan(
 )
 @log_route_handler(OperatorInputLogger, "Flight Plan Updated")
 async def update_flight_plan(
-    updated_operational_intent: OperationalIntentSchema = Body(...),
+    updated_operational_intent: Annotated[OperatorOperationalIntentSchema, Body()],
+    dss: DSSService = Depends(get_dss_service),
 ):
-    dss = DSSService()
-
     operational_intent_reference_updated = await dss.update_operational_intent_reference(
         entity_id=updated_operational_intent.reference.id,
         ovn=updated_operational_intent.reference.ovn,
@@ -335,21 +482,23 @@ async def update_flight_plan(
 
     updated_operational_intent.reference = operational_intent_reference_updated.operational_intent_reference
 
-    await operational_intent_controller.update_operational_intent(
+    operational_intent_model = await operational_intent_controller.update_operational_intent(
         entity_id=updated_operational_intent.reference.id,
         operational_intent=updated_operational_intent,
+        pending_notification=PendingNotificationSchema(subscribers=operational_intent_reference_updated.subscribers),
     )
 
-    await operational_intent_controller.notify_subscribers(
-        subscribers=operational_intent_reference_updated.subscribers,
-        operational_intent_id=updated_operational_intent.reference.id,
-        operational_intent=updated_operational_intent,
-    )
+    AirspaceMirror.get_instance().put_operational_intent(updated_operational_intent)
+
+    await notification_outbox_controller.enqueue_pending_operational_intent_notifications(operational_intent_model)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Operational intent updated successfully",
-        data=updated_operational_intent.model_dump(mode="json"),
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Operational intent updated successfully",
+            data=updated_operational_intent,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
 
 @router.patch(
@@ -359,11 +508,10 @@ async def update_flight_plan(
 )
 @log_route_handler(OperatorInputLogger, "Flight Plan Updated With Conflict")
 async def update_flight_plan_with_conflict(
-    updated_operational_intent: OperationalIntentSchema = Body(...),
+    updated_operational_intent: Annotated[OperatorOperationalIntentSchema, Body()],
+    dss: DSSService = Depends(get_dss_service),
 ):
-    ovns = await operational_intent_controller.get_close_ovns(updated_operational_intent.details.volumes)
-
-    dss = DSSService()
+    ovns = await operational_intent_controller.get_close_ovns(dss, updated_operational_intent.details.volumes)
 
     operational_intent_reference_updated = await dss.update_operational_intent_reference(
         entity_id=updated_operational_intent.reference.id,
@@ -374,20 +522,22 @@ async def update_flight_plan_with_conflict(
 
     updated_operational_intent.reference = operational_intent_reference_updated.operational_intent_reference
 
-    await operational_intent_controller.update_operational_intent(
+    operational_intent_model = await operational_intent_controller.update_operational_intent(
         entity_id=updated_operational_intent.reference.id,
         operational_intent=updated_operational_intent,
+        pending_notification=PendingNotificationSchema(subscribers=operational_intent_reference_updated.subscribers),
     )
 
-    await operational_intent_controller.notify_subscribers(
-        subscribers=operational_intent_reference_updated.subscribers,
-        operational_intent_id=updated_operational_intent.reference.id,
-        operational_intent=updated_operational_intent,
-    )
+    AirspaceMirror.get_instance().put_operational_intent(updated_operational_intent)
+
+    await notification_outbox_controller.enqueue_pending_operational_intent_notifications(operational_intent_model)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Operational intent updated successfully",
-        data=updated_operational_intent.model_dump(mode="json"),
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Operational intent updated successfully",
+            data=updated_operational_intent,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
 
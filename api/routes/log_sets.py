@@ -1,30 +1,131 @@
+import jmespath
+
+from datetime import datetime
+from functools import lru_cache
 from http import HTTPStatus
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from jmespath.exceptions import JMESPathError
+from jmespath.parser import ParsedResult
 
 from config.logger import MessageLogger, OperatorInputLogger, PlanningAttemptLogger
 from controllers import constraint as constraint_controller
 from schemas.constraint import ConstraintNotificationRequest
 from services.dss_service import DSSService
 from schema_types.constraint import ConstraintState
+from utils import log_export, log_index
+from utils.log_export import LogCursor
 
 router = APIRouter()
 
 
+LOGGERS = {
+    logger_type.NAME: logger_type
+    for logger_type in (MessageLogger, OperatorInputLogger, PlanningAttemptLogger)
+}
+
 # TODO: In the future. Implement a webhook for the client to receive constant updates
 @router.get(
     "/",
-    response_description="Export operational logs from the USS",
+    response_description="Export operational logs from the USS as NDJSON",
     status_code=HTTPStatus.OK.value,
 )
-async def export_logs():
-    log_types = [MessageLogger, OperatorInputLogger, PlanningAttemptLogger]
+async def export_logs(
+    start: Optional[datetime] = Query(None, description="Export the entries logged from this time"),
+    end: Optional[datetime] = Query(None, description="Export the entries logged until this time"),
+    loggers: Optional[List[str]] = Query(None, description="Names of the logs to export, all of them by default"),
+    cursor: Optional[str] = Query(None, description="Cursor of the next page, from the last line of the previous one"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of entries of the page"),
+):
+    """
+    Export the logs of the USS in chronological order, one entry per line.
+    When more entries match than the limit, the last line holds the cursor
+    of the next page.
+    """
+    names = loggers or list(LOGGERS)
+
+    unknown = [name for name in names if name not in LOGGERS]
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail=f"Unknown logs: {', '.join(unknown)}",
+        )
+
+    try:
+        log_cursor = LogCursor.decode(cursor) if cursor is not None else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail=str(e),
+        )
+
+    # The files are read in the threadpool, one line at a time
+    return StreamingResponse(
+        log_export.export_logs(
+            loggers=[LOGGERS[name] for name in names],
+            start=start,
+            end=end,
+            cursor=log_cursor,
+            limit=limit,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+@lru_cache(maxsize=256)
+def compile_filter(expression: str) -> ParsedResult:
+    return jmespath.compile(expression)
+
+@router.get(
+    "/query",
+    response_description="Query the operational logs of the USS about an entity or a peer as NDJSON",
+    status_code=HTTPStatus.OK.value,
+)
+async def query_logs(
+    entity_id: Optional[UUID] = Query(None, description="Id of an entity, a subscription or any other id mentioned by the entries"),
+    peer: Optional[str] = Query(None, description="Audience or host of a peer mentioned by the entries"),
+    start: Optional[datetime] = Query(None, description="Query the entries logged from this time"),
+    end: Optional[datetime] = Query(None, description="Query the entries logged until this time"),
+    loggers: Optional[List[str]] = Query(None, description="Names of the logs to query, all of them by default"),
+    filter: Optional[str] = Query(None, description="JMESPath expression the entries must match"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of entries"),
+):
+    """
+    Query the logs of the USS through the sidecar indexes of the log files,
+    in chronological order, one entry per line.
+    """
+    names = loggers or list(LOGGERS)
+
+    unknown = [name for name in names if name not in LOGGERS]
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail=f"Unknown logs: {', '.join(unknown)}",
+        )
 
-    logs = {}
+    try:
+        expression = compile_filter(filter) if filter else None
+    except JMESPathError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST.value,
+            detail=f"Invalid filter: {e}",
+        )
 
-    for log_type in log_types:
-        logger = log_type.get_instance()
-        logs[logger.NAME] = logger.export()
+    keys = []
+    if entity_id is not None:
+        keys.append(f"id:{entity_id}")
+    if peer is not None:
+        keys.append(f"peer:{peer.lower()}")
 
-    return logs
-    
+    return StreamingResponse(
+        log_index.query_logs(
+            loggers=[LOGGERS[name] for name in names],
+            keys=keys,
+            start=start,
+            end=end,
+            expression=expression,
+            limit=limit,
+        ),
+        media_type="application/x-ndjson",
+    )
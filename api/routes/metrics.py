@@ -0,0 +1,45 @@
+import hmac
+
+from http import HTTPStatus
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from config.config import Settings
+from config.metrics import MetricsRegistry
+
+router = APIRouter()
+
+def check_metrics_token(authorization: Optional[str] = Header(None)):
+    """
+    Check the bearer token of the scrape, when METRICS_TOKEN is set.
+    """
+    token = Settings().METRICS_TOKEN
+    if token is None:
+        return
+
+    if authorization is None or not hmac.compare_digest(authorization.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED.value,
+            detail="Missing or invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@router.get(
+    "/metrics",
+    response_description="Metrics of the USS process in the Prometheus text format",
+    response_class=PlainTextResponse,
+    status_code=HTTPStatus.OK.value,
+    dependencies=[Depends(check_metrics_token)],
+)
+async def get_metrics():
+    """
+    Get the metrics of the USS process in the Prometheus text format.
+    The metrics list the audiences of the peers, so the endpoint requires
+    the METRICS_TOKEN bearer token when it is set, and must not be exposed
+    publicly otherwise.
+    """
+    return PlainTextResponse(
+        await MetricsRegistry.get_instance().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
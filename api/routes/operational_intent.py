@@ -6,11 +6,13 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 
 from config.logger import MessageLogger
-from utils.parse_dict import parse_dict
 import controllers.operational_intent as operational_intent_controller
 from services.dss_service import DSSService
-from schemas.operational_intent import OperationalIntentNotificationRequest
+from services.airspace_mirror import AirspaceMirror
+from services.remote_entity_cache import RemoteEntityCache
+from schemas.operational_intent import OperationalIntentGetResponse, OperationalIntentNotificationRequest
 from schema_types.operational_intent import OperationalIntentState
+from utils.response import ModelResponse
 
 router = APIRouter()
 
@@ -27,18 +29,25 @@ async def handle_operational_intent_notification(
     Receive notification of changed operational details
     """
 
+    cache = RemoteEntityCache.get_instance()
+    AirspaceMirror.get_instance().apply_operational_intent_notification(notification)
+
     if notification.operational_intent is None:
-        # If the operational intent is not provided, we cannot process the notification
+        # If the operational intent is not provided, it was removed
+        cache.evict(notification.operational_intent_id)
+
         MessageLogger.log(
             f"Operational Intent Removed",
-            data=notification.model_dump(mode="json"),
+            data=notification,
         )
         return
 
+    cache.put(notification.operational_intent)
+
     # Log the received notification
     MessageLogger.log(
         f"Operational Intent Changed",
-        data=notification.model_dump(mode="json"),
+        data=notification,
     )
 
 # TODO: Add a Depends function to validate the aud parameter in the JWT tokenm 
@@ -47,7 +56,7 @@ async def handle_operational_intent_notification(
 @router.get(
     "/{entity_id}",
     response_description="Retrieve the specified operational intent details",
-    response_model=dict,
+    response_model=OperationalIntentGetResponse,
     status_code=HTTPStatus.OK.value,
 )
 async def get_operational_intent(
@@ -61,9 +70,9 @@ async def get_operational_intent(
         entity_id=entity_id,
     )
 
-    return {
-        "operational_intent": operational_intent_model.operational_intent.model_dump(mode="json"),
-    }
+    return ModelResponse(
+        OperationalIntentGetResponse(operational_intent=operational_intent_model.operational_intent),
+    )
 
 # TODO: Figure out correctly how to inform the USS about real-time telemetry
 # Currently informing the position of the first geometry registered in the area object
@@ -80,16 +89,20 @@ async def get_operational_intent_telemetry(
     Query detailed information on the position of an off-nominal operational intent from a USS
     """
 
-    operational_intent = await operational_intent_controller.get_operational_intent(
+    operational_intent_model = await operational_intent_controller.get_operational_intent(
         entity_id=entity_id,
     )
 
-    details = operational_intent.details.model_dump(mode="json")
-    lng = parse_dict(details, "lng")
-    lat = parse_dict(details, "lat")
-    altitude_lower = parse_dict(details, "altitude_lower")
+    operational_intent = operational_intent_model.operational_intent
+    volume = operational_intent.details.volumes[0].volume
 
-    return {
+    # Centre of the circle or first vertex of the polygon
+    if volume.outline_circle is not None:
+        lng, lat = volume.outline_circle.center.lng, volume.outline_circle.center.lat
+    else:
+        lng, lat = volume.outline_polygon.vertices[0].lng, volume.outline_polygon.vertices[0].lat
+
+    return ModelResponse({
         "operational_intent_id": operational_intent.reference.id,
         "telemetry": {
             "time_measured": operational_intent.reference.time_start,
@@ -99,7 +112,7 @@ async def get_operational_intent_telemetry(
                 "accuracy_h": "HAUnknown",
                 "accuracy_v": "VAUnknown",
                 "extrapolate": False,
-                "altitude": altitude_lower,
+                "altitude": volume.altitude_lower,
             },
             "velocity": {
                 "speed": 0,
@@ -111,7 +124,7 @@ async def get_operational_intent_telemetry(
             "value": operational_intent.reference.time_start.value + timedelta(seconds = 10),
             "format": operational_intent.reference.time_start.format,
         },
-    }
+    })
 
 @router.get(
     "/{entity_id}/authorization",
@@ -126,13 +139,13 @@ async def get_operational_intent_authorization(
     Query information of the flight authorization linked with this operational intent
     """
 
-    operational_intent = await operational_intent_controller.get_operational_intent(
+    operational_intent_reference = await operational_intent_controller.get_operational_intent_reference(
         entity_id=entity_id,
     )
 
     # TODO: Change this when I create my own auth system for the USS
     return {
-        "issued_by": operational_intent.reference.manager,
+        "issued_by": operational_intent_reference.manager,
         "issued_to": {
             "cnpj": "00394429010840",
             "razao_social": "COMANDO DA AERONAUTICA",
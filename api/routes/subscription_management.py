@@ -1,15 +1,17 @@
 from http import HTTPStatus
 from uuid import uuid4, UUID
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from models.subscription import SubscriptionModel
 from config.logger import OperatorInputLogger, log_route_handler
 from schemas.response import Response
+from utils.response import ModelResponse
 from schemas.constraint import ConstraintDetailSchema
 from schemas.area_of_interest import AreaOfInterestSchema
 from controllers import subscription as subscription_controller
-from services.dss_service import DSSService
+from services.airspace_mirror import AirspaceMirror
+from services.dss_service import DSSService, get_dss_service
 
 router = APIRouter()
 
@@ -22,9 +24,9 @@ DEFAULT_CONSTRAINT_TYPE = "uss.icea.non_utm_aircraft_operations"
 )
 @log_route_handler(OperatorInputLogger, "Subscription Added")
 async def add_subscription(
-    area_of_interest: AreaOfInterestSchema
+    area_of_interest: AreaOfInterestSchema,
+    dss: DSSService = Depends(get_dss_service),
 ):
-    dss = DSSService()
     subscription_id = uuid4()
 
     # Create a new subscription in the DSS
@@ -33,10 +35,18 @@ async def add_subscription(
         area_of_interest=area_of_interest,
     )
 
-    return Response(
-        status=HTTPStatus.CREATED.value,
-        message="Subscription created successfully.",
-        data=subscription_created.model_dump(mode="json")
+    AirspaceMirror.get_instance().add_subscription(
+        area=area_of_interest,
+        subscription_created=subscription_created,
+    )
+
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.CREATED.value,
+            message="Subscription created successfully.",
+            data=subscription_created,
+        ),
+        status_code=HTTPStatus.CREATED.value,
     )
 
 @router.get(
@@ -45,16 +55,20 @@ async def add_subscription(
     status_code=HTTPStatus.OK.value,
 )
 @log_route_handler(OperatorInputLogger, "Subscription Retrieved")
-async def get_subscription(subscription_id: UUID):
+async def get_subscription(
+    subscription_id: UUID,
+    dss: DSSService = Depends(get_dss_service),
+):
     """
     Get the details of a subscription by its ID.
     """
-    dss = DSSService()
-
     subscription = await dss.get_subscription(subscription_id)
 
-    return Response(
-        status=HTTPStatus.OK.value,
-        message="Subscription retrieved successfully.",
-        data=subscription.model_dump(mode="json")
+    return ModelResponse(
+        Response(
+            status=HTTPStatus.OK.value,
+            message="Subscription retrieved successfully.",
+            data=subscription,
+        ),
+        status_code=HTTPStatus.OK.value,
     )
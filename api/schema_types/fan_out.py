@@ -0,0 +1,9 @@
+from enum import Enum
+
+class FanOutStatus(str, Enum):
+    """
+    Outcome of a single call made during a fan-out to other USSs.
+    """
+    OK = "ok"
+    TIMEOUT = "timeout"
+    ERROR = "error"
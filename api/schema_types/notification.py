@@ -0,0 +1,23 @@
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import List
+from uuid import UUID, uuid4
+
+from schema_types.subscription import SubscriberSchema
+
+class NotificationEntityType(str, Enum):
+    OPERATIONAL_INTENT = "operational_intent"
+    CONSTRAINT = "constraint"
+
+class NotificationStatus(str, Enum):
+    PENDING = "pending"
+    IN_FLIGHT = "in_flight"
+    FAILED = "failed"
+
+class PendingNotificationSchema(BaseModel):
+    """
+    Subscribers to notify of the stored state of an entity. It is written
+    with the entity and cleared once the notifications are in the outbox.
+    """
+    id: UUID = Field(default_factory=uuid4)
+    subscribers: List[SubscriberSchema]
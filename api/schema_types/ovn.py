@@ -1,2 +1,13 @@
+from typing import Optional
+
 ovn = str
 OVN = str
+
+# Placeholder returned by the DSS instead of the OVN of entities managed by other USSs
+OVN_REQUEST_FROM_USS = "Available from USS"
+
+def is_ovn_available(value: Optional[str]) -> bool:
+    """
+    Check if a reference returned by the DSS discloses the entity OVN.
+    """
+    return bool(value) and value != OVN_REQUEST_FROM_USS
@@ -1,9 +1,45 @@
-from pydantic import BaseModel
-from typing import Any
+from pydantic import AfterValidator, BaseModel, PrivateAttr, model_validator
+from typing import Annotated, Any, Dict, List, Tuple
 
 from schema_types.datetime import DatetimeSchema
+from schemas.volume import Volume3DSchema
 
 class AreaOfInterestSchema(BaseModel):
-    volume: Any
+    """
+    Volume4D, a volume active between two times. The time range in epoch
+    seconds is computed once when the area is parsed.
+    """
+    volume: Volume3DSchema
     time_start: DatetimeSchema
     time_end: DatetimeSchema
+
+    _time_range: Tuple[float, float] = PrivateAttr()
+
+    @model_validator(mode="after")
+    def compute_time_range(self):
+        self._time_range = (self.time_start.value.timestamp(), self.time_end.value.timestamp())
+        return self
+
+    @property
+    def time_range(self) -> Tuple[float, float]:
+        return self._time_range
+
+def to_geometry_collection(areas: List[AreaOfInterestSchema]) -> Dict[str, Any]:
+    """
+    GeoJSON geometry collection of the outlines of the areas.
+    """
+    return {
+        "type": "GeometryCollection",
+        "geometries": [area.volume.to_geojson() for area in areas],
+    }
+
+def check_simple_outline(area: AreaOfInterestSchema) -> AreaOfInterestSchema:
+    """
+    Check that the polygon outline of the area is a simple polygon, raising
+    ValueError otherwise.
+    """
+    area.volume.check_simple_outline()
+    return area
+
+# Area entered by the operator, whose outline is checked before it is stored or queried
+OperatorAreaOfInterestSchema = Annotated[AreaOfInterestSchema, AfterValidator(check_simple_outline)]
@@ -1,10 +1,10 @@
 from uuid import UUID
 from enum import Enum
-from typing import Any, Optional, List
-from pydantic import BaseModel, HttpUrl
+from typing import Annotated, Any, Optional, List
+from pydantic import AfterValidator, BaseModel, HttpUrl
 
 from schema_types.datetime import DatetimeSchema
-from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.area_of_interest import AreaOfInterestSchema, check_simple_outline
 from schema_types.subscription import SubscriptionBaseSchema
 from schema_types.constraint import ConstraintUSSAvailability, ConstraintState
 
@@ -24,12 +24,25 @@ class ConstraintReferenceSchema(BaseModel):
     uss_availability: ConstraintUSSAvailability
     uss_base_url: HttpUrl
     version: int
-    ovn: str
+    # The DSS only discloses the OVN to the USS managing the entity
+    ovn: Optional[str] = None
 
 class ConstraintSchema(BaseModel):
     reference: ConstraintReferenceSchema
     details: ConstraintDetailSchema
 
+def check_simple_outlines(constraint: ConstraintSchema) -> ConstraintSchema:
+    """
+    Check that the outlines of the volumes of the constraint are simple
+    polygons, raising ValueError otherwise.
+    """
+    for area in constraint.details.volumes:
+        check_simple_outline(area)
+    return constraint
+
+# Constraint entered by the operator, whose outlines are checked before it is stored
+OperatorConstraintSchema = Annotated[ConstraintSchema, AfterValidator(check_simple_outlines)]
+
 class ConstraintNotificationRequest(BaseModel):
     constraint_id: UUID
     constraint: Optional[ConstraintSchema]
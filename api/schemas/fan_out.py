@@ -0,0 +1,11 @@
+from typing import Any, Optional
+from pydantic import BaseModel
+
+from schema_types.fan_out import FanOutStatus
+
+class FanOutResult(BaseModel):
+    key: str
+    peer: str
+    status: FanOutStatus
+    value: Optional[Any] = None
+    error: Optional[Any] = None
@@ -1,10 +1,10 @@
 from uuid import UUID
 from enum import Enum
-from typing import Any, Optional, List
-from pydantic import BaseModel, HttpUrl
+from typing import Annotated, Any, Optional, List
+from pydantic import AfterValidator, BaseModel, HttpUrl
 
 from schema_types.datetime import DatetimeSchema
-from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.area_of_interest import AreaOfInterestSchema, check_simple_outline
 from schema_types.subscription import SubscriptionBaseSchema
 from schema_types.operational_intent import (
         OperationalIntentUSSAvailability,
@@ -23,7 +23,8 @@ class OperationalIntentReferenceSchema(BaseModel):
     uss_availability: OperationalIntentUSSAvailability
     version: int
     state: OperationalIntentState
-    ovn: str
+    # The DSS only discloses the OVN to the USS managing the entity
+    ovn: Optional[str] = None
     time_start: DatetimeSchema
     time_end: DatetimeSchema
     uss_base_url: HttpUrl
@@ -33,6 +34,18 @@ class OperationalIntentSchema(BaseModel):
     reference: OperationalIntentReferenceSchema
     details: OperationalIntentDetailSchema
 
+def check_simple_outlines(operational_intent: OperationalIntentSchema) -> OperationalIntentSchema:
+    """
+    Check that the outlines of the volumes of the operational intent are simple
+    polygons, raising ValueError otherwise.
+    """
+    for area in operational_intent.details.volumes:
+        check_simple_outline(area)
+    return operational_intent
+
+# Operational intent entered by the operator, whose outlines are checked before it is stored
+OperatorOperationalIntentSchema = Annotated[OperationalIntentSchema, AfterValidator(check_simple_outlines)]
+
 class OperationalIntentNotificationRequest(BaseModel):
     operational_intent_id: UUID
     operational_intent: Optional[OperationalIntentSchema]
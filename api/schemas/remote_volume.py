@@ -0,0 +1,16 @@
+from uuid import UUID
+from typing import Any, List, Optional
+from pydantic import BaseModel, HttpUrl
+
+from schemas.area_of_interest import AreaOfInterestSchema
+from schema_types.fan_out import FanOutStatus
+
+class RemoteEntityVolumesSchema(BaseModel):
+    """
+    Volumes of an entity retrieved from the USS managing it.
+    """
+    entity_id: UUID
+    uss_base_url: HttpUrl
+    status: FanOutStatus
+    volumes: List[AreaOfInterestSchema] = []
+    error: Optional[Any] = None
@@ -0,0 +1,239 @@
+import math
+import numpy as np
+
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_serializer, model_validator
+
+EARTH_RADIUS = 6371008.8
+
+# Conversion factors to metres of the units used by ASTM volumes
+UNITS_TO_METRES = {
+    "M": 1.0,
+    "FT": 0.3048,
+}
+
+# (min_lng, min_lat, max_lng, max_lat) in degrees
+BoundingBox = Tuple[float, float, float, float]
+
+# Sides of the polygon circumscribing a circle in GeoJSON
+CIRCLE_SEGMENTS = 32
+
+# Vertices of a polygon outline, and edges compared at once by the simple polygon check
+MAX_POLYGON_VERTICES = 1000
+SIMPLE_POLYGON_CHUNK = 128
+
+def check_units(units: str) -> str:
+    """
+    Check that the units are known, raising ValueError otherwise.
+    """
+    if units.upper() not in UNITS_TO_METRES:
+        raise ValueError(f"Unknown units '{units}', expected one of: {', '.join(UNITS_TO_METRES)}.")
+    return units
+
+def to_metres(value: float, units: str) -> float:
+    """
+    Convert an ASTM distance or altitude to metres.
+    """
+    return float(value) * UNITS_TO_METRES[check_units(units).upper()]
+
+def _segments_intersect(a_start: np.ndarray, a_end: np.ndarray, b_start: np.ndarray, b_end: np.ndarray) -> np.ndarray:
+    """
+    Check, pair by pair, if the segments cross or touch. Their bounding boxes
+    are expected to overlap.
+    """
+    def orientation(p, q, r):
+        return np.sign((q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0]))
+
+    return (
+        (orientation(a_start, a_end, b_start) * orientation(a_start, a_end, b_end) <= 0)
+        & (orientation(b_start, b_end, a_start) * orientation(b_start, b_end, a_end) <= 0)
+    )
+
+def is_simple_polygon(vertices: np.ndarray) -> bool:
+    """
+    Check that the polygon has at least 3 distinct vertices, a non-zero area
+    and no edge crossing or touching another edge than its neighbours.
+
+    The edges are compared a chunk at a time, and only the pairs whose
+    bounding boxes overlap are tested, so memory stays bounded.
+    """
+    count = len(vertices)
+    if count < 3 or len(np.unique(vertices, axis=0)) != count:
+        return False
+
+    start, end = vertices, np.roll(vertices, -1, axis=0)
+
+    size = float(np.max(np.ptp(vertices, axis=0)))
+    area = float(np.sum(start[:, 0] * end[:, 1] - end[:, 0] * start[:, 1])) / 2
+    if abs(area) <= 1e-9 * size ** 2:
+        return False
+
+    low, high = np.minimum(start, end), np.maximum(start, end)
+
+    for first in range(0, count, SIMPLE_POLYGON_CHUNK):
+        rows = np.arange(first, min(first + SIMPLE_POLYGON_CHUNK, count))
+
+        overlapping = (
+            np.all(low[rows, None, :] <= high[None, :, :], axis=2)
+            & np.all(low[None, :, :] <= high[rows, None, :], axis=2)
+        )
+        i, j = np.nonzero(overlapping)
+        i = rows[i]
+
+        # Each pair once, without the neighbouring edges sharing a vertex
+        pairs = (j > i + 1) & ~((i == 0) & (j == count - 1))
+        i, j = i[pairs], j[pairs]
+
+        if np.any(_segments_intersect(start[i], end[i], start[j], end[j])):
+            return False
+
+    return True
+
+class LatLngPointSchema(BaseModel):
+    lng: float
+    lat: float
+
+class RadiusSchema(BaseModel):
+    value: float
+    units: str = "M"
+
+    _check_units = field_validator("units")(check_units)
+
+class AltitudeSchema(BaseModel):
+    value: float
+    # Only W84 altitudes are used by the USSs
+    reference: str = "W84"
+    units: str = "M"
+
+    _check_units = field_validator("units")(check_units)
+
+    @property
+    def metres(self) -> float:
+        return to_metres(self.value, self.units)
+
+class CircleSchema(BaseModel):
+    center: LatLngPointSchema
+    radius: RadiusSchema
+
+    @property
+    def radius_metres(self) -> float:
+        return to_metres(self.radius.value, self.radius.units)
+
+class PolygonSchema(BaseModel):
+    # Closed rings repeat their first vertex
+    vertices: List[LatLngPointSchema] = Field(max_length=MAX_POLYGON_VERTICES + 1)
+
+class Volume3DSchema(BaseModel):
+    """
+    Circle or polygon extruded between two altitudes.
+    The bounding box, altitudes in metres and polygon vertices are computed
+    once when the volume is parsed.
+    """
+    outline_circle: Optional[CircleSchema] = None
+    outline_polygon: Optional[PolygonSchema] = None
+    altitude_lower: Optional[AltitudeSchema] = None
+    altitude_upper: Optional[AltitudeSchema] = None
+
+    _bounding_box: BoundingBox = PrivateAttr()
+    _altitude_range: Tuple[float, float] = PrivateAttr()
+    _vertices: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def compute_bounds(self):
+        if (self.outline_circle is None) == (self.outline_polygon is None):
+            raise ValueError("Exactly one of 'outline_circle' or 'outline_polygon' must be provided.")
+
+        if self.outline_circle is not None:
+            lng = self.outline_circle.center.lng
+            lat = self.outline_circle.center.lat
+            radius = self.outline_circle.radius_metres
+
+            delta_lat = math.degrees(radius / EARTH_RADIUS)
+            delta_lng = math.degrees(radius / (EARTH_RADIUS * max(math.cos(math.radians(lat)), 1e-9)))
+
+            self._bounding_box = (lng - delta_lng, lat - delta_lat, lng + delta_lng, lat + delta_lat)
+        else:
+            vertices = np.array(
+                [(vertex.lng, vertex.lat) for vertex in self.outline_polygon.vertices],
+                dtype=np.float64,
+            ).reshape(-1, 2)
+
+            # Closed rings repeat the first vertex
+            if len(vertices) > 1 and np.array_equal(vertices[0], vertices[-1]):
+                vertices = vertices[:-1]
+
+            if len(vertices) == 0:
+                raise ValueError("'outline_polygon' must have vertices.")
+
+            self._vertices = vertices
+            self._bounding_box = (
+                float(vertices[:, 0].min()),
+                float(vertices[:, 1].min()),
+                float(vertices[:, 0].max()),
+                float(vertices[:, 1].max()),
+            )
+
+        # Missing altitudes leave the volume unbounded
+        self._altitude_range = (
+            self.altitude_lower.metres if self.altitude_lower is not None else -math.inf,
+            self.altitude_upper.metres if self.altitude_upper is not None else math.inf,
+        )
+
+        return self
+
+    @model_serializer(mode="wrap")
+    def drop_none(self, handler) -> Dict[str, Any]:
+        # The outline not used is left out, as the DSS expects
+        return {key: value for key, value in handler(self).items() if value is not None}
+
+    @property
+    def bounding_box(self) -> BoundingBox:
+        return self._bounding_box
+
+    @property
+    def altitude_range(self) -> Tuple[float, float]:
+        return self._altitude_range
+
+    @property
+    def vertices(self) -> Optional[np.ndarray]:
+        """
+        Vertices of the polygon as (lng, lat) rows, without the closing vertex.
+        """
+        return self._vertices
+
+    def check_simple_outline(self):
+        """
+        Check that a polygon outline is a simple polygon, raising ValueError
+        otherwise. Only the outlines entered by the operator are checked, the
+        ones of the DSS and other USSs are used as received.
+        """
+        if self._vertices is not None and not is_simple_polygon(self._vertices):
+            raise ValueError("'outline_polygon' must have at least 3 distinct vertices and must not be degenerate or self-intersecting.")
+
+    def to_geojson(self) -> Dict[str, Any]:
+        """
+        GeoJSON polygon of the outline. Circles are approximated by a
+        circumscribed polygon, so the outline is never smaller than the circle.
+        """
+        if self.outline_circle is not None:
+            lng = self.outline_circle.center.lng
+            lat = self.outline_circle.center.lat
+            radius = self.outline_circle.radius_metres / math.cos(math.pi / CIRCLE_SEGMENTS)
+
+            delta_lat = math.degrees(radius / EARTH_RADIUS)
+            delta_lng = math.degrees(radius / (EARTH_RADIUS * max(math.cos(math.radians(lat)), 1e-9)))
+
+            ring = [
+                [
+                    lng + delta_lng * math.cos(2 * math.pi * i / CIRCLE_SEGMENTS),
+                    lat + delta_lat * math.sin(2 * math.pi * i / CIRCLE_SEGMENTS),
+                ]
+                for i in range(CIRCLE_SEGMENTS)
+            ]
+        else:
+            ring = self._vertices.tolist()
+
+        return {
+            "type": "Polygon",
+            "coordinates": [ring + [ring[0]]],
+        }
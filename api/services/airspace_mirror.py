@@ -0,0 +1,270 @@
+import time
+
+from threading import Lock
+from typing import Dict, Generic, List, Optional, TypeVar
+from uuid import UUID
+
+from config.config import Settings
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.constraint import ConstraintNotificationRequest, ConstraintReferenceSchema, ConstraintSchema
+from schemas.operational_intent import (
+    OperationalIntentNotificationRequest,
+    OperationalIntentReferenceSchema,
+    OperationalIntentSchema,
+)
+from schemas.subscription import SubscriptionCreateResponse
+from schema_types.subscription import SubscriptionBaseSchema
+from services.volume_index import VolumeIndex
+from utils.geometry import contains, get_time_range, intersects
+
+Reference = TypeVar("Reference", OperationalIntentReferenceSchema, ConstraintReferenceSchema)
+
+class MirroredSubscription:
+    """
+    Subscription held in the DSS whose area is mirrored locally.
+    """
+
+    def __init__(self, area: AreaOfInterestSchema, notification_index: int, expires_at: float):
+        self.area = area
+        self.notification_index = notification_index
+        # A missed last notification can not be detected, so the seed is only trusted for a while
+        self.expires_at = expires_at
+
+class MirroredEntity(Generic[Reference]):
+    """
+    Reference mirrored from the DSS, with the volumes of the entity when known.
+    """
+
+    def __init__(self, reference: Reference, volumes: Optional[List[AreaOfInterestSchema]] = None):
+        self.reference = reference
+        self.volumes = volumes
+
+class AirspaceMirror:
+    """
+    Local mirror of the DSS operational intent and constraint references in
+    the areas of the subscriptions held by this USS.
+
+    The mirror is seeded with the references returned when the subscription
+    is created and kept current by the notifications received for it. A gap
+    in the notification_index makes the subscription stale, and the seed of
+    a subscription is only trusted for AIRSPACE_MIRROR_MAX_AGE seconds.
+    Stale and expired subscriptions are dropped from the mirror until they
+    are seeded again. Queries of areas fully covered by a mirrored
+    subscription are answered from the mirror, other queries must fall back
+    to the DSS.
+
+    The mirror lives in the memory of the process, so it is only enabled by
+    AIRSPACE_MIRROR_ENABLED when the API runs in a single process.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        self._enabled = settings.AIRSPACE_MIRROR_ENABLED
+        self._max_age = settings.AIRSPACE_MIRROR_MAX_AGE
+
+        self._subscriptions: Dict[UUID, MirroredSubscription] = {}
+        self._operational_intents: Dict[UUID, MirroredEntity[OperationalIntentReferenceSchema]] = {}
+        self._constraints: Dict[UUID, MirroredEntity[ConstraintReferenceSchema]] = {}
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def add_subscription(self, area: AreaOfInterestSchema, subscription_created: SubscriptionCreateResponse):
+        """
+        Mirror the area of a new subscription, seeded with the references
+        returned by the DSS.
+        """
+        if not self._enabled:
+            return
+
+        subscription = subscription_created.subscription
+        self._subscriptions[subscription.id] = MirroredSubscription(
+            area=area,
+            notification_index=subscription.notification_index,
+            expires_at=time.monotonic() + self._max_age,
+        )
+
+        for reference in subscription_created.operational_intent_references:
+            self._put(self._operational_intents, reference)
+
+        for reference in subscription_created.constraint_references:
+            self._put(self._constraints, reference)
+
+    def apply_operational_intent_notification(self, notification: OperationalIntentNotificationRequest):
+        """
+        Update the mirror with an operational intent notification.
+        """
+        if not self._enabled or not self._track_notification(notification.subscriptions):
+            return
+
+        if notification.operational_intent is None:
+            self._operational_intents.pop(notification.operational_intent_id, None)
+            return
+
+        self._put(
+            self._operational_intents,
+            notification.operational_intent.reference,
+            notification.operational_intent.details.volumes,
+        )
+
+    def apply_constraint_notification(self, notification: ConstraintNotificationRequest):
+        """
+        Update the mirror with a constraint notification.
+        """
+        if not self._enabled or not self._track_notification(notification.subscriptions):
+            return
+
+        if notification.constraint is None:
+            self._constraints.pop(notification.constraint_id, None)
+            return
+
+        self._put(
+            self._constraints,
+            notification.constraint.reference,
+            notification.constraint.details.volumes,
+        )
+
+    def put_operational_intent(self, operational_intent: OperationalIntentSchema):
+        """
+        Mirror an operational intent managed by this USS.
+        """
+        if self._enabled:
+            self._put(
+                self._operational_intents,
+                operational_intent.reference,
+                operational_intent.details.volumes,
+            )
+
+    def remove_operational_intent(self, entity_id: UUID):
+        self._operational_intents.pop(entity_id, None)
+
+    def put_constraint(self, constraint: ConstraintSchema):
+        """
+        Mirror a constraint managed by this USS.
+        """
+        if self._enabled:
+            self._put(
+                self._constraints,
+                constraint.reference,
+                constraint.details.volumes,
+            )
+
+    def remove_constraint(self, entity_id: UUID):
+        self._constraints.pop(entity_id, None)
+
+    def is_covered(self, area: AreaOfInterestSchema) -> bool:
+        """
+        Check if the area is fully covered by a mirrored subscription.
+        """
+        if not self._enabled:
+            return False
+
+        now = time.monotonic()
+        for subscription_id in [
+            subscription_id
+            for subscription_id, subscription in self._subscriptions.items()
+            if subscription.expires_at <= now
+        ]:
+            self._drop_subscription(subscription_id)
+
+        return any(
+            contains(subscription.area, area)
+            for subscription in self._subscriptions.values()
+        )
+
+    def query_operational_intent_references(self, area: AreaOfInterestSchema) -> Optional[List[OperationalIntentReferenceSchema]]:
+        """
+        Get the operational intent references that may intersect the area, or
+        None when the area is not covered by the mirror.
+        """
+        if not self.is_covered(area):
+            return None
+
+        return self._query(self._operational_intents, area)
+
+    def query_constraint_references(self, area: AreaOfInterestSchema) -> Optional[List[ConstraintReferenceSchema]]:
+        """
+        Get the constraint references that may intersect the area, or None when
+        the area is not covered by the mirror.
+        """
+        if not self.is_covered(area):
+            return None
+
+        return self._query(self._constraints, area)
+
+    def _track_notification(self, subscriptions: List[SubscriptionBaseSchema]) -> bool:
+        """
+        Advance the notification index of the mirrored subscriptions, dropping
+        them when a notification was missed. Returns if any of the
+        subscriptions is still mirrored.
+        """
+        tracked = False
+
+        for notified in subscriptions:
+            subscription = self._subscriptions.get(notified.subscription_id)
+            if subscription is None:
+                continue
+
+            if notified.notification_index > subscription.notification_index + 1:
+                self._drop_subscription(notified.subscription_id)
+                continue
+
+            tracked = True
+            subscription.notification_index = max(
+                subscription.notification_index,
+                notified.notification_index,
+            )
+
+        return tracked
+
+    def _drop_subscription(self, subscription_id: UUID):
+        del self._subscriptions[subscription_id]
+
+        # Entities are only answered for the areas of the mirrored subscriptions
+        if not self._subscriptions:
+            self._operational_intents.clear()
+            self._constraints.clear()
+
+    @staticmethod
+    def _put(entities: Dict[UUID, MirroredEntity], reference: Reference, volumes: Optional[List[AreaOfInterestSchema]] = None):
+        mirrored = entities.get(reference.id)
+
+        if mirrored is not None and mirrored.reference.version > reference.version:
+            return
+
+        if volumes is None and mirrored is not None and mirrored.reference.version == reference.version:
+            volumes = mirrored.volumes
+
+        entities[reference.id] = MirroredEntity(reference=reference, volumes=volumes)
+
+    @staticmethod
+    def _query(entities: Dict[UUID, MirroredEntity], area: AreaOfInterestSchema) -> List[Reference]:
+        start, end = get_time_range(area)
+        index = VolumeIndex.get_instance()
+        touching = index.query(area)
+        references = []
+
+        for mirrored in entities.values():
+            reference = mirrored.reference
+
+            if reference.time_end.value.timestamp() < start or reference.time_start.value.timestamp() > end:
+                continue
+
+            if reference.id not in touching and index.contains(reference.id, reference.version):
+                continue
+
+            # References without known volumes are kept, as the DSS would return them
+            if mirrored.volumes is not None and not any(intersects(volume, area) for volume in mirrored.volumes):
+                continue
+
+            references.append(reference)
+
+        return references
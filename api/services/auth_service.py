@@ -1,16 +1,42 @@
+import asyncio
 import httpx
 import jwt
-from typing import Any
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
 from http import HTTPStatus
 from fastapi import HTTPException
-from datetime import datetime
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import from_json
 from threading import Lock
 
 from schemas.error import ResponseError
 from config.config import Settings
-from config.logger import MessageLogger
+from config.logger import MessageCapture, MessageLogger
+from config.metrics import TOKEN_REQUEST_DURATION, TOKEN_REQUEST_ERRORS, track
 from schema_types.auth import Scope
 
+T = TypeVar("T")
+
+@lru_cache(maxsize=None)
+def get_type_adapter(model: Any) -> TypeAdapter:
+    """
+    Get the TypeAdapter of a response model, built once per model.
+    """
+    return TypeAdapter(model)
+
+def _get_error_data(response: httpx.Response) -> Any:
+    """
+    Get the body of an error response, as JSON when possible.
+    """
+    if not response.content:
+        return None
+
+    try:
+        return from_json(response.content)
+    except ValueError:
+        return response.text
 
 class AuthAsyncClient(httpx.AsyncClient):
     """
@@ -28,17 +54,21 @@ class AuthAsyncClient(httpx.AsyncClient):
             raise ValueError(
                 "Scope must be provided in the request for authentication.")
 
+        capture = MessageCapture.get_instance()
+        verbosity = capture.get_verbosity(str(url))
+
         try:
             MessageLogger.log(
                 f"Message Sent",
-                data={
-                    "method": method,
-                    "base_url": str(self.base_url),
-                    "url": str(url),
-                    "aud": self._aud,
-                    "scope": scope,
-                    "body": kwargs.get("json", None),
-                },
+                data=capture.request(
+                    verbosity=verbosity,
+                    method=method,
+                    base_url=str(self.base_url),
+                    url=str(url),
+                    aud=self._aud,
+                    scope=scope,
+                    body=kwargs.get("json", None),
+                ),
             )
 
             res = await super().request(
@@ -51,14 +81,16 @@ class AuthAsyncClient(httpx.AsyncClient):
                 **kwargs
             )
 
+            # Headers and body are decoded by the log writer, the body is parsed once by the caller
             MessageLogger.log(
                 f"Response Received",
-                data={
-                    "status_code": res.status_code,
-                    "url": str(res.url),
-                    "headers": dict(res.headers),
-                    "body": res.json() if res.content else None,
-                },
+                data=capture.response(
+                    verbosity=verbosity,
+                    url=str(res.url),
+                    status_code=res.status_code,
+                    headers=res.headers,
+                    content=res.content,
+                ),
             )
 
             return res
@@ -109,6 +141,56 @@ class AuthAsyncClient(httpx.AsyncClient):
                 ).model_dump(mode="json"),
             )
 
+    def get_pool_stats(self) -> Dict[str, int]:
+        """
+        Get the number of connections of the pool in use and idle.
+        """
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+
+        return {"active": len(connections) - idle, "idle": idle}
+
+    async def request_model(
+            self,
+            method: str,
+            url: httpx.URL | str,
+            model: Optional[Type[T]],
+            error_message: str,
+            status_code: HTTPStatus = HTTPStatus.OK,
+            **kwargs: Any,
+    ) -> Optional[T]:
+        """
+        Send a request and validate the body of the response against the
+        model straight from its bytes. Responses with another status code, or
+        with a body not matching the model, raise an HTTPException with the
+        error message. Without a model the body is not read.
+        """
+        response = await self.request(method, url, **kwargs)
+
+        if response.status_code != status_code.value:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=ResponseError(
+                    message=error_message,
+                    data=_get_error_data(response),
+                ).model_dump(mode="json"),
+            )
+
+        if model is None:
+            return None
+
+        try:
+            return get_type_adapter(model).validate_json(response.content)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_GATEWAY.value,
+                detail=ResponseError(
+                    message=error_message,
+                    data=str(e),
+                ).model_dump(mode="json"),
+            )
+
 
 class ServiceTokenMiddleware(httpx.Auth):
     def __init__(self, aud: str, scope: Scope) -> None:
@@ -125,22 +207,49 @@ class ServiceTokenMiddleware(httpx.Auth):
         request.headers["Authorization"] = f"Bearer {token}"
         response = yield request
         if response.status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
-            await auth.refresh_token(aud=self._aud, scope=self._scope)
-            token = await auth.get_token(aud=self._aud, scope=self._scope)
+            token = await auth.refresh_token(aud=self._aud, scope=self._scope, rejected_token=token)
             request.headers["Authorization"] = f"Bearer {token}"
             yield request
 
 
+class CachedToken:
+    """
+    Access token cached with its expiration, decoded once when it is received.
+    """
+
+    def __init__(self, token: str, exp: float):
+        self.token = token
+        self.exp = exp
+        self.last_used = time.time()
+        self.renewal: Optional[asyncio.TimerHandle] = None
+
+    def is_valid(self) -> bool:
+        return self.exp > time.time()
+
+
 class AuthService:
+    """
+    Cache of access tokens per audience and scope.
+
+    Concurrent refreshes of the same token share a single request to the auth
+    server, and tokens in use are renewed in the background
+    AUTH_TOKEN_RENEWAL_MARGIN seconds before they expire. The cache is bounded
+    by AUTH_TOKEN_CACHE_SIZE and tokens not used for AUTH_TOKEN_IDLE_TIMEOUT
+    seconds are not renewed.
+    """
     _instance = None
     _lock = Lock()
 
     def __init__(self):
         settings = Settings()
 
-        self._tokens = {}
+        self._tokens: OrderedDict[Tuple[str, Scope], CachedToken] = OrderedDict()
+        self._refreshing: Dict[Tuple[str, Scope], asyncio.Task] = {}
         self._base_url = settings.AUTH_URL
         self._auth_key = settings.AUTH_KEY
+        self._renewal_margin = settings.AUTH_TOKEN_RENEWAL_MARGIN
+        self._cache_size = settings.AUTH_TOKEN_CACHE_SIZE
+        self._idle_timeout = settings.AUTH_TOKEN_IDLE_TIMEOUT
 
         if not self._base_url or not self._auth_key:
             raise ValueError(
@@ -148,6 +257,9 @@ class AuthService:
 
         self._client = httpx.AsyncClient(base_url=self._base_url)
 
+        self.hits = 0
+        self.misses = 0
+
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
@@ -156,13 +268,60 @@ class AuthService:
                     cls._instance = cls()
         return cls._instance
 
+    @classmethod
+    async def close_instance(cls):
+        """
+        Close the service if it was created, cancelling the pending renewals.
+        """
+        if cls._instance is not None:
+            await cls._instance.close()
+
+    async def close(self):
+        for cached in self._tokens.values():
+            if cached.renewal is not None:
+                cached.renewal.cancel()
+
+        for task in self._refreshing.values():
+            task.cancel()
+
+        await self._client.aclose()
+
     async def get_token(self, aud: str, scope: Scope = Scope.CONSTRAINT_PROCESSING) -> str:
-        if aud not in self._tokens or scope not in self._tokens[aud] or not self._is_token_valid(self._tokens[aud][scope]):
-            await self.refresh_token(aud=aud, scope=scope)
+        cached = self._tokens.get((aud, scope))
+
+        if cached is None or not cached.is_valid():
+            self.misses += 1
+            return await self.refresh_token(aud=aud, scope=scope)
+
+        self.hits += 1
+        cached.last_used = time.time()
+        self._tokens.move_to_end((aud, scope))
+
+        return cached.token
+
+    async def refresh_token(self, aud: str, scope: Scope = Scope.CONSTRAINT_PROCESSING, rejected_token: Optional[str] = None) -> str:
+        """
+        Get a new token from the auth server. Concurrent calls share the same
+        request. When the rejected token was already replaced, the new token is
+        returned without a request.
+        """
+        key = (aud, scope)
+        cached = self._tokens.get(key)
+
+        if rejected_token is not None and cached is not None and cached.token != rejected_token and cached.is_valid():
+            return cached.token
 
-        return self._tokens[aud][scope]
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_token(aud=aud, scope=scope))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
 
-    async def refresh_token(self, aud: str, scope: Scope = Scope.CONSTRAINT_PROCESSING):
+        # A cancelled caller must not cancel the refresh shared with others
+        return await asyncio.shield(task)
+
+    @track(TOKEN_REQUEST_DURATION, TOKEN_REQUEST_ERRORS, lambda self, aud, scope: (aud, scope.value))
+    async def _request_token(self, aud: str, scope: Scope) -> str:
         params = {
             "intended_audience": aud,
             "scope": scope.value,
@@ -187,7 +346,7 @@ class AuthService:
             f"Token response received",
             data={
                 "status_code": response.status_code,
-                "body": response.json() if response.content else None,
+                "body": MessageCapture.get_instance().capture_body(response.content),
             },
         )
 
@@ -200,20 +359,65 @@ class AuthService:
                 ).model_dump(mode="json"),
             )
 
-        if aud not in self._tokens:
-            self._tokens[aud] = {}
+        token = response.json().get("access_token")
+        self._store_token(aud=aud, scope=scope, token=token)
+
+        return token
+
+    def _store_token(self, aud: str, scope: Scope, token: str):
+        key = (aud, scope)
+
+        previous = self._tokens.pop(key, None)
+        if previous is not None and previous.renewal is not None:
+            previous.renewal.cancel()
+
+        cached = CachedToken(token=token, exp=self._get_expiration(token))
+        if previous is not None:
+            # Background renewals keep the usage of the token they replace
+            cached.last_used = previous.last_used
+
+        delay = cached.exp - self._renewal_margin - time.time()
+        if delay > 0:
+            cached.renewal = asyncio.get_running_loop().call_later(delay, self._renew, aud, scope)
+
+        self._tokens[key] = cached
+
+        while len(self._tokens) > self._cache_size:
+            _, evicted = self._tokens.popitem(last=False)
+            if evicted.renewal is not None:
+                evicted.renewal.cancel()
 
-        self._tokens[aud][scope] = response.json().get("access_token")
+    def _renew(self, aud: str, scope: Scope):
+        cached = self._tokens.get((aud, scope))
+        if cached is None:
+            return
 
-    def _is_token_valid(self, token: str) -> bool:
+        cached.renewal = None
+
+        if time.time() - cached.last_used > self._idle_timeout:
+            # Idle audiences are evicted instead of renewed
+            del self._tokens[(aud, scope)]
+            return
+
+        task = asyncio.create_task(self.refresh_token(aud=aud, scope=scope))
+        task.add_done_callback(self._log_renewal_error)
+
+    @staticmethod
+    def _log_renewal_error(task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+
+        # The token is requested again on its next use
+        MessageLogger.log(
+            "Token renewal failed",
+            data={"error": str(task.exception())},
+        )
+
+    @staticmethod
+    def _get_expiration(token: str) -> float:
         payload = jwt.decode(token, options={"verify_signature": False})
         exp = payload.get("exp", None)
         if exp is None:
-            return False
-        exp = datetime.fromtimestamp(exp)
-        now = datetime.now()
-
-        if exp >= now:
-            return True
+            return 0
 
-        return False
+        return float(exp)
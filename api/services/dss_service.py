@@ -1,12 +1,15 @@
+import httpx
+
 from http import HTTPStatus
-from typing import List
+from typing import Dict, List
 from uuid import UUID
-from fastapi import HTTPException
+from fastapi import Request
 from typing import List
 from pydantic import HttpUrl
 
 from config.config import Settings
 from config.logger import MessageLogger
+from config.metrics import DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS, track
 from schema_types.availability import USSAvailability
 from schemas.availability import USSAvailabilityRequest, USSAvailabilityResponse
 from schemas.constraint import ConstraintSchema
@@ -18,7 +21,6 @@ from schema_types.ovn import ovn
 from schema_types.subscription import NewSubscriptionSchema
 from schemas.area_of_interest import AreaOfInterestSchema
 from schemas.operational_intent import OperationalIntentSchema
-from schemas.error import ResponseError
 from schemas.report import (
     ExchangeSchema,
     ReportRequest,
@@ -62,12 +64,26 @@ class DSSService:
         self._app_domain: str = settings.DOMAIN
         self._manager: str = settings.MANAGER
 
+        # The client is shared by every request handled by the process, so the
+        # pool keeps warm connections to the DSS between requests.
         self._client = AuthAsyncClient(
-            base_url=self._base_url, aud=Audition.DSS.value)
+            base_url=self._base_url,
+            aud=Audition.DSS.value,
+            limits=httpx.Limits(
+                max_connections=settings.DSS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DSS_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.DSS_KEEPALIVE_EXPIRY,
+            ),
+            http2=settings.DSS_HTTP2,
+        )
 
     async def close(self):
         await self._client.aclose()
 
+    def get_pool_stats(self) -> Dict[str, int]:
+        return self._client.get_pool_stats()
+
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def query_constraint_references(self, area_of_interest: AreaOfInterestSchema) -> ConstraintReferenceQueryResponse:
 
         """
@@ -77,24 +93,16 @@ class DSSService:
             area_of_interest=area_of_interest,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "post",
             "/constraint_references/query",
+            ConstraintReferenceQueryResponse,
+            error_message="Error querying DSS constraint references.",
             scope=Scope.CONSTRAINT_PROCESSING,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error querying DSS constraint references.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return ConstraintReferenceQueryResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def query_operational_intent_references(self, area_of_interest: AreaOfInterestSchema) -> OperationalIntentReferenceQueryResponse:
         """
         Query all operational intents from the DSS.
@@ -103,24 +111,16 @@ class DSSService:
             area_of_interest=area_of_interest,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "post",
             "/operational_intent_references/query",
+            OperationalIntentReferenceQueryResponse,
+            error_message="Error querying DSS operational intents.",
             scope=Scope.STRATEGIC_COORDINATION,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error querying DSS operational intents.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return OperationalIntentReferenceQueryResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def create_operational_intent(self, entity_id: UUID, area_of_interest: AreaOfInterestSchema, keys: List[str] = []) -> OperationalIntentReferenceCreateResponse:
         """
         Create a new operational intent in the DSS.
@@ -140,67 +140,44 @@ class DSSService:
             flight_type=FlightType.VLOS.value,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "put",
             f"/operational_intent_references/{entity_id}",
+            OperationalIntentReferenceCreateResponse,
+            error_message="Error creating operational intent.",
+            status_code=HTTPStatus.CREATED,
             scope=Scope.STRATEGIC_COORDINATION,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.CREATED.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error creating operational intent.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return OperationalIntentReferenceCreateResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def get_operational_intent_reference(self, entity_id: UUID) -> OperationalIntentReferenceGetResponse:
         """
         Get the operational intent reference from the DSS.
         """
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "get",
             f"/operational_intent_references/{entity_id}",
+            OperationalIntentReferenceGetResponse,
+            error_message="Error getting operational intent reference.",
             scope=Scope.STRATEGIC_COORDINATION,
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error getting operational intent reference.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return OperationalIntentReferenceGetResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def delete_operational_intent_reference(self, entity_id: UUID, ovn: str) -> OperationalIntentReferenceDeleteResponse:
         """
         Delete the operational intent reference from the DSS.
         """
-        response = await self._client.request(
+        return await self._client.request_model(
             "delete",
             f"/operational_intent_references/{entity_id}/{ovn}",
+            OperationalIntentReferenceDeleteResponse,
+            error_message="Error deleting operational intent reference in the DSS.",
             scope=Scope.STRATEGIC_COORDINATION,
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error deleting operational intent reference in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return OperationalIntentReferenceDeleteResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def update_operational_intent_reference(self, entity_id: UUID, ovn: str, keys: List[ovn], operational_intent: OperationalIntentSchema) -> OperationalIntentReferenceUpdateResponse:
         """
         Update the operational intent reference state in the DSS.
@@ -223,24 +200,16 @@ class DSSService:
         if (operational_intent.reference.state == OperationalIntentState.NONCONFORMING):
             scope = Scope.CONFORMANCE_MONITORING_SA
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "put",
             f"/operational_intent_references/{entity_id}/{ovn}",
+            OperationalIntentReferenceUpdateResponse,
+            error_message="Error updating operational intent reference in the DSS.",
             scope=scope,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error updating operational intent reference in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return OperationalIntentReferenceUpdateResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def create_constraint_reference(self, entity_id: UUID, areas_of_interest: List[AreaOfInterestSchema]) -> ConstraintReferenceCreateResponse:
         """
         Create a new constraint in the DSS.
@@ -251,45 +220,30 @@ class DSSService:
             uss_base_url=HttpUrl(self._app_domain),
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "put",
             f"/constraint_references/{entity_id}",
+            ConstraintReferenceCreateResponse,
+            error_message="Error creating constraint in the DSS.",
+            status_code=HTTPStatus.CREATED,
             scope=Scope.CONSTRAINT_MANAGEMENT,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.CREATED.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error creating constraint in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return ConstraintReferenceCreateResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def delete_constraint_reference(self, entity_id: UUID, ovn: str) -> ConstraintReferenceDeleteResponse:
         """
         Delete the constraint reference from the DSS.
         """
-        response = await self._client.request(
+        return await self._client.request_model(
             "delete",
             f"/constraint_references/{entity_id}/{ovn}",
+            ConstraintReferenceDeleteResponse,
+            error_message="Error deleting constraint reference in the DSS.",
             scope=Scope.CONSTRAINT_MANAGEMENT,
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error deleting constraint reference in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return ConstraintReferenceDeleteResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def update_constraint_reference(self, entity_id: UUID, ovn: str, constraint: ConstraintSchema) -> ConstraintReferenceUpdateResponse:
         """
         Update the constraint reference in the DSS.
@@ -300,24 +254,16 @@ class DSSService:
             uss_base_url=HttpUrl(self._app_domain),
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "put",
             f"/constraint_references/{entity_id}/{ovn}",
+            ConstraintReferenceUpdateResponse,
+            error_message="Error updating constraint reference in the DSS.",
             scope=Scope.CONSTRAINT_MANAGEMENT,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error updating constraint reference in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return ConstraintReferenceUpdateResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def create_subscription(self, subscription_id: UUID, area_of_interest: AreaOfInterestSchema) -> SubscriptionCreateResponse:
         """
         Create subscription in the DSS.
@@ -329,45 +275,29 @@ class DSSService:
             notify_for_operational_intents=True,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "put",
             f"/subscriptions/{subscription_id}",
+            SubscriptionCreateResponse,
+            error_message="Error querying DSS subscriptions.",
             scope=Scope.CONSTRAINT_PROCESSING,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error querying DSS subscriptions.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return SubscriptionCreateResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def get_subscription(self, subscription_id: UUID) -> SubscriptionGetResponse:
         """
         Get the subscription details from the DSS.
         """
-        response = await self._client.request(
+        return await self._client.request_model(
             "get",
             f"/subscriptions/{subscription_id}",
+            SubscriptionGetResponse,
+            error_message="Error getting subscription from the DSS.",
             scope=Scope.CONSTRAINT_PROCESSING,
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error getting subscription from the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return SubscriptionGetResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def set_availability(self, availability: USSAvailability) -> USSAvailabilityResponse:
         """
         Set the USS availability in the DSS.
@@ -377,24 +307,16 @@ class DSSService:
             availability=availability,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "post",
             f"/uss_availability/{self._manager}",
+            USSAvailabilityResponse,
+            error_message="Error setting USS availability in the DSS.",
             scope=Scope.AVAILABILITY_ARBITRATION,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error setting USS availability in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return USSAvailabilityResponse.model_validate(response.json())
-
+    @track(DSS_REQUEST_DURATION, DSS_REQUEST_ERRORS)
     async def make_report(self, exchange: ExchangeSchema) -> ReportResponse:
         """
         Make a report in the DSS.
@@ -404,20 +326,19 @@ class DSSService:
             exchange=exchange,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "post",
             "/reports",
+            ReportResponse,
+            error_message="Error making report in the DSS.",
+            status_code=HTTPStatus.CREATED,
             scope=Scope.CONFORMANCE_MONITORING_SA,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.CREATED.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error making report in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
 
-        return ReportResponse.model_validate(response.json())
+def get_dss_service(request: Request) -> DSSService:
+    """
+    FastAPI dependency returning the DSS client created in the app lifespan.
+    """
+    return request.app.state.dss
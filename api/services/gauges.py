@@ -0,0 +1,104 @@
+from typing import Dict, Tuple
+
+from config.logger import LogWriter
+from config.metrics import MetricsRegistry
+from controllers import notification_outbox as notification_outbox_controller
+from services.auth_service import AuthService
+from services.dss_service import DSSService
+from services.remote_entity_cache import RemoteEntityCache
+from services.uss_service import USSServiceRegistry
+from services.volume_index import VolumeIndex
+
+# Stats of the log writer that are not counters
+LOG_WRITER_QUEUE_STATS = ("depth", "capacity", "max_depth")
+
+def _get_caches() -> Dict[str, Tuple[int, int]]:
+    caches = {"remote_entity": RemoteEntityCache.get_instance()}
+
+    # The auth service is only created when the first token is needed
+    if AuthService._instance is not None:
+        caches["token"] = AuthService._instance
+
+    return {name: (cache.hits, cache.misses) for name, cache in caches.items()}
+
+def register_gauges(dss: DSSService):
+    """
+    Register the gauges and counters of the services, read when the metrics
+    are rendered.
+    """
+    registry = MetricsRegistry.get_instance()
+
+    def get_pool_connections():
+        pools = {"dss": dss.get_pool_stats(), **USSServiceRegistry.get_instance().get_pool_stats()}
+        return {
+            (aud, state): count
+            for aud, stats in pools.items()
+            for state, count in stats.items()
+        }
+
+    async def get_outbox_notifications():
+        counts = await notification_outbox_controller.count_notifications()
+        return {(status.value,): count for status, count in counts.items()}
+
+    def get_cache_lookups():
+        return {
+            (name, result): count
+            for name, (hits, misses) in _get_caches().items()
+            for result, count in (("hit", hits), ("miss", misses))
+        }
+
+    def get_cache_hit_ratio():
+        return {
+            (name,): hits / (hits + misses) if hits + misses else 0
+            for name, (hits, misses) in _get_caches().items()
+        }
+
+    def get_log_writer_queue():
+        stats = LogWriter.get_instance().stats()
+        return {(stat,): stats[stat] for stat in LOG_WRITER_QUEUE_STATS}
+
+    def get_log_writer_entries():
+        stats = LogWriter.get_instance().stats()
+        return {(stat,): value for stat, value in stats.items() if stat not in LOG_WRITER_QUEUE_STATS}
+
+    registry.gauge(
+        "uss_http_pool_connections",
+        "Connections of the pools of the clients to the DSS and other USSs.",
+        get_pool_connections,
+        ("aud", "state"),
+    )
+    registry.gauge(
+        "uss_notification_outbox_notifications",
+        "Notifications of the outbox by status.",
+        get_outbox_notifications,
+        ("status",),
+    )
+    registry.counter_callback(
+        "uss_cache_lookups_total",
+        "Lookups of the caches by result.",
+        get_cache_lookups,
+        ("cache", "result"),
+    )
+    registry.gauge(
+        "uss_cache_hit_ratio",
+        "Ratio of the lookups of the caches that were hits.",
+        get_cache_hit_ratio,
+        ("cache",),
+    )
+    registry.gauge(
+        "uss_log_writer_queue",
+        "Depth and capacity of the queue of the background log writer.",
+        get_log_writer_queue,
+        ("stat",),
+    )
+    registry.counter_callback(
+        "uss_log_writer_entries_total",
+        "Entries and bodies handled by the background log writer.",
+        get_log_writer_entries,
+        ("stat",),
+    )
+    registry.gauge(
+        "uss_volume_index_entities",
+        "Operational intents and constraints in the volume index.",
+        lambda: len(VolumeIndex.get_instance()),
+    )
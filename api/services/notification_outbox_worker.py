@@ -0,0 +1,138 @@
+import asyncio
+
+from pydantic import HttpUrl
+from typing import List, Optional
+
+from config.config import Settings
+from config.logger import MessageLogger
+from controllers import notification_outbox as notification_outbox_controller
+from models.notification_outbox import NotificationOutboxModel
+from schemas.constraint import ConstraintSchema
+from schemas.operational_intent import OperationalIntentSchema
+from schema_types.fan_out import FanOutStatus
+from schema_types.notification import NotificationEntityType
+from services.uss_service import USSServiceRegistry
+from utils.fan_out import NotificationFanOut
+
+class NotificationOutboxWorker:
+    """
+    Background workers delivering the notifications enqueued in the outbox.
+    """
+
+    def __init__(self):
+        settings = Settings()
+
+        self._workers = settings.OUTBOX_WORKERS
+        self._batch_size = settings.OUTBOX_BATCH_SIZE
+        self._poll_interval = settings.OUTBOX_POLL_INTERVAL
+        self._lease = settings.OUTBOX_LEASE
+        self._max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+        self._backoff_base = settings.OUTBOX_BACKOFF_BASE
+        self._backoff_max = settings.OUTBOX_BACKOFF_MAX
+        self._failed_retention = settings.OUTBOX_FAILED_RETENTION
+
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """
+        Enqueue the notifications interrupted by the previous run, then start
+        the delivery workers in the running event loop.
+        """
+        await notification_outbox_controller.enqueue_interrupted_notifications()
+
+        self._tasks = [
+            asyncio.create_task(self._run())
+            for _ in range(self._workers)
+        ]
+
+    async def stop(self):
+        """
+        Stop the delivery workers. Claimed notifications not yet delivered are
+        claimed again once their lease expires.
+        """
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            try:
+                delivered = await self._deliver_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                MessageLogger.log(
+                    "Notification Outbox Error",
+                    data={"error": str(e)},
+                )
+                delivered = 0
+
+            if delivered == 0:
+                await asyncio.sleep(self._poll_interval)
+
+    async def _deliver_batch(self) -> int:
+        notifications = await notification_outbox_controller.claim_due_notifications(
+            limit=self._batch_size,
+            lease=self._lease,
+        )
+
+        results = await NotificationFanOut.get_instance().run(
+            (
+                str(notification.id),
+                notification.uss_base_url,
+                lambda notification=notification: self._deliver(notification),
+            )
+            for notification in notifications
+        )
+
+        for notification, result in zip(notifications, results):
+            if result.status == FanOutStatus.OK:
+                await notification_outbox_controller.complete_notification(notification)
+                continue
+
+            MessageLogger.log(
+                "Notification Delivery Failed",
+                data={
+                    "entity_type": notification.entity_type.value,
+                    "entity_id": str(notification.entity_id),
+                    "uss_base_url": notification.uss_base_url,
+                    "attempts": notification.attempts + 1,
+                    "result": result.model_dump(mode="json", exclude={"value"}),
+                },
+            )
+
+            await notification_outbox_controller.reschedule_notification(
+                notification=notification,
+                error=result.error,
+                max_attempts=self._max_attempts,
+                backoff_base=self._backoff_base,
+                backoff_max=self._backoff_max,
+                failed_retention=self._failed_retention,
+            )
+
+        return len(notifications)
+
+    async def _deliver(self, notification: NotificationOutboxModel):
+        async with USSServiceRegistry.get_instance().lease(HttpUrl(notification.uss_base_url)) as uss:
+            if notification.entity_type == NotificationEntityType.OPERATIONAL_INTENT:
+                operational_intent: Optional[OperationalIntentSchema] = None
+                if notification.payload is not None:
+                    operational_intent = OperationalIntentSchema.model_validate(notification.payload)
+
+                await uss.notify_operational_intent(
+                    subscriptions=notification.subscriptions,
+                    operational_intent_id=notification.entity_id,
+                    operational_intent=operational_intent,
+                )
+            else:
+                constraint: Optional[ConstraintSchema] = None
+                if notification.payload is not None:
+                    constraint = ConstraintSchema.model_validate(notification.payload)
+
+                await uss.notify_constraint(
+                    subscriptions=notification.subscriptions,
+                    constraint_id=notification.entity_id,
+                    constraint=constraint,
+                )
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Union
+from uuid import UUID
+
+from config.config import Settings
+from schemas.constraint import ConstraintSchema
+from schemas.operational_intent import OperationalIntentSchema
+from services.volume_index import VolumeIndex
+
+RemoteEntity = Union[OperationalIntentSchema, ConstraintSchema]
+
+class RemoteEntityCache:
+    """
+    Bounded LRU cache of the operational intents and constraints managed by
+    other USSs, keyed by entity id.
+
+    The cache is filled by the notifications received from other USSs and by
+    the entities retrieved from them. A cached entity is only used when its
+    version is at least the version of the reference returned by the DSS.
+    The volumes of the cached entities are kept in the VolumeIndex.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        self._size = Settings().REMOTE_ENTITY_CACHE_SIZE
+        self._entities: OrderedDict[UUID, RemoteEntity] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get_operational_intent(self, entity_id: UUID, version: int) -> Optional[OperationalIntentSchema]:
+        """
+        Get the cached operational intent if it is not older than the version.
+        """
+        entity = self._get(entity_id, version)
+        return entity if isinstance(entity, OperationalIntentSchema) else None
+
+    def get_constraint(self, entity_id: UUID, version: int) -> Optional[ConstraintSchema]:
+        """
+        Get the cached constraint if it is not older than the version.
+        """
+        entity = self._get(entity_id, version)
+        return entity if isinstance(entity, ConstraintSchema) else None
+
+    def put(self, entity: RemoteEntity):
+        """
+        Cache the entity, unless a newer version of it is already cached.
+        """
+        entity_id = entity.reference.id
+        cached = self._entities.get(entity_id)
+
+        if cached is not None and cached.reference.version > entity.reference.version:
+            return
+
+        self._entities[entity_id] = entity
+        self._entities.move_to_end(entity_id)
+        VolumeIndex.get_instance().put(entity)
+
+        while len(self._entities) > self._size:
+            evicted_id, _ = self._entities.popitem(last=False)
+            VolumeIndex.get_instance().remove(evicted_id, owned=False)
+
+    def evict(self, entity_id: UUID):
+        """
+        Remove a deleted entity from the cache.
+        """
+        self._entities.pop(entity_id, None)
+        VolumeIndex.get_instance().remove(entity_id, owned=False)
+
+    def _get(self, entity_id: UUID, version: int) -> Optional[RemoteEntity]:
+        entity = self._entities.get(entity_id)
+
+        if entity is None or entity.reference.version < version:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entities.move_to_end(entity_id)
+        return entity
@@ -1,13 +1,20 @@
+import asyncio
+import httpx
+import time
+
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from http import HTTPStatus
+from threading import Lock
 from uuid import UUID
-from fastapi import HTTPException
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Set, Tuple
 from pydantic import HttpUrl
 
 from config.config import Settings
-from config.config import Settings
+from config.metrics import PEER_REQUEST_DURATION, PEER_REQUEST_ERRORS, track
 from schemas.constraint import ConstraintGetResponse, ConstraintNotificationRequest, ConstraintSchema
 from services.auth_service import AuthAsyncClient
+from services.remote_entity_cache import RemoteEntityCache
 from schemas.report import (
     ExchangeSchema,
     ReportRequest,
@@ -18,12 +25,14 @@ from schemas.operational_intent import (
     OperationalIntentSchema,
     OperationalIntentNotificationRequest,
 )
-from schemas.error import ResponseError
 from schema_types.subscription import SubscriptionBaseSchema
 from schema_types.auth import Scope
 
+def _get_peer(service: "USSService", *args, **kwargs) -> Tuple[str]:
+    return (service._aud,)
+
 class USSService:
-    def __init__(self, base_url: HttpUrl):
+    def __init__(self, base_url: HttpUrl, limits: Optional[httpx.Limits] = None):
         self._base_url = str(base_url)
         self._aud = base_url.host
         
@@ -33,55 +42,80 @@ class USSService:
         if not self._aud:
             raise ValueError("Manager must be provided when initiating an object of USSService.")
 
-        self._client = AuthAsyncClient(aud=self._aud, base_url=self._base_url)
+        self._client = AuthAsyncClient(
+            aud=self._aud,
+            base_url=self._base_url,
+            limits=limits or httpx.Limits(),
+        )
+
+        # Leases of the registry, the client is only closed once all are released
+        self._leases = 0
+        self._evicted = False
 
     async def close(self):
         await self._client.aclose()
 
-    async def get_operational_intent(self, entity_id: UUID) -> OperationalIntentGetResponse:
+    def get_pool_stats(self) -> Dict[str, int]:
+        return self._client.get_pool_stats()
+
+    async def get_operational_intent(self, entity_id: UUID, version: Optional[int] = None) -> OperationalIntentGetResponse:
         """
         Query the operational intent from another USS that owns the entity.
+        When the version of the DSS reference is given, a cached operational
+        intent at least as recent is returned without querying the USS.
         """
+        cache = RemoteEntityCache.get_instance()
 
-        response = await self._client.request(
+        if version is not None:
+            cached = cache.get_operational_intent(entity_id, version)
+            if cached is not None:
+                return OperationalIntentGetResponse(operational_intent=cached)
+
+        result = await self._request_operational_intent(entity_id)
+        cache.put(result.operational_intent)
+
+        return result
+
+    # Only the requests are timed, cache hits are not peer latency
+    @track(PEER_REQUEST_DURATION, PEER_REQUEST_ERRORS, _get_peer, name="get_operational_intent")
+    async def _request_operational_intent(self, entity_id: UUID) -> OperationalIntentGetResponse:
+        return await self._client.request_model(
             "get",
             f"/uss/v1/operational_intents/{entity_id}",
+            OperationalIntentGetResponse,
+            error_message=f"Error querying USS {self._aud} at {self._base_url} for operational intent.",
             scope=Scope.STRATEGIC_COORDINATION,
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message=f"Error querying USS {self._aud} at {self._base_url} for operational intent.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return OperationalIntentGetResponse.model_validate(response.json())
-
-    async def get_constraint(self, entity_id: UUID) -> ConstraintGetResponse:
+    async def get_constraint(self, entity_id: UUID, version: Optional[int] = None) -> ConstraintGetResponse:
         """
         Query the constraint from another USS that owns the entity.
+        When the version of the DSS reference is given, a cached constraint at
+        least as recent is returned without querying the USS.
         """
+        cache = RemoteEntityCache.get_instance()
+
+        if version is not None:
+            cached = cache.get_constraint(entity_id, version)
+            if cached is not None:
+                return ConstraintGetResponse(constraint=cached)
 
-        response = await self._client.request(
+        result = await self._request_constraint(entity_id)
+        cache.put(result.constraint)
+
+        return result
+
+    @track(PEER_REQUEST_DURATION, PEER_REQUEST_ERRORS, _get_peer, name="get_constraint")
+    async def _request_constraint(self, entity_id: UUID) -> ConstraintGetResponse:
+        return await self._client.request_model(
             "get",
             f"/uss/v1/constraints/{entity_id}",
+            ConstraintGetResponse,
+            error_message=f"Error querying USS {self._aud} at {self._base_url} for constraint.",
             scope=Scope.CONSTRAINT_PROCESSING,
         )
 
-        if response.status_code != HTTPStatus.OK.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message=f"Error querying USS {self._aud} at {self._base_url} for constraint.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
-        return ConstraintGetResponse.model_validate(response.json())
-
+    @track(PEER_REQUEST_DURATION, PEER_REQUEST_ERRORS, _get_peer)
     async def notify_operational_intent(self, subscriptions: List[SubscriptionBaseSchema], operational_intent_id: UUID, operational_intent: Optional[OperationalIntentSchema]) -> None:
         """
         Notify the USS about an operational intent.
@@ -93,25 +127,17 @@ class USSService:
             subscriptions=subscriptions,
         )
 
-        response = await self._client.request(
+        await self._client.request_model(
             "post",
             "/uss/v1/operational_intents/",
+            None,
+            error_message=f"Error notifying USS {self._aud} at {self._base_url} about operational intent.",
+            status_code=HTTPStatus.NO_CONTENT,
             json=body.model_dump(mode="json"),
             scope=Scope.STRATEGIC_COORDINATION,
         )
 
-        if response.status_code != HTTPStatus.NO_CONTENT.value:
-            # Print the raw response for debugging purposes
-            print(f"Response content: {response.headers}")
-
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message=f"Error notifying USS {self._aud} at {self._base_url} about operational intent.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
+    @track(PEER_REQUEST_DURATION, PEER_REQUEST_ERRORS, _get_peer)
     async def notify_constraint(self, subscriptions: List[SubscriptionBaseSchema], constraint_id: UUID, constraint: Optional[ConstraintSchema]) -> None:
         """
         Notify the USS about an operational intent.
@@ -123,22 +149,17 @@ class USSService:
             subscriptions=subscriptions,
         )
 
-        response = await self._client.request(
+        await self._client.request_model(
             "post",
             "/uss/v1/constraints/",
+            None,
+            error_message=f"Error notifying USS {self._aud} at {self._base_url} about operational intent.",
+            status_code=HTTPStatus.NO_CONTENT,
             json=body.model_dump(mode="json"),
             scope=Scope.CONSTRAINT_MANAGEMENT,
         )
 
-        if response.status_code != HTTPStatus.NO_CONTENT.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message=f"Error notifying USS {self._aud} at {self._base_url} about operational intent.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
-
+    @track(PEER_REQUEST_DURATION, PEER_REQUEST_ERRORS, _get_peer)
     async def make_report(self, exchange: ExchangeSchema) -> ReportResponse:
         """
         Make a report in the DSS.
@@ -148,21 +169,123 @@ class USSService:
             exchange=exchange,
         )
 
-        response = await self._client.request(
+        return await self._client.request_model(
             "post",
             "/uss/v1/reports/",
+            ReportResponse,
+            error_message="Error making report in the DSS.",
+            status_code=HTTPStatus.CREATED,
             scope=Scope.CONFORMANCE_MONITORING_SA,
             json=body.model_dump(mode="json"),
         )
 
-        if response.status_code != HTTPStatus.CREATED.value:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=ResponseError(
-                    message="Error making report in the DSS.",
-                    data=response.json() if response.content else None,
-                ).model_dump(mode="json"),
-            )
 
-        return ReportResponse.model_validate(response.json())
+class USSServiceRegistry:
+    """
+    Registry of long-lived USSService clients, one per peer USS base url.
+
+    The registry is bounded: when it is full the least recently used client
+    is evicted, and clients that were not used for USS_CLIENT_IDLE_TIMEOUT
+    seconds are evicted as well. Clients are leased for the duration of
+    their requests, and evicted clients are only closed once every lease is
+    released, so requests in flight are never cut.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        self._max_clients = settings.USS_MAX_CLIENTS
+        self._idle_timeout = settings.USS_CLIENT_IDLE_TIMEOUT
+        self._limits = httpx.Limits(
+            max_connections=settings.USS_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.USS_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.USS_KEEPALIVE_EXPIRY,
+        )
+
+        # Ordered from the least to the most recently used client
+        self._services: OrderedDict[str, Tuple[USSService, float]] = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @asynccontextmanager
+    async def lease(self, base_url: HttpUrl) -> AsyncIterator[USSService]:
+        """
+        Lease the client of the USS at the base url, creating it if needed.
+        The client is not closed before the end of the lease, even if it is
+        evicted meanwhile.
+        """
+        service = self._acquire(base_url)
+
+        try:
+            yield service
+        finally:
+            service._leases -= 1
+            if service._evicted and service._leases == 0:
+                self._close_later(service)
+
+    def get_pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the connections in use and idle of the client of each USS.
+        """
+        return {service._aud: service.get_pool_stats() for service, _ in self._services.values()}
+
+    async def close(self):
+        """
+        Close every client in the registry.
+        """
+        services = [service for service, _ in self._services.values()]
+        self._services.clear()
+
+        await asyncio.gather(
+            *(service.close() for service in services),
+            *self._closing,
+            return_exceptions=True,
+        )
+
+    def _acquire(self, base_url: HttpUrl) -> USSService:
+        key = str(base_url)
+        now = time.monotonic()
+
+        self._evict_idle(now)
+
+        if key in self._services:
+            service, _ = self._services.pop(key)
+        else:
+            service = USSService(base_url=base_url, limits=self._limits)
+
+        service._leases += 1
+        self._services[key] = (service, now)
+
+        while len(self._services) > self._max_clients:
+            _, (evicted, _) = self._services.popitem(last=False)
+            self._evict(evicted)
+
+        return service
+
+    def _evict_idle(self, now: float):
+        while self._services:
+            key, (service, last_used) = next(iter(self._services.items()))
+            if now - last_used < self._idle_timeout:
+                break
+
+            del self._services[key]
+            self._evict(service)
+
+    def _evict(self, service: USSService):
+        service._evicted = True
+        if service._leases == 0:
+            self._close_later(service)
 
+    def _close_later(self, service: USSService):
+        task = asyncio.get_running_loop().create_task(service.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
@@ -0,0 +1,213 @@
+import numpy as np
+
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+from uuid import UUID
+
+from pymongo.errors import WriteError
+
+from config.config import Settings
+from models.constraint import ConstraintModel
+from models.operational_intent import OperationalIntentModel
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.constraint import ConstraintSchema
+from schemas.operational_intent import OperationalIntentSchema
+from schema_types.operational_intent import OperationalIntentState
+from utils.geometry import get_altitude_range, get_bounding_box, get_time_range
+
+# Columns of the bounds of each volume
+MIN_LNG, MIN_LAT, MAX_LNG, MAX_LAT, ALTITUDE_LOWER, ALTITUDE_UPPER, TIME_START, TIME_END = range(8)
+
+OPERATIONAL_INTENT = 0
+CONSTRAINT = 1
+
+IndexedEntity = Union[OperationalIntentSchema, ConstraintSchema]
+
+async def _store_geometry(model: Union[OperationalIntentModel, ConstraintModel]) -> bool:
+    """
+    Store the geometry of a document written before geometries were derived,
+    and tell if the document has one.
+    """
+    if model.geometry is not None:
+        return True
+
+    try:
+        # The geometry is derived on save
+        await model.save()
+    except WriteError:
+        # Outlines MongoDB can not index
+        return False
+
+    return True
+
+class IndexedEntry:
+    """
+    Slots of the volumes of an entity in the index.
+    """
+
+    def __init__(self, slots: List[int], version: int, owned: bool):
+        self.slots = slots
+        self.version = version
+        # Entities managed by this USS are not replaced by cached remote copies
+        self.owned = owned
+
+class VolumeIndex:
+    """
+    In-memory broad-phase index of the volumes of the known operational
+    intents and constraints, the ones managed by this USS and the ones cached
+    from other USSs.
+
+    The bounding box, altitude range and time range of each volume are kept
+    in one row of a NumPy array, so a query compares every volume at once.
+    Rows of removed volumes are reused through a free list and the array
+    doubles when it is full.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        capacity = Settings().VOLUME_INDEX_INITIAL_CAPACITY
+
+        self._bounds = np.zeros((capacity, 8), dtype=np.float64)
+        self._kinds = np.zeros(capacity, dtype=np.int8)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._entity_ids: List[Optional[UUID]] = [None] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+        self._entries: Dict[UUID, IndexedEntry] = {}
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    async def load(self):
+        """
+        Index the operational intents and constraints managed by this USS.
+        Only the entities with a stored geometry are indexed as managed by
+        this USS, as their conflicts are checked by the spatial queries of the
+        database; the other ones are retrieved like remote entities.
+        """
+        async for operational_intent_model in OperationalIntentModel.find(
+            {"operational_intent.reference.state": {"$ne": OperationalIntentState.DELETED.value}}
+        ):
+            self.put(operational_intent_model.operational_intent, owned=await _store_geometry(operational_intent_model))
+
+        async for constraint_model in ConstraintModel.find_all():
+            self.put(constraint_model.constraint, owned=await _store_geometry(constraint_model))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, entity: IndexedEntity, owned: bool = False):
+        """
+        Index the volumes of the entity, replacing the previous ones.
+        """
+        entity_id = entity.reference.id
+        entry = self._entries.get(entity_id)
+
+        if entry is not None and not owned and (entry.owned or entry.version > entity.reference.version):
+            return
+
+        kind = OPERATIONAL_INTENT if isinstance(entity, OperationalIntentSchema) else CONSTRAINT
+        self.remove(entity_id)
+
+        slots: List[int] = []
+        for volume in entity.details.volumes:
+            slot = self._allocate()
+            self._bounds[slot] = self._get_bounds(volume)
+            self._kinds[slot] = kind
+            self._active[slot] = True
+            self._entity_ids[slot] = entity_id
+            slots.append(slot)
+
+        self._entries[entity_id] = IndexedEntry(
+            slots=slots,
+            version=entity.reference.version,
+            owned=owned,
+        )
+
+    def remove(self, entity_id: UUID, owned: Optional[bool] = None):
+        """
+        Remove the volumes of the entity. With owned, only an entity managed
+        (True) or not managed (False) by this USS is removed.
+        """
+        entry = self._entries.get(entity_id)
+
+        if entry is None or (owned is not None and entry.owned != owned):
+            return
+
+        del self._entries[entity_id]
+
+        for slot in entry.slots:
+            self._active[slot] = False
+            self._entity_ids[slot] = None
+            self._free.append(slot)
+
+    def contains(self, entity_id: UUID, version: int) -> bool:
+        """
+        Check if the volumes of the entity are indexed at the version or a newer one.
+        """
+        entry = self._entries.get(entity_id)
+        return entry is not None and entry.version >= version
+
+    def owns(self, entity_id: UUID) -> bool:
+        """
+        Check if the entity is managed by this USS.
+        """
+        entry = self._entries.get(entity_id)
+        return entry is not None and entry.owned
+
+    def query(self, area: AreaOfInterestSchema, kind: Optional[int] = None) -> Set[UUID]:
+        """
+        Get the ids of the entities with a volume whose bounds overlap the
+        bounds of the area.
+        """
+        return {
+            self._entity_ids[slot]
+            for slot in np.flatnonzero(self._match(self._get_bounds(area), kind))
+        }
+
+    def query_operational_intents(self, area: AreaOfInterestSchema) -> Set[UUID]:
+        return self.query(area, OPERATIONAL_INTENT)
+
+    def query_constraints(self, area: AreaOfInterestSchema) -> Set[UUID]:
+        return self.query(area, CONSTRAINT)
+
+    def _match(self, bounds: Sequence[float], kind: Optional[int]) -> np.ndarray:
+        rows = self._bounds
+
+        mask = (
+            self._active
+            & (rows[:, MIN_LNG] <= bounds[MAX_LNG]) & (bounds[MIN_LNG] <= rows[:, MAX_LNG])
+            & (rows[:, MIN_LAT] <= bounds[MAX_LAT]) & (bounds[MIN_LAT] <= rows[:, MAX_LAT])
+            & (rows[:, ALTITUDE_LOWER] <= bounds[ALTITUDE_UPPER]) & (bounds[ALTITUDE_LOWER] <= rows[:, ALTITUDE_UPPER])
+            & (rows[:, TIME_START] <= bounds[TIME_END]) & (bounds[TIME_START] <= rows[:, TIME_END])
+        )
+
+        if kind is not None:
+            mask &= self._kinds == kind
+
+        return mask
+
+    def _allocate(self) -> int:
+        if not self._free:
+            self._grow()
+        return self._free.pop()
+
+    def _grow(self):
+        capacity = len(self._active)
+        added = max(capacity, 1)
+
+        self._bounds = np.concatenate([self._bounds, np.zeros((added, 8), dtype=np.float64)])
+        self._kinds = np.concatenate([self._kinds, np.zeros(added, dtype=np.int8)])
+        self._active = np.concatenate([self._active, np.zeros(added, dtype=bool)])
+        self._entity_ids += [None] * added
+        self._free += range(capacity + added - 1, capacity - 1, -1)
+
+    @staticmethod
+    def _get_bounds(area: AreaOfInterestSchema) -> Tuple[float, ...]:
+        return (*get_bounding_box(area), *get_altitude_range(area), *get_time_range(area))
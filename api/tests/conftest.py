@@ -1,15 +1,19 @@
 """Tests fixtures."""
+from threading import Lock
+
 from beanie import init_beanie
 import pytest
-from asgi_lifespan import LifespanManager
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 
-from app import app
+import app as app_module
 from mongomock_motor import AsyncMongoMockClient
-from config.config import initiate_database
 
 import models as models
-from app import app, token_listener
+from schemas.constraint_reference import ConstraintReferenceQueryResponse
+from schemas.operational_intent_reference import OperationalIntentReferenceCreateResponse, OperationalIntentReferenceQueryResponse
+from app import app
+from auth.auth_check import AuthCheck
+from config.logger import AppLogger
 
 
 async def mock_database():
@@ -21,22 +25,32 @@ async def mock_database():
     )
 
 
+async def no_authentication(self, request):
+    return None
+
+
 def mock_no_authentication():
-    app.dependency_overrides[token_listener] = lambda: {}
+    # Every router depends on its own AuthCheck instance
+    AuthCheck.__call__ = no_authentication
 
 
 @pytest.fixture
-async def client_test(mocker):
+async def database():
+    await mock_database()
+
+
+@pytest.fixture
+async def client_test(monkeypatch):
     """
     Create an instance of the client.
     :return: yield HTTP client.
     """
 
-    mocker.patch("config.config.initiate_database", return_value=await mock_database())
+    monkeypatch.setattr(app_module, "init_database", mock_database)
 
-    async with LifespanManager(app):
+    async with app.router.lifespan_context(app):
         async with AsyncClient(
-            app=app, base_url="http://test", follow_redirects=True
+            transport=ASGITransport(app=app), base_url="http://test", follow_redirects=True
         ) as ac:
             yield ac
 
@@ -44,3 +58,108 @@ async def client_test(mocker):
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """
+    Write and read the logs under a temporary directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_logger(name):
+    """
+    Logger with its own instance, opening its files in the current directory.
+    """
+    return type(f"{name.title()}Logger", (AppLogger,), {"NAME": name, "_instance": None, "_lock": Lock()})
+
+
+def make_area(vertices=None, circle=None, altitude=(0, 120), start="2030-01-01T10:00:00Z", end="2030-01-01T11:00:00Z"):
+    """
+    Volume4D of a polygon, a circle ((lng, lat), radius) or by default a
+    unit square, as sent by the DSS.
+    """
+    if circle is not None:
+        (lng, lat), radius = circle
+        outline = {"outline_circle": {"center": {"lng": lng, "lat": lat}, "radius": {"value": radius, "units": "M"}}}
+    else:
+        vertices = vertices or [(0, 0), (1, 0), (1, 1), (0, 1)]
+        outline = {"outline_polygon": {"vertices": [{"lng": lng, "lat": lat} for lng, lat in vertices]}}
+
+    return {
+        "volume": {
+            **outline,
+            "altitude_lower": {"value": altitude[0], "reference": "W84", "units": "M"},
+            "altitude_upper": {"value": altitude[1], "reference": "W84", "units": "M"},
+        },
+        "time_start": {"value": start, "format": "RFC3339"},
+        "time_end": {"value": end, "format": "RFC3339"},
+    }
+
+
+def make_operational_intent(entity_id, areas=None, ovn=None, manager="uss", uss_base_url="http://uss.test"):
+    """
+    Operational intent with its reference and details, as sent by the DSS.
+    """
+    areas = areas or [make_area()]
+    return {
+        "reference": {
+            "id": str(entity_id),
+            "flight_type": "VLOS",
+            "manager": manager,
+            "uss_availability": "Unknown",
+            "version": 1,
+            "state": "Accepted",
+            "ovn": ovn,
+            "time_start": areas[0]["time_start"],
+            "time_end": areas[-1]["time_end"],
+            "uss_base_url": uss_base_url,
+            "subscription_id": "00000000-0000-0000-0000-000000000000",
+        },
+        "details": {
+            "volumes": areas,
+            "off_nominal_volumes": [],
+            "priority": 0,
+        },
+    }
+
+
+def make_constraint(entity_id, areas=None, version=1):
+    """
+    Constraint with its reference and details, as sent by the DSS.
+    """
+    reference = make_operational_intent(entity_id, areas=areas)["reference"]
+    return {
+        "reference": {key: reference[key] for key in ("id", "manager", "time_start", "time_end", "uss_base_url")}
+        | {"uss_availability": "Unknown", "version": version},
+        "details": {"volumes": areas or [make_area()], "type": "", "geozone": None},
+    }
+
+
+class FakeDSS:
+    """
+    DSS answering every area query with the same references.
+    """
+
+    def __init__(self, operational_intent_references=(), constraint_references=()):
+        self.operational_intent_references = list(operational_intent_references)
+        self.constraint_references = list(constraint_references)
+        self.queries = 0
+
+    async def query_operational_intent_references(self, area_of_interest):
+        self.queries += 1
+        return OperationalIntentReferenceQueryResponse(operational_intent_references=self.operational_intent_references)
+
+    async def query_constraint_references(self, area_of_interest):
+        self.queries += 1
+        return ConstraintReferenceQueryResponse(constraint_references=self.constraint_references)
+
+    async def create_operational_intent(self, entity_id, area_of_interest, keys=[]):
+        self.created_keys = keys
+        operational_intent = make_operational_intent(entity_id, areas=[area_of_interest.model_dump(mode="json")], ovn="created-ovn")
+        return OperationalIntentReferenceCreateResponse.model_validate({
+            "subscribers": [],
+            "operational_intent_reference": operational_intent["reference"],
+        })
@@ -0,0 +1,94 @@
+from uuid import uuid4
+import pytest
+
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.operational_intent import OperationalIntentNotificationRequest
+from schemas.subscription import SubscriptionCreateResponse
+from services.airspace_mirror import AirspaceMirror
+from tests.conftest import make_area, make_operational_intent
+from tests.test_geometry import L_SHAPE
+
+
+def make_mirror(monkeypatch, max_age=300):
+    monkeypatch.setenv("AIRSPACE_MIRROR_ENABLED", "true")
+    monkeypatch.setenv("AIRSPACE_MIRROR_MAX_AGE", str(max_age))
+    return AirspaceMirror()
+
+
+def subscribe(mirror, vertices, references=()):
+    subscription_id = uuid4()
+    area = make_area(vertices=vertices)
+
+    mirror.add_subscription(
+        AreaOfInterestSchema.model_validate(area),
+        SubscriptionCreateResponse.model_validate({
+            "subscription": {
+                "id": str(subscription_id),
+                "notification_index": 0,
+                "version": "1",
+                "time_start": area["time_start"],
+                "time_end": area["time_end"],
+                "uss_base_url": "http://uss.test",
+                "notify_for_operational_intents": True,
+                "notify_for_constraints": True,
+                "implicit_subscription": False,
+                "dependent_operational_intents": [],
+            },
+            "operational_intent_references": list(references),
+            "constraint_references": [],
+        }),
+    )
+    return subscription_id
+
+
+def notify(mirror, subscription_id, notification_index, entity_id=None):
+    entity_id = entity_id or uuid4()
+    mirror.apply_operational_intent_notification(OperationalIntentNotificationRequest.model_validate({
+        "operational_intent_id": str(entity_id),
+        "operational_intent": make_operational_intent(entity_id, areas=[make_area(vertices=[(0.001, 0.001), (0.002, 0.001), (0.002, 0.002)])]),
+        "subscriptions": [{"subscription_id": str(subscription_id), "notification_index": notification_index}],
+    }))
+
+
+INSIDE = AreaOfInterestSchema.model_validate(make_area(vertices=[(0.002, 0.002), (0.005, 0.002), (0.005, 0.005)]))
+IN_NOTCH = AreaOfInterestSchema.model_validate(make_area(vertices=[(0.015, 0.015), (0.018, 0.015), (0.018, 0.018)]))
+
+
+class TestAirspaceMirror:
+    def test_only_areas_inside_the_subscription_are_covered(self, monkeypatch):
+        mirror = make_mirror(monkeypatch)
+        subscribe(mirror, L_SHAPE)
+
+        assert mirror.query_operational_intent_references(INSIDE) == []
+        assert mirror.query_operational_intent_references(IN_NOTCH) is None
+
+    def test_notifications_update_the_mirror(self, monkeypatch):
+        mirror = make_mirror(monkeypatch)
+        subscription_id = subscribe(mirror, L_SHAPE)
+
+        entity_id = uuid4()
+        notify(mirror, subscription_id, 1, entity_id)
+
+        assert [reference.id for reference in mirror.query_operational_intent_references(INSIDE)] == [entity_id]
+
+    def test_missed_notification_drops_the_subscription(self, monkeypatch):
+        mirror = make_mirror(monkeypatch)
+        subscription_id = subscribe(mirror, L_SHAPE)
+
+        notify(mirror, subscription_id, 2)
+
+        assert mirror.query_operational_intent_references(INSIDE) is None
+        assert mirror._operational_intents == {}
+
+    def test_expired_seed_is_not_served(self, monkeypatch):
+        mirror = make_mirror(monkeypatch, max_age=0)
+        subscribe(mirror, L_SHAPE)
+
+        assert mirror.query_operational_intent_references(INSIDE) is None
+
+    def test_disabled_mirror_covers_nothing(self, monkeypatch):
+        monkeypatch.setenv("AIRSPACE_MIRROR_ENABLED", "false")
+        mirror = AirspaceMirror()
+        subscribe(mirror, L_SHAPE)
+
+        assert mirror.query_operational_intent_references(INSIDE) is None
@@ -0,0 +1,125 @@
+import os
+import time
+import jwt
+import pytest
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from auth.auth_check import AuthCheck, PublicKeyStore, VerifiedTokenCache
+
+
+def write_key(directory, kid):
+    """
+    Write the public key of a new key pair as <kid>.pem and return the private key.
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    (directory / f"{kid}.pem").write_bytes(public_pem)
+    return private_key
+
+
+def make_token(private_key, kid=None, exp=None):
+    headers = {"kid": kid} if kid is not None else None
+    return jwt.encode({"aud": "manager", "exp": exp or time.time() + 60}, private_key, algorithm="RS256", headers=headers)
+
+
+def make_store(monkeypatch, path):
+    monkeypatch.setenv("DSS_PEM", str(path))
+    monkeypatch.setenv("DSS_PEM_RELOAD_INTERVAL", "0")
+    return PublicKeyStore()
+
+
+def make_check(monkeypatch):
+    monkeypatch.setenv("MANAGER", "manager")
+    return AuthCheck()
+
+
+class TestPublicKeyStore:
+    def test_key_is_selected_by_kid(self, monkeypatch, tmp_path):
+        production = write_key(tmp_path, "production")
+        write_key(tmp_path, "sandbox")
+        store = make_store(monkeypatch, tmp_path)
+
+        token = make_token(production, kid="production")
+        payload = make_check(monkeypatch)._decode(token, store.get_keys("production"))
+
+        assert payload["aud"] == "manager"
+
+    def test_unknown_kid_is_rejected_with_several_keys(self, monkeypatch, tmp_path):
+        write_key(tmp_path, "production")
+        sandbox = write_key(tmp_path, "sandbox")
+        store = make_store(monkeypatch, tmp_path)
+
+        assert store.get_keys(None) == []
+        assert store.get_keys("unknown") == []
+
+        with pytest.raises(jwt.InvalidTokenError):
+            make_check(monkeypatch)._decode(make_token(sandbox), store.get_keys(None))
+
+    def test_single_key_verifies_tokens_without_kid(self, monkeypatch, tmp_path):
+        private_key = write_key(tmp_path, "auth")
+        store = make_store(monkeypatch, tmp_path / "auth.pem")
+
+        keys = store.get_keys(None)
+
+        assert len(keys) == 1
+        assert make_check(monkeypatch)._decode(make_token(private_key), keys)["aud"] == "manager"
+
+    def test_replaced_file_keeps_loaded_keys(self, monkeypatch, tmp_path):
+        write_key(tmp_path, "auth")
+        store = make_store(monkeypatch, tmp_path / "auth.pem")
+        version = store.version
+
+        stat = os.stat
+
+        def stat_while_replaced(path, *args, **kwargs):
+            if str(path).endswith("auth.pem"):
+                raise FileNotFoundError(path)
+            return stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", stat_while_replaced)
+
+        assert len(store.get_keys("auth")) == 1
+        assert store.version == version
+
+    def test_changed_file_is_reloaded(self, monkeypatch, tmp_path):
+        write_key(tmp_path, "auth")
+        store = make_store(monkeypatch, tmp_path)
+        version = store.version
+
+        rotated = write_key(tmp_path, "rotated")
+
+        assert len(store.get_keys("rotated")) == 1
+        assert store.version == version + 1
+        assert make_check(monkeypatch)._decode(make_token(rotated, kid="rotated"), store.get_keys("rotated"))
+
+
+class TestVerifiedTokenCache:
+    def test_tokens_are_kept_until_expiry(self):
+        cache = VerifiedTokenCache(size=2)
+
+        cache.add("valid", time.time() + 60, key_version=1)
+        cache.add("expired", time.time() - 1, key_version=1)
+
+        assert cache.contains("valid", key_version=1)
+        assert not cache.contains("expired", key_version=1)
+
+    def test_tokens_verified_by_replaced_keys_are_dropped(self):
+        cache = VerifiedTokenCache(size=2)
+
+        cache.add("token", time.time() + 60, key_version=1)
+
+        assert not cache.contains("token", key_version=2)
+
+    def test_cache_is_bounded(self):
+        cache = VerifiedTokenCache(size=2)
+
+        for token in ("first", "second", "third"):
+            cache.add(token, time.time() + 60, key_version=1)
+
+        assert not cache.contains("first", key_version=1)
+        assert cache.contains("third", key_version=1)
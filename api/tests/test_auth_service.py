@@ -0,0 +1,95 @@
+import asyncio
+import time
+import httpx
+import jwt
+import pytest
+
+from schema_types.auth import Scope
+from services.auth_service import AuthService
+
+
+def make_service(monkeypatch, handler, renewal_margin=60):
+    monkeypatch.setenv("AUTH_URL", "http://auth.test")
+    monkeypatch.setenv("AUTH_KEY", "key")
+    monkeypatch.setenv("AUTH_TOKEN_RENEWAL_MARGIN", str(renewal_margin))
+
+    service = AuthService()
+    service._client = httpx.AsyncClient(base_url="http://auth.test", transport=httpx.MockTransport(handler))
+    return service
+
+
+class TokenServer:
+    """
+    Auth server issuing a new token on every request.
+    """
+
+    def __init__(self, lifetime=3600, delay=0):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+
+        token = jwt.encode(
+            {"exp": time.time() + self.lifetime, "n": self.requests, "aud": request.url.params["intended_audience"]},
+            "secret",
+        )
+        return httpx.Response(200, json={"access_token": token})
+
+
+class TestAuthService:
+    @pytest.mark.anyio
+    async def test_cached_token_is_reused(self, monkeypatch):
+        server = TokenServer()
+        service = make_service(monkeypatch, server)
+
+        first = await service.get_token("uss.test", Scope.STRATEGIC_COORDINATION)
+        second = await service.get_token("uss.test", Scope.STRATEGIC_COORDINATION)
+
+        assert first == second
+        assert server.requests == 1
+        assert (service.hits, service.misses) == (1, 1)
+        await service.close()
+
+    @pytest.mark.anyio
+    async def test_concurrent_refreshes_share_one_request(self, monkeypatch):
+        server = TokenServer(delay=0.01)
+        service = make_service(monkeypatch, server)
+
+        tokens = await asyncio.gather(*(
+            service.get_token("uss.test", Scope.STRATEGIC_COORDINATION)
+            for _ in range(10)
+        ))
+
+        assert len(set(tokens)) == 1
+        assert server.requests == 1
+        await service.close()
+
+    @pytest.mark.anyio
+    async def test_rejected_token_already_replaced_is_not_requested(self, monkeypatch):
+        server = TokenServer()
+        service = make_service(monkeypatch, server)
+
+        rejected = await service.get_token("uss.test", Scope.STRATEGIC_COORDINATION)
+        replaced = await service.refresh_token("uss.test", Scope.STRATEGIC_COORDINATION, rejected_token=rejected)
+        again = await service.refresh_token("uss.test", Scope.STRATEGIC_COORDINATION, rejected_token=rejected)
+
+        assert replaced != rejected
+        assert again == replaced
+        assert server.requests == 2
+        await service.close()
+
+    @pytest.mark.anyio
+    async def test_token_is_renewed_before_expiry(self, monkeypatch):
+        server = TokenServer(lifetime=60.05)
+        service = make_service(monkeypatch, server, renewal_margin=60)
+
+        first = await service.get_token("uss.test", Scope.STRATEGIC_COORDINATION)
+        await asyncio.sleep(0.2)
+
+        # Every renewed token is short-lived as well
+        assert server.requests >= 2
+        assert await service.get_token("uss.test", Scope.STRATEGIC_COORDINATION) != first
+        await service.close()
@@ -0,0 +1,108 @@
+import asyncio
+from uuid import UUID, uuid4
+import pytest
+
+from fastapi import HTTPException
+
+import controllers.operational_intent as operational_intent_controller
+from schemas.operational_intent import OperationalIntentGetResponse
+from schemas.area_of_interest import AreaOfInterestSchema
+from schema_types.ovn import OVN_REQUEST_FROM_USS
+from services.uss_service import USSService
+from tests.conftest import FakeDSS, make_area, make_operational_intent
+
+
+def make_reference(ovn):
+    return make_operational_intent(uuid4(), ovn=ovn)["reference"]
+
+
+def mock_uss(monkeypatch, ovns):
+    """
+    Answer the operational intent queries of other USSs with the OVN of each entity.
+    """
+    async def get_operational_intent(self, entity_id, version=None):
+        return OperationalIntentGetResponse.model_validate({
+            "operational_intent": make_operational_intent(entity_id, ovn=ovns[entity_id]),
+        })
+
+    monkeypatch.setattr(USSService, "get_operational_intent", get_operational_intent)
+
+
+class TestGetCloseOvns:
+    @pytest.mark.anyio
+    async def test_disclosed_ovns_are_used(self):
+        dss = FakeDSS(operational_intent_references=[make_reference("ovn-1"), make_reference("ovn-2")])
+
+        keys = await operational_intent_controller.get_close_ovns(dss, [AreaOfInterestSchema.model_validate(make_area())])
+
+        assert sorted(keys) == ["ovn-1", "ovn-2"]
+
+    @pytest.mark.anyio
+    async def test_undisclosed_ovns_are_fetched_from_uss(self, monkeypatch):
+        reference = make_reference(OVN_REQUEST_FROM_USS)
+        mock_uss(monkeypatch, {UUID(reference["id"]): "remote-ovn"})
+        dss = FakeDSS(operational_intent_references=[reference])
+
+        keys = await operational_intent_controller.get_close_ovns(dss, [AreaOfInterestSchema.model_validate(make_area())])
+
+        assert keys == ["remote-ovn"]
+
+    @pytest.mark.anyio
+    async def test_missing_remote_ovn_fails(self, monkeypatch):
+        reference = make_reference(None)
+        mock_uss(monkeypatch, {UUID(reference["id"]): None})
+        dss = FakeDSS(operational_intent_references=[reference])
+
+        with pytest.raises(HTTPException) as error:
+            await operational_intent_controller.get_close_ovns(dss, [AreaOfInterestSchema.model_validate(make_area())])
+
+        assert error.value.status_code == 502
+        assert reference["id"] in error.value.detail
+
+
+class ConcurrencyTrackingDSS(FakeDSS):
+    """
+    DSS recording the highest number of queries running at once.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.max_running = 0
+
+    async def _track(self):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+
+    async def query_operational_intent_references(self, area_of_interest):
+        await self._track()
+        return await super().query_operational_intent_references(area_of_interest)
+
+    async def query_constraint_references(self, area_of_interest):
+        await self._track()
+        return await super().query_constraint_references(area_of_interest)
+
+
+class TestGetCloseReferences:
+    @pytest.mark.anyio
+    async def test_dss_concurrency_is_bounded(self, monkeypatch):
+        monkeypatch.setenv("DSS_QUERY_CONCURRENCY", "3")
+        dss = ConcurrencyTrackingDSS()
+        areas = [AreaOfInterestSchema.model_validate(make_area()) for _ in range(10)]
+
+        await operational_intent_controller.get_close_references(dss, areas)
+
+        assert dss.queries == 20
+        assert dss.max_running == 3
+
+    @pytest.mark.anyio
+    async def test_references_are_merged_by_entity(self):
+        reference = make_reference("ovn-1")
+        dss = FakeDSS(operational_intent_references=[reference])
+        areas = [AreaOfInterestSchema.model_validate(make_area()) for _ in range(3)]
+
+        _, operational_intent_references = await operational_intent_controller.get_close_references(dss, areas)
+
+        assert list(operational_intent_references) == [UUID(reference["id"])]
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+
+from schema_types.fan_out import FanOutStatus
+from utils.fan_out import FanOut, gather_bounded, merge_iterators
+
+
+class TestFanOut:
+    @pytest.mark.anyio
+    async def test_slow_peer_does_not_starve_others(self):
+        fan_out = FanOut(max_concurrency=2, max_concurrency_per_peer=1, timeout=5)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "slow"
+
+        async def fast():
+            return "fast"
+
+        calls = [(f"slow-{i}", "slow.test", slow) for i in range(5)] + [("fast", "fast.test", fast)]
+        iterator = fan_out.iterate(calls)
+
+        first = await asyncio.wait_for(iterator.__anext__(), timeout=1)
+        assert first.key == "fast"
+
+        release.set()
+        results = [first] + [result async for result in iterator]
+        assert all(result.status == FanOutStatus.OK for result in results)
+        assert len(results) == 6
+
+    @pytest.mark.anyio
+    async def test_idle_peers_are_dropped(self):
+        fan_out = FanOut(max_concurrency=4, max_concurrency_per_peer=1, timeout=5)
+
+        async def call():
+            return None
+
+        results = await fan_out.run([(str(i), f"peer-{i}.test", call) for i in range(10)])
+
+        assert [result.status for result in results] == [FanOutStatus.OK] * 10
+        assert fan_out._peer_semaphores == {}
+        assert fan_out._peer_calls == {}
+
+    @pytest.mark.anyio
+    async def test_errors_and_timeouts_are_collected(self):
+        fan_out = FanOut(max_concurrency=4, max_concurrency_per_peer=4, timeout=0.01)
+
+        async def fail():
+            raise ValueError("boom")
+
+        async def hang():
+            await asyncio.sleep(1)
+
+        results = await fan_out.run([("fail", "a.test", fail), ("hang", "a.test", hang)])
+
+        assert [result.status for result in results] == [FanOutStatus.ERROR, FanOutStatus.TIMEOUT]
+        assert results[0].error == "boom"
+
+    @pytest.mark.anyio
+    async def test_gather_bounded_keeps_order(self):
+        async def call(i):
+            await asyncio.sleep(0.001 * (5 - i))
+            return i
+
+        assert await gather_bounded([lambda i=i: call(i) for i in range(5)], limit=2) == list(range(5))
+
+    @pytest.mark.anyio
+    async def test_budget_cancels_the_calls_still_running(self):
+        fan_out = FanOut(max_concurrency=4, max_concurrency_per_peer=4, timeout=5)
+        cancelled = asyncio.Event()
+
+        async def fast():
+            return "fast"
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        results = await asyncio.wait_for(fan_out.run([("fast", "a.test", fast), ("slow", "b.test", slow)], budget=0.05), timeout=1)
+
+        assert [result.status for result in results] == [FanOutStatus.OK, FanOutStatus.TIMEOUT]
+        assert "budget" in results[1].error
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    @pytest.mark.anyio
+    async def test_iterate_reports_the_calls_past_the_budget(self):
+        fan_out = FanOut(max_concurrency=4, max_concurrency_per_peer=4, timeout=5)
+
+        async def fast():
+            return "fast"
+
+        async def slow():
+            await asyncio.sleep(5)
+
+        results = [result async for result in fan_out.iterate([("slow", "a.test", slow), ("fast", "b.test", fast)], budget=0.05)]
+
+        assert [(result.key, result.status) for result in results] == [("fast", FanOutStatus.OK), ("slow", FanOutStatus.TIMEOUT)]
+
+    @pytest.mark.anyio
+    async def test_merge_iterators_yields_items_as_produced(self):
+        async def produce(name, delays):
+            for i, delay in enumerate(delays):
+                await asyncio.sleep(delay)
+                yield f"{name}-{i}"
+
+        items = [item async for item in merge_iterators(produce("a", [0.1, 0.01]), produce("b", [0.01, 0.01]))]
+
+        assert items == ["b-0", "b-1", "a-0", "a-1"]
@@ -0,0 +1,80 @@
+from uuid import UUID
+from httpx import AsyncClient
+import pytest
+
+from app import app
+from schemas.operational_intent import OperationalIntentGetResponse
+from schema_types.ovn import OVN_REQUEST_FROM_USS
+from services.dss_service import get_dss_service
+from services.uss_service import USSService
+from tests.conftest import FakeDSS, make_area, make_operational_intent
+
+# Square far away from the area of the flight plans
+FAR_AREA = make_area(vertices=[(10, 10), (10.01, 10), (10.01, 10.01), (10, 10.01)])
+FLIGHT_AREA = make_area(vertices=[(0, 0), (0.01, 0), (0.01, 0.01), (0, 0.01)])
+
+
+@pytest.fixture
+def dss():
+    dss = FakeDSS()
+    app.dependency_overrides[get_dss_service] = lambda: dss
+    yield dss
+    app.dependency_overrides.pop(get_dss_service, None)
+
+
+def mock_uss(monkeypatch, entities):
+    """
+    Answer the operational intent queries of other USSs from the entities by id.
+    """
+    async def get_operational_intent(self, entity_id, version=None):
+        return OperationalIntentGetResponse.model_validate({"operational_intent": entities[entity_id]})
+
+    monkeypatch.setattr(USSService, "get_operational_intent", get_operational_intent)
+
+
+class TestCreateFlightPlan:
+    @pytest.mark.anyio
+    async def test_keys_of_filtered_matches_are_sent(self, client_test: AsyncClient, dss, monkeypatch):
+        disclosed = make_operational_intent(UUID(int=1), areas=[FAR_AREA], ovn="disclosed-ovn")
+        undisclosed = make_operational_intent(UUID(int=2), areas=[FAR_AREA], ovn=OVN_REQUEST_FROM_USS)
+        dss.operational_intent_references = [disclosed["reference"], undisclosed["reference"]]
+
+        mock_uss(monkeypatch, {
+            UUID(int=1): disclosed,
+            UUID(int=2): make_operational_intent(UUID(int=2), areas=[FAR_AREA], ovn="remote-ovn"),
+        })
+
+        response = await client_test.put("/uss/v1/flight_plan/", json=FLIGHT_AREA)
+
+        assert response.status_code == 201
+        assert sorted(dss.created_keys) == ["disclosed-ovn", "remote-ovn"]
+
+    @pytest.mark.anyio
+    async def test_intersecting_match_is_a_conflict(self, client_test: AsyncClient, dss, monkeypatch):
+        conflicting = make_operational_intent(UUID(int=3), areas=[FLIGHT_AREA], ovn="conflicting-ovn")
+        dss.operational_intent_references = [conflicting["reference"]]
+
+        mock_uss(monkeypatch, {UUID(int=3): conflicting})
+
+        response = await client_test.put("/uss/v1/flight_plan/", json=FLIGHT_AREA)
+
+        assert response.status_code == 409
+        assert not hasattr(dss, "created_keys")
+
+    @pytest.mark.anyio
+    async def test_unknown_units_are_rejected(self, client_test: AsyncClient, dss):
+        area = make_area(circle=((0, 0), 100))
+        area["volume"]["outline_circle"]["radius"]["units"] = "KM"
+
+        response = await client_test.put("/uss/v1/flight_plan/", json=area)
+
+        assert response.status_code == 422
+
+    @pytest.mark.anyio
+    async def test_self_intersecting_polygon_is_rejected(self, client_test: AsyncClient, dss):
+        area = make_area(vertices=[(0, 0), (1, 1), (1, 0), (0, 1)])
+
+        response = await client_test.put("/uss/v1/flight_plan/", json=area)
+
+        assert response.status_code == 422
+        assert dss.queries == 0
@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from schemas.area_of_interest import AreaOfInterestSchema
+from tests.conftest import make_area
+from utils.geometry import GeometryProcessPool, contains, find_intersections, intersection_matrix, intersects
+
+
+def area(**kwargs) -> AreaOfInterestSchema:
+    return AreaOfInterestSchema.model_validate(make_area(**kwargs))
+
+
+# L-shaped polygon, its bounding box covers the missing upper right quarter
+L_SHAPE = [(0, 0), (0.02, 0), (0.02, 0.01), (0.01, 0.01), (0.01, 0.02), (0, 0.02)]
+
+
+class TestContains:
+    def test_polygon_inside_polygon(self):
+        assert contains(area(vertices=L_SHAPE), area(vertices=[(0.002, 0.002), (0.005, 0.002), (0.005, 0.005)]))
+
+    def test_polygon_in_concave_notch_is_not_contained(self):
+        # Inside the bounding box of the outer polygon, outside its outline
+        assert not contains(area(vertices=L_SHAPE), area(vertices=[(0.015, 0.015), (0.018, 0.015), (0.018, 0.018)]))
+
+    def test_polygon_crossing_concave_notch_is_not_contained(self):
+        # Every vertex inside, one edge leaves the outline
+        assert not contains(area(vertices=L_SHAPE), area(vertices=[(0.005, 0.018), (0.018, 0.005), (0.005, 0.005)]))
+
+    def test_polygon_in_corner_of_circle_box_is_not_contained(self):
+        circle = area(circle=((0, 0), 1000))
+        assert not contains(circle, area(vertices=[(0.008, 0.008), (0.0085, 0.008), (0.0085, 0.0085)]))
+
+    def test_polygon_inside_circle(self):
+        assert contains(area(circle=((0, 0), 1000)), area(vertices=[(0.001, 0.001), (0.002, 0.001), (0.002, 0.002)]))
+
+    def test_circle_inside_circle(self):
+        assert contains(area(circle=((0, 0), 1000)), area(circle=((0.001, 0), 500)))
+        assert not contains(area(circle=((0, 0), 1000)), area(circle=((0.005, 0), 500)))
+
+    def test_circle_inside_polygon(self):
+        assert contains(area(vertices=L_SHAPE), area(circle=((0.005, 0.005), 100)))
+        assert not contains(area(vertices=L_SHAPE), area(circle=((0.009, 0.009), 300)))
+
+    @pytest.mark.parametrize("inner", [
+        {"altitude": (0, 200)},
+        {"start": "2030-01-01T09:00:00Z"},
+        {"end": "2030-01-01T12:00:00Z"},
+    ])
+    def test_altitude_and_time_must_be_contained(self, inner):
+        outer = area(vertices=[(0, 0), (1, 0), (1, 1), (0, 1)])
+        assert not contains(outer, area(vertices=[(0.1, 0.1), (0.2, 0.1), (0.2, 0.2)], **inner))
+
+
+class TestIntersects:
+    def test_overlapping_boxes_of_disjoint_polygons(self):
+        # The triangle is in the bounding box of the L shape, not in its outline
+        assert not intersects(area(vertices=L_SHAPE), area(vertices=[(0.015, 0.015), (0.018, 0.015), (0.018, 0.018)]))
+
+    def test_crossing_polygons(self):
+        assert intersects(area(vertices=L_SHAPE), area(vertices=[(0.005, 0.005), (0.03, 0.005), (0.03, 0.006)]))
+
+    def test_polygon_inside_polygon(self):
+        assert intersects(area(vertices=L_SHAPE), area(vertices=[(0.002, 0.002), (0.003, 0.002), (0.003, 0.003)]))
+
+    def test_circles(self):
+        assert intersects(area(circle=((0, 0), 1000)), area(circle=((0.015, 0), 1000)))
+        assert not intersects(area(circle=((0, 0), 1000)), area(circle=((0.03, 0), 1000)))
+
+    def test_circle_and_polygon_corner(self):
+        square = area(vertices=[(0.01, 0.01), (0.02, 0.01), (0.02, 0.02), (0.01, 0.02)])
+
+        # The circle reaches the box of the square but not its corner
+        assert not intersects(area(circle=((0.0085, 0.0085), 200)), square)
+        assert intersects(area(circle=((0.0085, 0.0085), 300)), square)
+
+    def test_disjoint_altitudes_and_times(self):
+        assert not intersects(area(altitude=(0, 100)), area(altitude=(150, 200)))
+        assert not intersects(area(), area(start="2030-01-01T12:00:00Z", end="2030-01-01T13:00:00Z"))
+
+    def test_intersection_matrix(self):
+        areas = [area(circle=((0, 0), 1000)), area(vertices=L_SHAPE)]
+        others = [area(circle=((0.001, 0), 10)), area(vertices=[(0.015, 0.015), (0.018, 0.015), (0.018, 0.018)])]
+
+        assert intersection_matrix(areas, others).tolist() == [[True, False], [True, False]]
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class TestFindIntersections:
+    @pytest.mark.anyio
+    async def test_entities_are_split_across_the_pool(self, monkeypatch):
+        monkeypatch.setenv("GEOMETRY_PROCESS_POOL_WORKERS", "2")
+        monkeypatch.setenv("GEOMETRY_PROCESS_POOL_THRESHOLD", "0")
+        monkeypatch.setattr(GeometryProcessPool, "_instance", None)
+
+        executor = CountingExecutor()
+        monkeypatch.setattr(GeometryProcessPool, "get_executor", lambda pool: executor)
+
+        area_of_interest = area(vertices=L_SHAPE)
+        others = [
+            area(circle=((0.001, 0), 10)),
+            area(vertices=[(0.015, 0.015), (0.018, 0.015), (0.018, 0.018)]),
+            area(vertices=[(0.005, 0.005), (0.006, 0.005), (0.006, 0.006)]),
+        ]
+
+        try:
+            result = await find_intersections([area_of_interest], others)
+        finally:
+            executor.shutdown()
+
+        assert executor.submitted == 2
+        assert result.tolist() == [[True, False, True]]
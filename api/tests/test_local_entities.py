@@ -0,0 +1,151 @@
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+
+from controllers import conflict as conflict_controller
+from controllers import constraint as constraint_controller
+from controllers import operational_intent as operational_intent_controller
+from models.constraint import ConstraintModel
+from models.operational_intent import OperationalIntentModel
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.constraint import ConstraintSchema
+from schemas.operational_intent import OperationalIntentSchema
+from schema_types.operational_intent import OperationalIntentState
+from services.volume_index import VolumeIndex
+from tests.conftest import make_area, make_constraint, make_operational_intent
+
+
+def make_model(entity_id, version=1):
+    operational_intent = make_operational_intent(entity_id, ovn=f"ovn-{version}")
+    operational_intent["reference"]["version"] = version
+    return OperationalIntentModel(operational_intent=OperationalIntentSchema.model_validate(operational_intent))
+
+
+def make_constraint_model(entity_id, version=1):
+    return ConstraintModel(constraint=ConstraintSchema.model_validate(make_constraint(entity_id, version=version)))
+
+
+@pytest.fixture
+def volume_index(monkeypatch):
+    monkeypatch.setattr(VolumeIndex, "_instance", None)
+    return VolumeIndex.get_instance()
+
+
+class TestOperationalIntentController:
+    @pytest.mark.anyio
+    async def test_duplicate_is_a_conflict(self, database, volume_index):
+        await operational_intent_controller.create_operational_intent(make_model(UUID(int=1)))
+
+        with pytest.raises(HTTPException) as error:
+            await operational_intent_controller.create_operational_intent(make_model(UUID(int=1)))
+
+        assert error.value.status_code == 409
+        assert len(volume_index) == 1
+
+    @pytest.mark.anyio
+    async def test_update_replaces_older_versions(self, database, volume_index):
+        await operational_intent_controller.create_operational_intent(make_model(UUID(int=1), version=1))
+
+        updated = make_model(UUID(int=1), version=2).operational_intent
+        await operational_intent_controller.update_operational_intent(UUID(int=1), updated)
+
+        stored = await operational_intent_controller.get_operational_intent(UUID(int=1))
+        assert stored.operational_intent.reference.ovn == "ovn-2"
+
+    @pytest.mark.anyio
+    async def test_update_does_not_roll_back_a_newer_version(self, database, volume_index):
+        await operational_intent_controller.create_operational_intent(make_model(UUID(int=1), version=3))
+
+        with pytest.raises(HTTPException) as error:
+            await operational_intent_controller.update_operational_intent(UUID(int=1), make_model(UUID(int=1), version=2).operational_intent)
+
+        assert error.value.status_code == 409
+        stored = await operational_intent_controller.get_operational_intent(UUID(int=1))
+        assert stored.operational_intent.reference.version == 3
+
+    @pytest.mark.anyio
+    async def test_update_of_a_missing_entity(self, database, volume_index):
+        with pytest.raises(HTTPException) as error:
+            await operational_intent_controller.update_operational_intent(UUID(int=1), make_model(UUID(int=1)).operational_intent)
+
+        assert error.value.status_code == 404
+
+    @pytest.mark.anyio
+    async def test_delete_sets_the_state(self, database, volume_index):
+        await operational_intent_controller.create_operational_intent(make_model(UUID(int=1)))
+
+        await operational_intent_controller.delete_operational_intent(UUID(int=1))
+
+        reference = await operational_intent_controller.get_operational_intent_reference(UUID(int=1))
+        assert reference.state == OperationalIntentState.DELETED
+        assert len(volume_index) == 0
+
+
+class TestConstraintController:
+    @pytest.mark.anyio
+    async def test_duplicate_is_a_conflict(self, database, volume_index):
+        await constraint_controller.create_constraint(make_constraint_model(UUID(int=1)))
+
+        with pytest.raises(HTTPException) as error:
+            await constraint_controller.create_constraint(make_constraint_model(UUID(int=1)))
+
+        assert error.value.status_code == 409
+
+    @pytest.mark.anyio
+    async def test_update_does_not_roll_back_a_newer_version(self, database, volume_index):
+        await constraint_controller.create_constraint(make_constraint_model(UUID(int=1), version=2))
+
+        with pytest.raises(HTTPException) as error:
+            await constraint_controller.update_constraint(UUID(int=1), make_constraint_model(UUID(int=1)).constraint)
+
+        assert error.value.status_code == 409
+
+    @pytest.mark.anyio
+    async def test_delete_of_a_missing_constraint(self, database, volume_index):
+        with pytest.raises(HTTPException) as error:
+            await constraint_controller.delete_constraint(UUID(int=1))
+
+        assert error.value.status_code == 404
+
+
+class TestLocalConflicts:
+    @pytest.mark.anyio
+    async def test_managed_entities_are_read_from_the_database(self, database, volume_index, monkeypatch):
+        local = await operational_intent_controller.create_operational_intent(make_model(UUID(int=1)))
+        remote = make_model(UUID(int=2)).operational_intent
+
+        async def get_operational_intents_in_area(area_of_interest):
+            return [local]
+
+        async def get_constraints_in_area(area_of_interest):
+            raise AssertionError("No constraint of this USS was referenced")
+
+        monkeypatch.setattr(operational_intent_controller, "get_operational_intents_in_area", get_operational_intents_in_area)
+        monkeypatch.setattr(constraint_controller, "get_constraints_in_area", get_constraints_in_area)
+
+        area_of_interest = AreaOfInterestSchema.model_validate(make_area())
+        references = [local.operational_intent.reference, remote.reference]
+
+        candidates = conflict_controller.get_candidates(area_of_interest, references)
+        constraints, operational_intents = await conflict_controller.get_local_conflicts(area_of_interest, [], references)
+
+        assert [reference.id for reference in candidates] == [UUID(int=2)]
+        assert constraints == []
+        assert [entity.entity_id for entity in operational_intents] == [UUID(int=1)]
+
+    @pytest.mark.anyio
+    async def test_geometries_are_stored_and_backfilled(self, database, volume_index):
+        await operational_intent_controller.create_operational_intent(make_model(UUID(int=1)))
+
+        stored = await operational_intent_controller.get_operational_intent(UUID(int=1))
+        assert stored.geometry["type"] == "GeometryCollection"
+
+        await OperationalIntentModel.get_motor_collection().update_one({"_id": stored.id}, {"$unset": {"geometry": ""}})
+
+        index = VolumeIndex()
+        await index.load()
+
+        assert index.owns(UUID(int=1))
+        stored = await operational_intent_controller.get_operational_intent(UUID(int=1))
+        assert stored.geometry is not None
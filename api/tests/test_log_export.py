@@ -0,0 +1,104 @@
+import json
+import os
+
+from datetime import datetime
+
+import pytest
+
+from config.logger import INDEX_SUFFIX, get_shard, serialize_entry
+from tests.conftest import make_logger
+from utils.log_export import LogCursor, export_logs
+
+
+def write_shard(name, shard, timestamps):
+    with open(f"logs/{name}/2030-01-01.{shard}.log", "a", encoding="utf-8") as f:
+        for timestamp in timestamps:
+            f.write(serialize_entry(datetime.fromisoformat(timestamp), timestamp, {}) + "\n")
+
+
+def export_pages(loggers, limit, **kwargs):
+    """
+    Export every page, returning the messages of each page.
+    """
+    pages, cursor = [], None
+
+    while True:
+        lines = [json.loads(line) for line in export_logs(loggers, cursor=cursor, limit=limit, **kwargs)]
+        if lines and "cursor" in lines[-1]:
+            cursor = LogCursor.decode(lines.pop()["cursor"])
+        else:
+            cursor = None
+
+        pages.append([line["message"] for line in lines])
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def logger(log_dir):
+    logger_type = make_logger("export")
+    logger_type.get_instance()
+    return logger_type
+
+
+class TestExportLogs:
+    def test_shards_are_merged_by_timestamp(self, logger):
+        write_shard("export", "a", ["2030-01-01T10:00:01", "2030-01-01T10:00:03"])
+        write_shard("export", "b", ["2030-01-01T10:00:02"])
+
+        lines = [json.loads(line) for line in export_logs([logger])]
+
+        assert [line["message"] for line in lines] == ["2030-01-01T10:00:01", "2030-01-01T10:00:02", "2030-01-01T10:00:03"]
+        assert {line["logger"] for line in lines} == {"export"}
+
+    @pytest.mark.parametrize("limit", [1, 2, 3])
+    def test_out_of_order_shard_is_not_skipped_across_pages(self, logger, limit):
+        # Entries written inline while the queue was full may be out of order
+        write_shard("export", "a", ["2030-01-01T10:00:01", "2030-01-01T10:00:03", "2030-01-01T10:00:02"])
+        write_shard("export", "b", ["2030-01-01T10:00:02.500000", "2030-01-01T10:00:04"])
+
+        pages = export_pages([logger], limit)
+        messages = [message for page in pages for message in page]
+
+        assert all(len(page) <= limit for page in pages)
+        assert sorted(messages) == sorted([
+            "2030-01-01T10:00:01", "2030-01-01T10:00:03", "2030-01-01T10:00:02",
+            "2030-01-01T10:00:02.500000", "2030-01-01T10:00:04",
+        ])
+
+    def test_filtered_pages(self, logger):
+        write_shard("export", "a", [f"2030-01-01T10:00:0{second}" for second in range(6)])
+
+        pages = export_pages([logger], 2, start=datetime(2030, 1, 1, 10, 0, 1), end=datetime(2030, 1, 1, 10, 0, 4))
+
+        assert pages == [
+            ["2030-01-01T10:00:01", "2030-01-01T10:00:02"],
+            ["2030-01-01T10:00:03", "2030-01-01T10:00:04"],
+        ]
+
+    def test_invalid_cursor(self):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            LogCursor.decode("not a cursor")
+
+
+class TestShards:
+    def test_shard_defaults_to_the_process_id(self, monkeypatch):
+        monkeypatch.delenv("LOG_SHARD_ID", raising=False)
+
+        assert get_shard() == str(os.getpid())
+
+    def test_shard_id_is_sanitized(self, monkeypatch):
+        monkeypatch.setenv("LOG_SHARD_ID", "worker/1.a")
+
+        assert get_shard() == "worker-1-a"
+
+    def test_expired_shards_are_removed(self, log_dir):
+        os.makedirs("logs/expired")
+        expired = ["2000-01-01.a.log.zip", "2000-01-01.a.log" + INDEX_SUFFIX, "2000-01-01.b.log"]
+        for name in [*expired, "2030-01-01.a.log"]:
+            open(f"logs/expired/{name}", "w").close()
+
+        make_logger("expired").get_instance()
+
+        assert not set(expired) & set(os.listdir("logs/expired"))
+        assert "2030-01-01.a.log" in os.listdir("logs/expired")
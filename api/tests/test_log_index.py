@@ -0,0 +1,108 @@
+import json
+import os
+
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import jmespath
+import pytest
+
+from config.logger import INDEX_SUFFIX, DailyLogFile, LogWriter, RawJSON, read_log_lines, serialize_entry
+from tests.conftest import make_logger
+from utils.log_index import LogIndexStore, query_logs
+
+
+@pytest.fixture
+def logger(log_dir, monkeypatch):
+    # The writer of the app is closed when the lifespan of a client test ends
+    monkeypatch.setattr(LogWriter, "_instance", None)
+    monkeypatch.setattr(LogIndexStore, "_instance", None)
+
+    logger_type = make_logger("index")
+    logger_type.log("Request Sent", {"url": f"http://uss-a.test/uss/v1/operational_intents/{UUID(int=1)}"})
+    logger_type.log("Response Received", {"aud": "uss-b.test", "body": RawJSON(json.dumps({"id": str(UUID(int=1)), "state": "Accepted"}))})
+    logger_type.log("Response Received", {"aud": "uss-b.test", "body": RawJSON(json.dumps({"id": str(UUID(int=2)), "state": "Ended"}))})
+    LogWriter.get_instance().flush()
+
+    yield logger_type
+
+    LogWriter.get_instance().close()
+
+
+def query(logger, keys, **kwargs):
+    return [json.loads(line) for line in query_logs([logger], keys, **kwargs)]
+
+
+class TestQueryLogs:
+    def test_entries_of_an_id(self, logger):
+        entries = query(logger, [f"id:{UUID(int=1)}"])
+
+        assert [entry["message"] for entry in entries] == ["Request Sent", "Response Received"]
+        assert {entry["logger"] for entry in entries} == {"index"}
+
+    def test_entries_of_a_peer(self, logger):
+        assert len(query(logger, ["peer:uss-a.test"])) == 1
+        assert len(query(logger, ["peer:uss-b.test"])) == 2
+
+    def test_entries_with_every_key(self, logger):
+        entries = query(logger, [f"id:{UUID(int=2)}", "peer:uss-b.test"])
+
+        assert [entry["data"]["body"]["state"] for entry in entries] == ["Ended"]
+
+    def test_entries_matching_the_expression(self, logger):
+        entries = query(logger, ["peer:uss-b.test"], expression=jmespath.compile("data.body.state == 'Accepted'"))
+
+        assert [entry["data"]["body"]["id"] for entry in entries] == [str(UUID(int=1))]
+
+    def test_entries_in_the_time_range(self, logger):
+        now = datetime.now(timezone.utc)
+
+        assert len(query(logger, [], start=now - timedelta(minutes=1), end=now + timedelta(minutes=1))) == 3
+        assert query(logger, [], start=now + timedelta(minutes=1)) == []
+
+    def test_limit(self, logger):
+        assert len(query(logger, [], limit=2)) == 2
+
+    def test_index_is_refreshed_with_new_entries(self, logger):
+        assert query(logger, [f"id:{UUID(int=3)}"]) == []
+
+        logger.log("Request Sent", {"id": str(UUID(int=3))})
+
+        assert len(query(logger, [f"id:{UUID(int=3)}"])) == 1
+
+
+class Message(str):
+    """
+    Formatted entry as given by loguru to a sink, with the time of its record.
+    """
+    def __new__(cls, line, time):
+        message = super().__new__(cls, line + "\n")
+        message.record = {"time": time}
+        return message
+
+
+class TestDailyLogFile:
+    def test_offsets_are_tracked_across_days(self, log_dir):
+        rotations = []
+        sink = DailyLogFile("logs/daily", "a", on_rotation=lambda: rotations.append(True))
+
+        first_day = datetime(2030, 1, 1, 23, 59, tzinfo=timezone.utc)
+        for message in ["first", "second"]:
+            sink(Message(serialize_entry(first_day, message, {}), first_day))
+        sink(Message(serialize_entry(first_day, "third", {}), first_day + timedelta(minutes=2)))
+        sink.close()
+
+        assert sorted(os.listdir("logs/daily")) == [
+            "2030-01-01.a.log" + INDEX_SUFFIX,
+            "2030-01-01.a.log.zip",
+            "2030-01-02.a.log",
+            "2030-01-02.a.log" + INDEX_SUFFIX,
+        ]
+        assert len(rotations) == 2
+
+        offsets = [int(line.split("\t")[0]) for line in open("logs/daily/2030-01-01.a.log" + INDEX_SUFFIX)]
+        lines = list(read_log_lines("logs/daily/2030-01-01.a.log.zip", offsets))
+        assert [json.loads(line)["message"] for line in lines] == ["first", "second"]
+
+        offsets = [int(line.split("\t")[0]) for line in open("logs/daily/2030-01-02.a.log" + INDEX_SUFFIX)]
+        assert offsets == [0]
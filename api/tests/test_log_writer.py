@@ -0,0 +1,101 @@
+import json
+from threading import Timer
+
+import pytest
+
+from config.logger import LogWriter, RawJSON, read_log_file
+from tests.conftest import make_logger
+
+
+def read_entries(logger_type):
+    logger = logger_type.get_instance()
+    return [json.loads(line) for _, _, path in logger.get_files() for line in read_log_file(path)]
+
+
+@pytest.fixture
+def logger(log_dir):
+    return make_logger("writer")
+
+
+def make_writer(monkeypatch, **settings):
+    for name, value in settings.items():
+        monkeypatch.setenv(name, str(value))
+
+    return LogWriter()
+
+
+class TestLogWriter:
+    def test_entries_are_written_by_the_thread(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch)
+
+        writer.submit(logger.get_instance(), "Request Sent", {"body": {"id": 1}})
+        assert writer.flush()
+        writer.close()
+
+        assert [(entry["message"], entry["data"]) for entry in read_entries(logger)] == [("Request Sent", {"body": {"id": 1}})]
+        assert writer.stats()["written"] == 1
+
+    def test_long_bodies_are_truncated(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch, LOG_MAX_BODY_SIZE=10)
+
+        writer.submit(logger.get_instance(), "Response Received", {"body": RawJSON('{"name": "a long name"}'), "status": 200})
+        writer.submit(logger.get_instance(), "Response Received", {"response": {"id": 1}})
+        writer.close()
+
+        truncated, kept = [entry["data"] for entry in read_entries(logger)]
+
+        assert truncated == {"body": {"truncated": True, "size": 23, "head": '{"name": "'}, "status": 200}
+        assert kept == {"response": {"id": 1}}
+        assert writer.stats()["bodies_truncated"] == 1
+
+    def test_bodies_are_omitted_above_the_sampling_threshold(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch, LOG_QUEUE_SIZE=10, LOG_BODY_SAMPLING_THRESHOLD=0)
+
+        writer.submit(logger.get_instance(), "Response Received", {"body": {"id": 1}})
+        writer.close()
+
+        assert [entry["data"] for entry in read_entries(logger)] == [{"body": {"omitted": True}}]
+        assert writer.stats()["bodies_dropped"] == 1
+
+    @pytest.mark.anyio
+    async def test_entries_from_the_event_loop_are_dropped_when_the_queue_is_full(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch, LOG_QUEUE_SIZE=1, LOG_FLUSH_TIMEOUT=60)
+
+        # Without its thread, the writer leaves the first entry in the queue
+        writer.close()
+        writer.submit(logger.get_instance(), "queued", {})
+        writer.submit(logger.get_instance(), "dropped", {})
+
+        assert read_entries(logger) == []
+        assert writer.stats()["dropped"] == 1
+
+    def test_other_threads_wait_for_room_in_the_queue(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch, LOG_QUEUE_SIZE=1, LOG_FLUSH_TIMEOUT=5)
+
+        writer.close()
+        writer.submit(logger.get_instance(), "first", {})
+
+        Timer(0.05, writer._queue.get_nowait).start()
+        writer.submit(logger.get_instance(), "second", {})
+
+        assert writer.stats()["dropped"] == 0
+        assert writer._queue.get_nowait()[2] == "second"
+
+    def test_other_threads_drop_entries_after_the_timeout(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch, LOG_QUEUE_SIZE=1, LOG_FLUSH_TIMEOUT=0.05)
+
+        writer.close()
+        writer.submit(logger.get_instance(), "queued", {})
+        writer.submit(logger.get_instance(), "dropped", {})
+
+        assert writer.stats()["dropped"] == 1
+
+    def test_failing_entry_does_not_stop_the_writer(self, logger, monkeypatch):
+        writer = make_writer(monkeypatch)
+
+        writer.submit(logger.get_instance(), "failing", {"value": object()})
+        writer.submit(logger.get_instance(), "written", {})
+        writer.close()
+
+        assert [entry["message"] for entry in read_entries(logger)] == ["written"]
+        assert writer.stats()["errors"] == 1
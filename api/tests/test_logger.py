@@ -0,0 +1,48 @@
+import json
+
+from datetime import datetime
+
+import pytest
+
+from config.logger import Lazy, RawJSON, get_timestamp, serialize_entry
+
+TIMESTAMP = datetime(2030, 1, 1, 10)
+
+
+def serialize(data):
+    line = serialize_entry(TIMESTAMP, "Response Received", data)
+    assert "\n" not in line
+    return line, json.loads(line)
+
+
+class TestSerializeEntry:
+    def test_valid_raw_json_is_spliced(self):
+        line, entry = serialize({"body": RawJSON(b'{\n  "id": 1,\n  "tags": ["a"]\n}')})
+
+        assert entry["data"]["body"] == {"id": 1, "tags": ["a"]}
+
+    @pytest.mark.parametrize("text", [
+        '{"id": 1}", "timestamp": "forged", "x": {"a": 1}',
+        '{"id": 1} {"id": 2}',
+        '[NaN]',
+        '{"id": }',
+        'Service Unavailable',
+    ], ids=["forged keys", "two documents", "nan", "invalid", "plain text"])
+    def test_invalid_raw_json_is_a_string(self, text):
+        line, entry = serialize({"body": RawJSON(text)})
+
+        assert entry["data"]["body"] == text
+        assert entry["timestamp"] == get_timestamp(line)
+
+    def test_raw_json_in_lazy_values_and_lists(self):
+        _, entry = serialize({
+            "headers": Lazy(dict, {"body": RawJSON("[1, 2]")}),
+            "bodies": [RawJSON('{"a": 1}'), RawJSON("not json")],
+        })
+
+        assert entry["data"] == {"headers": {"body": [1, 2]}, "bodies": [{"a": 1}, "not json"]}
+
+    def test_placeholder_like_strings_are_kept(self):
+        _, entry = serialize({"text": "\x00raw0\x00", "body": RawJSON('{"a": 1}')})
+
+        assert entry["data"] == {"text": "\x00raw0\x00", "body": {"a": 1}}
@@ -0,0 +1,67 @@
+import json
+
+from datetime import datetime
+
+import pytest
+
+from config.logger import Lazy, MessageCapture, serialize_entry
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    monkeypatch.setenv("LOG_MESSAGE_VERBOSITY", MessageCapture.HEADERS)
+    monkeypatch.setenv("LOG_MESSAGE_ENDPOINT_VERBOSITY", json.dumps({
+        "/dss/v1/": MessageCapture.METADATA,
+        "/dss/v1/operational_intent_references/": MessageCapture.FULL,
+    }))
+    monkeypatch.setenv("LOG_MAX_CAPTURED_BODY_SIZE", "8")
+    return MessageCapture()
+
+
+def serialize(data):
+    return json.loads(serialize_entry(datetime(2030, 1, 1), "Response Received", data))["data"]
+
+
+class TestMessageCapture:
+    @pytest.mark.parametrize("url, verbosity", [
+        ("http://dss.test/dss/v1/operational_intent_references/query", MessageCapture.FULL),
+        ("http://dss.test/dss/v1/constraint_references/query", MessageCapture.METADATA),
+        ("http://uss.test/uss/v1/operational_intents/1", MessageCapture.HEADERS),
+    ])
+    def test_longest_prefix_sets_the_verbosity(self, capture, url, verbosity):
+        assert capture.get_verbosity(url) == verbosity
+
+    def test_request_body_is_only_kept_in_full(self, capture):
+        args = ("PUT", "http://dss.test", "/dss/v1/", "dss", ["scope"], {"id": 1})
+
+        assert "body" not in capture.request(MessageCapture.HEADERS, *args)
+        assert capture.request(MessageCapture.FULL, *args)["body"] == {"id": 1}
+
+    @pytest.mark.parametrize("verbosity, fields", [
+        (MessageCapture.METADATA, {"status_code", "url"}),
+        (MessageCapture.HEADERS, {"status_code", "url", "headers"}),
+        (MessageCapture.FULL, {"status_code", "url", "headers", "body"}),
+    ])
+    def test_response_fields_by_verbosity(self, capture, verbosity, fields):
+        data = capture.response(verbosity, "/dss/v1/", 200, {"content-type": "application/json"}, b'{"a": 1}')
+
+        assert set(data) == fields
+
+    def test_headers_and_body_are_decoded_when_written(self, capture):
+        data = capture.response(MessageCapture.FULL, "/dss/v1/", 200, {"content-type": "application/json"}, b'{"a": 1}')
+
+        assert isinstance(data["headers"], Lazy)
+        assert serialize(data) == {
+            "status_code": 200,
+            "url": "/dss/v1/",
+            "headers": {"content-type": "application/json"},
+            "body": {"a": 1},
+        }
+
+    def test_long_bodies_are_cut(self, capture):
+        body = capture.capture_body(b'{"name": "a long name"}')
+
+        assert serialize({"body": body}) == {"body": {"truncated": True, "size": 23, "head": '{"name":'}}
+
+    def test_empty_body(self, capture):
+        assert capture.capture_body(b"") is None
@@ -0,0 +1,107 @@
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+from pydantic import HttpUrl
+
+from config.logger import get_shard
+from config.metrics import PEER_REQUEST_DURATION, MetricsRegistry, track
+from schemas.operational_intent import OperationalIntentGetResponse
+from services.uss_service import USSService
+from tests.conftest import make_operational_intent
+
+
+def peer_requests(aud, operation):
+    values = PEER_REQUEST_DURATION._values.get((aud, operation))
+    return values[-1] if values else 0
+
+
+class TestMetricsRegistry:
+    @pytest.mark.anyio
+    async def test_every_series_has_the_shard(self, monkeypatch):
+        monkeypatch.setenv("LOG_SHARD_ID", "worker-1")
+        registry = MetricsRegistry()
+
+        registry.counter("requests_total", "Requests.", ("route",)).inc("/a")
+        registry.histogram("duration_seconds", "Duration.", buckets=(1.0,)).observe(0.5)
+        registry.gauge("entities", "Entities.", lambda: 3)
+
+        lines = (await registry.render()).splitlines()
+
+        assert 'requests_total{shard="worker-1",route="/a"} 1.0' in lines
+        assert 'duration_seconds_bucket{shard="worker-1",le="1.0"} 1' in lines
+        assert 'duration_seconds_count{shard="worker-1"} 1' in lines
+        assert 'entities{shard="worker-1"} 3.0' in lines
+
+    @pytest.mark.anyio
+    async def test_counter_callback_is_a_counter(self):
+        registry = MetricsRegistry()
+        registry.counter_callback("lookups_total", "Lookups.", lambda: {("hit",): 2}, ("result",))
+
+        lines = (await registry.render()).splitlines()
+
+        assert "# TYPE lookups_total counter" in lines
+        assert f'lookups_total{{shard="{get_shard()}",result="hit"}} 2.0' in lines
+
+    @pytest.mark.anyio
+    async def test_track_with_a_name(self):
+        registry = MetricsRegistry()
+        duration = registry.histogram("duration_seconds", "Duration.", ("operation",))
+        errors = registry.counter("errors_total", "Errors.", ("operation", "status"))
+
+        @track(duration, errors, name="operation")
+        async def _private():
+            raise ValueError()
+
+        with pytest.raises(ValueError):
+            await _private()
+
+        assert list(duration._values) == [("operation",)]
+        assert list(errors._values) == [("operation", "ValueError")]
+
+
+class TestPeerRequestDuration:
+    @pytest.mark.anyio
+    async def test_cache_hits_are_not_timed(self, monkeypatch):
+        entity_id = UUID(int=25)
+        service = USSService(HttpUrl("http://uss-metrics.test"))
+
+        async def request_model(*args, **kwargs):
+            return OperationalIntentGetResponse.model_validate({"operational_intent": make_operational_intent(entity_id, ovn="ovn")})
+
+        monkeypatch.setattr(service._client, "request_model", request_model)
+
+        await service.get_operational_intent(entity_id)
+        await service.get_operational_intent(entity_id, version=1)
+        await service.close()
+
+        assert peer_requests("uss-metrics.test", "get_operational_intent") == 1
+
+
+class TestMetricsRoute:
+    @pytest.mark.anyio
+    async def test_open_without_a_token(self, client_test: AsyncClient, monkeypatch):
+        monkeypatch.delenv("METRICS_TOKEN", raising=False)
+
+        response = await client_test.get("/metrics")
+
+        assert response.status_code == 200
+        assert "uss_cache_lookups_total" in response.text
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("authorization", [None, "Bearer wrong"])
+    async def test_token_is_required_when_set(self, client_test: AsyncClient, monkeypatch, authorization):
+        monkeypatch.setenv("METRICS_TOKEN", "secret")
+
+        headers = {"Authorization": authorization} if authorization else {}
+        response = await client_test.get("/metrics", headers=headers)
+
+        assert response.status_code == 401
+
+    @pytest.mark.anyio
+    async def test_token_is_accepted(self, client_test: AsyncClient, monkeypatch):
+        monkeypatch.setenv("METRICS_TOKEN", "secret")
+
+        response = await client_test.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+        assert response.status_code == 200
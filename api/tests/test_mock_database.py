@@ -1,13 +1,10 @@
-import asyncio
-from beanie import init_beanie
-from fastapi.testclient import TestClient
+from uuid import uuid4
 from httpx import AsyncClient
 import pytest
 
-from tests.conftest import mock_no_authentication
+from tests.conftest import make_operational_intent, mock_no_authentication
 from models.operational_intent import OperationalIntentModel
-from models.constraint import ConstraintModel
-from models.subscription import SubscriptionModel
+from schemas.operational_intent import OperationalIntentSchema
 
 
 class TestMockAuthentication:
@@ -16,38 +13,20 @@ class TestMockAuthentication:
         mock_no_authentication()
 
     @pytest.mark.anyio
-    async def test_mock_databases(self, client_test: AsyncClient):
-        # generate data
-        await Admin(
-            fullname="admin", email="admin@admin.com", password="admin"
-        ).create()
+    async def test_mock_database(self, client_test: AsyncClient):
+        entity_id = uuid4()
 
-        await Student(
-            fullname="student",
-            email="student@student.com",
-            course_of_study="computer science",
-            year=2021,
-            gpa=4.0,
+        await OperationalIntentModel(
+            operational_intent=OperationalIntentSchema.model_validate(make_operational_intent(entity_id)),
         ).create()
 
-        response = await client_test.get("student")
+        response = await client_test.get(f"/uss/v1/operational_intents/{entity_id}")
 
         assert response.status_code == 200
+        assert response.json()["operational_intent"]["reference"]["id"] == str(entity_id)
 
     @pytest.mark.anyio
-    async def test_mock_database(self, client_test: AsyncClient):
-        await Admin(
-            fullname="admin", email="admin@admin.com", password="admin"
-        ).create()
+    async def test_mock_database_not_found(self, client_test: AsyncClient):
+        response = await client_test.get(f"/uss/v1/operational_intents/{uuid4()}")
 
-        await Student(
-            fullname="student",
-            email="student@student.com",
-            course_of_study="computer science",
-            year=2021,
-            gpa=4.0,
-        ).create()
-
-        response = await client_test.get("student")
-
-        assert response.status_code == 200
+        assert response.status_code == 404
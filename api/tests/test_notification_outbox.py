@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+import pytest
+
+from fastapi import HTTPException
+
+from controllers import notification_outbox as notification_outbox_controller
+from controllers import operational_intent as operational_intent_controller
+from models.notification_outbox import NotificationOutboxModel
+from models.operational_intent import OperationalIntentModel
+from schemas.operational_intent import OperationalIntentSchema
+from schema_types.notification import NotificationEntityType, NotificationStatus, PendingNotificationSchema
+from schema_types.subscription import SubscriberSchema
+from services.notification_outbox_worker import NotificationOutboxWorker
+from services.uss_service import USSService
+from services.volume_index import VolumeIndex
+from tests.conftest import make_operational_intent
+
+
+def make_subscriber(notification_index=1):
+    return SubscriberSchema(
+        uss_base_url="http://subscriber.test",
+        subscriptions=[{"subscription_id": str(uuid4()), "notification_index": notification_index}],
+    )
+
+
+async def enqueue(entity_id, payload=None, notification_index=1):
+    await notification_outbox_controller.enqueue_notification(
+        entity_type=NotificationEntityType.OPERATIONAL_INTENT,
+        entity_id=entity_id,
+        subscriber=make_subscriber(notification_index),
+        payload=payload,
+    )
+
+
+@pytest.fixture
+async def partial_indexes(database):
+    """
+    mongomock drops the partial filter of the indexes created at once, so
+    the partial indexes of the outbox are created again one by one.
+    """
+    collection = NotificationOutboxModel.get_motor_collection()
+
+    for index in NotificationOutboxModel.Settings.indexes:
+        document = index.document
+        if "partialFilterExpression" in document:
+            await collection.drop_index(document["name"])
+            await collection.create_index(
+                list(document["key"].items()),
+                unique=True,
+                partialFilterExpression=document["partialFilterExpression"],
+            )
+
+
+class TestNotificationOutbox:
+    @pytest.mark.anyio
+    async def test_enqueue_replaces_pending_notification(self, database):
+        entity_id = uuid4()
+
+        await enqueue(entity_id, {"version": 1}, notification_index=1)
+        await enqueue(entity_id, {"version": 2}, notification_index=2)
+
+        notifications = await NotificationOutboxModel.find_all().to_list()
+        assert len(notifications) == 1
+        assert notifications[0].payload == {"version": 2}
+        assert notifications[0].subscriptions[0].notification_index == 2
+
+    @pytest.mark.anyio
+    async def test_claim_leases_notifications(self, database):
+        await enqueue(uuid4())
+        await enqueue(uuid4())
+
+        claimed = await notification_outbox_controller.claim_due_notifications(limit=10, lease=60)
+        assert len(claimed) == 2
+        assert all(notification.status == NotificationStatus.IN_FLIGHT for notification in claimed)
+
+        assert await notification_outbox_controller.claim_due_notifications(limit=10, lease=60) == []
+
+    @pytest.mark.anyio
+    async def test_expired_lease_is_claimed_again(self, database):
+        await enqueue(uuid4())
+
+        await notification_outbox_controller.claim_due_notifications(limit=10, lease=-1)
+
+        assert len(await notification_outbox_controller.claim_due_notifications(limit=10, lease=60)) == 1
+
+    @pytest.mark.anyio
+    async def test_reschedule_backs_off_then_fails(self, database):
+        await enqueue(uuid4())
+        notification, = await notification_outbox_controller.claim_due_notifications(limit=1, lease=60)
+
+        await notification_outbox_controller.reschedule_notification(
+            notification, error="down", max_attempts=2, backoff_base=10, backoff_max=10, failed_retention=60,
+        )
+        notification = await NotificationOutboxModel.get(notification.id)
+        assert notification.status == NotificationStatus.PENDING
+        assert notification.attempts == 1
+        assert notification.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=4)
+
+        await notification_outbox_controller.reschedule_notification(
+            notification, error="down", max_attempts=2, backoff_base=10, backoff_max=10, failed_retention=60,
+        )
+        notification = await NotificationOutboxModel.get(notification.id)
+        assert notification.status == NotificationStatus.FAILED
+        assert notification.last_error == "down"
+        assert notification.expires_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=50)
+
+    @pytest.mark.anyio
+    async def test_newer_notification_waits_for_the_one_in_flight(self, partial_indexes):
+        entity_id = uuid4()
+
+        await enqueue(entity_id, {"version": 1})
+        first, = await notification_outbox_controller.claim_due_notifications(limit=10, lease=60)
+
+        await enqueue(entity_id, {"version": 2})
+        await enqueue(uuid4())
+
+        claimed = await notification_outbox_controller.claim_due_notifications(limit=10, lease=60)
+        assert len(claimed) == 1
+        assert claimed[0].entity_id != entity_id
+
+        await notification_outbox_controller.complete_notification(first)
+
+        second, = await notification_outbox_controller.claim_due_notifications(limit=10, lease=60)
+        assert second.payload == {"version": 2}
+
+    @pytest.mark.anyio
+    async def test_interrupted_notifications_are_enqueued_on_startup(self, database, monkeypatch):
+        monkeypatch.setattr(VolumeIndex, "_instance", None)
+
+        operational_intent = OperationalIntentSchema.model_validate(make_operational_intent(uuid4()))
+        await operational_intent_controller.create_operational_intent(OperationalIntentModel(
+            operational_intent=operational_intent,
+            pending_notification=PendingNotificationSchema(subscribers=[make_subscriber()]),
+        ))
+
+        await notification_outbox_controller.enqueue_interrupted_notifications()
+
+        notification, = await NotificationOutboxModel.find_all().to_list()
+        assert notification.entity_id == operational_intent.reference.id
+        assert notification.payload["reference"]["id"] == str(operational_intent.reference.id)
+
+        stored = await operational_intent_controller.get_operational_intent(operational_intent.reference.id)
+        assert stored.pending_notification is None
+
+    @pytest.mark.anyio
+    async def test_pending_notification_replaced_meanwhile_is_kept(self, database, monkeypatch):
+        monkeypatch.setattr(VolumeIndex, "_instance", None)
+
+        operational_intent = OperationalIntentSchema.model_validate(make_operational_intent(uuid4()))
+        model = await operational_intent_controller.create_operational_intent(OperationalIntentModel(
+            operational_intent=operational_intent,
+            pending_notification=PendingNotificationSchema(subscribers=[make_subscriber()]),
+        ))
+
+        newer = PendingNotificationSchema(subscribers=[make_subscriber(notification_index=2)])
+        await operational_intent_controller.update_operational_intent(
+            operational_intent.reference.id, operational_intent, pending_notification=newer,
+        )
+
+        await notification_outbox_controller.enqueue_pending_operational_intent_notifications(model)
+
+        stored = await operational_intent_controller.get_operational_intent(operational_intent.reference.id)
+        assert stored.pending_notification.id == newer.id
+
+
+class TestNotificationOutboxWorker:
+    @pytest.mark.anyio
+    async def test_delivered_notifications_are_removed(self, database, monkeypatch):
+        delivered = []
+
+        async def notify_operational_intent(self, subscriptions, operational_intent_id, operational_intent):
+            delivered.append(operational_intent_id)
+
+        monkeypatch.setattr(USSService, "notify_operational_intent", notify_operational_intent)
+
+        entity_id = uuid4()
+        await enqueue(entity_id)
+
+        assert await NotificationOutboxWorker()._deliver_batch() == 1
+        assert delivered == [entity_id]
+        assert await NotificationOutboxModel.find_all().count() == 0
+
+    @pytest.mark.anyio
+    async def test_failed_notifications_are_rescheduled(self, database, monkeypatch):
+        async def notify_operational_intent(self, subscriptions, operational_intent_id, operational_intent):
+            raise HTTPException(status_code=503, detail="unavailable")
+
+        monkeypatch.setattr(USSService, "notify_operational_intent", notify_operational_intent)
+
+        await enqueue(uuid4())
+
+        assert await NotificationOutboxWorker()._deliver_batch() == 1
+
+        notification, = await NotificationOutboxModel.find_all().to_list()
+        assert notification.status == NotificationStatus.PENDING
+        assert notification.attempts == 1
+        assert notification.last_error == "unavailable"
@@ -0,0 +1,82 @@
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+
+from schemas.operational_intent import OperationalIntentSchema
+from services.remote_entity_cache import RemoteEntityCache
+from services.volume_index import VolumeIndex
+from tests.conftest import make_operational_intent, mock_no_authentication
+
+
+def make_entity(entity_id, version=1):
+    operational_intent = make_operational_intent(entity_id, ovn=f"ovn-{version}")
+    operational_intent["reference"]["version"] = version
+    return OperationalIntentSchema.model_validate(operational_intent)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(VolumeIndex, "_instance", None)
+    monkeypatch.setattr(RemoteEntityCache, "_instance", None)
+    monkeypatch.setenv("REMOTE_ENTITY_CACHE_SIZE", "2")
+    return RemoteEntityCache.get_instance()
+
+
+class TestRemoteEntityCache:
+    def test_cached_entity_is_used_up_to_its_version(self, cache):
+        cache.put(make_entity(UUID(int=1), version=2))
+
+        assert cache.get_operational_intent(UUID(int=1), 2).reference.ovn == "ovn-2"
+        assert cache.get_operational_intent(UUID(int=1), 3) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_older_version_does_not_replace_the_cached_one(self, cache):
+        cache.put(make_entity(UUID(int=1), version=2))
+        cache.put(make_entity(UUID(int=1), version=1))
+
+        assert cache.get_operational_intent(UUID(int=1), 1).reference.version == 2
+
+    def test_least_recently_used_entity_is_evicted(self, cache):
+        cache.put(make_entity(UUID(int=1)))
+        cache.put(make_entity(UUID(int=2)))
+        cache.get_operational_intent(UUID(int=1), 1)
+        cache.put(make_entity(UUID(int=3)))
+
+        assert cache.get_operational_intent(UUID(int=2), 1) is None
+        assert cache.get_operational_intent(UUID(int=1), 1) is not None
+        assert len(VolumeIndex.get_instance()) == 2
+
+    def test_constraint_lookup_does_not_return_operational_intents(self, cache):
+        cache.put(make_entity(UUID(int=1)))
+
+        assert cache.get_constraint(UUID(int=1), 1) is None
+
+
+class TestNotifications:
+    @classmethod
+    def setup_class(cls):
+        mock_no_authentication()
+
+    @pytest.mark.anyio
+    async def test_notifications_update_the_cache(self, cache, client_test: AsyncClient):
+        entity_id = UUID(int=1)
+        subscriptions = [{"subscription_id": str(UUID(int=0)), "notification_index": 1}]
+
+        response = await client_test.post("/uss/v1/operational_intents/", json={
+            "operational_intent_id": str(entity_id),
+            "operational_intent": make_operational_intent(entity_id, ovn="notified"),
+            "subscriptions": subscriptions,
+        })
+
+        assert response.status_code == 204
+        assert cache.get_operational_intent(entity_id, 1).reference.ovn == "notified"
+
+        response = await client_test.post("/uss/v1/operational_intents/", json={
+            "operational_intent_id": str(entity_id),
+            "operational_intent": None,
+            "subscriptions": subscriptions,
+        })
+
+        assert response.status_code == 204
+        assert cache.get_operational_intent(entity_id, 1) is None
@@ -0,0 +1,35 @@
+import json
+
+from uuid import UUID
+
+from config.logger import _log_response
+from schemas.operational_intent import OperationalIntentGetResponse
+from tests.conftest import make_operational_intent
+from utils.response import ModelResponse
+
+
+def make_response():
+    return OperationalIntentGetResponse.model_validate({"operational_intent": make_operational_intent(UUID(int=1), ovn="ovn")})
+
+
+class TestModelResponse:
+    def test_model_is_rendered_as_its_json_dump(self):
+        model = make_response()
+        response = ModelResponse(model, status_code=201)
+
+        assert response.status_code == 201
+        assert response.headers["content-type"] == "application/json"
+        assert json.loads(response.body) == model.model_dump(mode="json")
+
+    def test_other_content_is_rendered(self):
+        response = ModelResponse({"ids": [UUID(int=1)], "models": [make_response()]})
+
+        assert json.loads(response.body) == {
+            "ids": [str(UUID(int=1))],
+            "models": [make_response().model_dump(mode="json")],
+        }
+
+    def test_model_is_kept_for_the_route_logs(self):
+        model = make_response()
+
+        assert _log_response(ModelResponse(model)) is model
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+
+from pydantic import HttpUrl
+
+from services.uss_service import USSServiceRegistry
+
+
+def make_registry(monkeypatch, max_clients):
+    monkeypatch.setenv("USS_MAX_CLIENTS", str(max_clients))
+    return USSServiceRegistry()
+
+
+class TestUSSServiceRegistry:
+    @pytest.mark.anyio
+    async def test_lease_reuses_client(self, monkeypatch):
+        registry = make_registry(monkeypatch, 2)
+
+        async with registry.lease(HttpUrl("http://a.test")) as first:
+            pass
+        async with registry.lease(HttpUrl("http://a.test")) as second:
+            pass
+
+        assert first is second
+        await registry.close()
+
+    @pytest.mark.anyio
+    async def test_eviction_waits_for_leases(self, monkeypatch):
+        registry = make_registry(monkeypatch, 1)
+
+        async with registry.lease(HttpUrl("http://a.test")) as leased:
+            # Fan-out to more peers than the registry holds
+            async with registry.lease(HttpUrl("http://b.test")):
+                await asyncio.sleep(0)
+
+            await asyncio.sleep(0)
+            assert not leased._client.is_closed
+
+        await asyncio.sleep(0)
+        assert leased._client.is_closed
+
+        await registry.close()
+
+    @pytest.mark.anyio
+    async def test_unleased_client_closed_on_eviction(self, monkeypatch):
+        registry = make_registry(monkeypatch, 1)
+
+        async with registry.lease(HttpUrl("http://a.test")) as evicted:
+            pass
+        async with registry.lease(HttpUrl("http://b.test")):
+            await asyncio.sleep(0)
+            assert evicted._client.is_closed
+
+        await registry.close()
@@ -0,0 +1,98 @@
+import math
+import numpy as np
+import pytest
+
+from pydantic import TypeAdapter, ValidationError
+
+from schemas.area_of_interest import OperatorAreaOfInterestSchema
+from schemas.volume import EARTH_RADIUS, MAX_POLYGON_VERTICES, Volume3DSchema, is_simple_polygon
+from tests.conftest import make_area
+
+
+class TestVolume3DSchema:
+    def test_altitudes_are_converted_to_metres(self):
+        volume = Volume3DSchema.model_validate({
+            **make_area()["volume"],
+            "altitude_lower": {"value": 100, "reference": "W84", "units": "FT"},
+        })
+
+        assert volume.altitude_range == (pytest.approx(30.48), 120)
+
+    def test_missing_altitudes_are_unbounded(self):
+        volume = Volume3DSchema.model_validate({"outline_polygon": make_area()["volume"]["outline_polygon"]})
+
+        assert volume.altitude_range == (-math.inf, math.inf)
+
+    def test_closed_polygon_ring_is_opened(self):
+        vertices = [{"lng": lng, "lat": lat} for lng, lat in [(0, 0), (1, 0), (1, 1), (0, 0)]]
+        volume = Volume3DSchema.model_validate({"outline_polygon": {"vertices": vertices}})
+
+        assert len(volume.vertices) == 3
+        assert volume.bounding_box == (0, 0, 1, 1)
+
+    def test_unknown_units_are_a_validation_error(self):
+        with pytest.raises(ValidationError, match="expected one of: M, FT"):
+            Volume3DSchema.model_validate({
+                **make_area()["volume"],
+                "altitude_upper": {"value": 100, "reference": "W84", "units": "KM"},
+            })
+
+    @pytest.mark.parametrize("vertices", [
+        [(0, 0), (1, 0)],
+        [(0, 0), (1, 0), (2, 0)],
+        [(0, 0), (1, 0), (1, 0), (0, 1)],
+        [(0, 0), (1, 1), (1, 0), (0, 1)],
+        [(0, 0), (2, 0), (2, 1), (1, 0), (0, 1)],
+    ], ids=["two vertices", "collinear", "repeated vertex", "bow tie", "touching edges"])
+    def test_invalid_operator_polygons_are_a_validation_error(self, vertices):
+        with pytest.raises(ValidationError, match="outline_polygon"):
+            TypeAdapter(OperatorAreaOfInterestSchema).validate_python(make_area(vertices=vertices))
+
+    def test_peer_polygons_are_not_checked_for_simplicity(self):
+        vertices = [(0, 0), (1, 1), (1, 0), (0, 1)]
+        volume = Volume3DSchema.model_validate(make_area(vertices=vertices)["volume"])
+
+        assert len(volume.vertices) == 4
+
+    def test_concave_polygon_is_valid(self):
+        vertices = [(0, 0), (2, 0), (2, 1), (1, 1), (1, 2), (0, 2)]
+        area = TypeAdapter(OperatorAreaOfInterestSchema).validate_python(make_area(vertices=vertices))
+
+        assert len(area.volume.vertices) == 6
+
+    def test_too_many_vertices_are_a_validation_error(self):
+        vertices = [(math.cos(angle), math.sin(angle)) for angle in np.linspace(0, 2 * math.pi, MAX_POLYGON_VERTICES + 2, endpoint=False)]
+
+        with pytest.raises(ValidationError, match="vertices"):
+            Volume3DSchema.model_validate(make_area(vertices=vertices)["volume"])
+
+    def test_large_simple_polygon_is_checked_in_chunks(self):
+        angles = np.linspace(0, 2 * math.pi, MAX_POLYGON_VERTICES, endpoint=False)
+        radii = np.where(np.arange(MAX_POLYGON_VERTICES) % 2, 1.0, 0.5)
+        vertices = np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])
+
+        assert is_simple_polygon(vertices)
+
+        vertices[[10, 500]] = vertices[[500, 10]]
+
+        assert not is_simple_polygon(vertices)
+
+    def test_polygon_geojson_ring_is_closed(self):
+        volume = Volume3DSchema.model_validate(make_area()["volume"])
+
+        assert volume.to_geojson() == {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        }
+
+    def test_circle_geojson_contains_the_circle(self):
+        volume = Volume3DSchema.model_validate(make_area(circle=((0, 0), 1000))["volume"])
+        ring = np.array(volume.to_geojson()["coordinates"][0])
+
+        # Edge midpoints of the circumscribed polygon lie on the circle
+        midpoints = (ring[:-1] + ring[1:]) / 2
+        assert np.allclose(np.hypot(*midpoints.T) * math.pi / 180 * EARTH_RADIUS, 1000, rtol=1e-3)
+
+    def test_exactly_one_outline(self):
+        with pytest.raises(ValidationError):
+            Volume3DSchema.model_validate({})
@@ -0,0 +1,78 @@
+from uuid import UUID
+
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.constraint import ConstraintSchema
+from schemas.operational_intent import OperationalIntentSchema
+from services.volume_index import VolumeIndex
+from tests.conftest import make_area, make_constraint, make_operational_intent
+
+SQUARE = make_area(vertices=[(0, 0), (0.01, 0), (0.01, 0.01), (0, 0.01)])
+FAR_SQUARE = make_area(vertices=[(1, 1), (1.01, 1), (1.01, 1.01), (1, 1.01)])
+
+
+def make_index(monkeypatch, capacity=2):
+    monkeypatch.setenv("VOLUME_INDEX_INITIAL_CAPACITY", str(capacity))
+    return VolumeIndex()
+
+
+def operational_intent(entity_id, areas, version=1):
+    value = make_operational_intent(entity_id, areas=areas)
+    value["reference"]["version"] = version
+    return OperationalIntentSchema.model_validate(value)
+
+
+def constraint(entity_id, areas):
+    return ConstraintSchema.model_validate(make_constraint(entity_id, areas=areas))
+
+
+def query_area(area):
+    return AreaOfInterestSchema.model_validate(area)
+
+
+class TestVolumeIndex:
+    def test_query_by_bounds(self, monkeypatch):
+        index = make_index(monkeypatch)
+        index.put(operational_intent(UUID(int=1), [SQUARE]))
+        index.put(operational_intent(UUID(int=2), [FAR_SQUARE]))
+
+        assert index.query(query_area(SQUARE)) == {UUID(int=1)}
+        assert index.query(query_area(make_area(vertices=[(0.005, 0.005), (0.02, 0.005), (0.02, 0.02)]))) == {UUID(int=1)}
+        assert index.query(query_area(make_area(altitude=(500, 600)))) == set()
+
+    def test_query_by_kind(self, monkeypatch):
+        index = make_index(monkeypatch)
+        index.put(operational_intent(UUID(int=1), [SQUARE]))
+        index.put(constraint(UUID(int=2), [SQUARE]))
+
+        assert index.query_operational_intents(query_area(SQUARE)) == {UUID(int=1)}
+        assert index.query_constraints(query_area(SQUARE)) == {UUID(int=2)}
+
+    def test_index_grows_and_reuses_slots(self, monkeypatch):
+        index = make_index(monkeypatch, capacity=1)
+
+        for i in range(5):
+            index.put(operational_intent(UUID(int=i), [SQUARE, FAR_SQUARE]))
+
+        assert len(index) == 5
+        assert index.query(query_area(FAR_SQUARE)) == {UUID(int=i) for i in range(5)}
+
+        index.remove(UUID(int=0))
+        capacity = len(index._active)
+        index.put(operational_intent(UUID(int=5), [SQUARE, FAR_SQUARE]))
+
+        assert len(index._active) == capacity
+        assert UUID(int=0) not in index.query(query_area(SQUARE))
+
+    def test_versions_and_owned_entities(self, monkeypatch):
+        index = make_index(monkeypatch)
+        index.put(operational_intent(UUID(int=1), [SQUARE], version=2), owned=True)
+
+        # Cached remote copies do not replace the entities managed by this USS
+        index.put(operational_intent(UUID(int=1), [FAR_SQUARE], version=3))
+        assert index.query(query_area(SQUARE)) == {UUID(int=1)}
+
+        assert index.contains(UUID(int=1), 2)
+        assert not index.contains(UUID(int=1), 3)
+
+        index.remove(UUID(int=1), owned=False)
+        assert len(index) == 1
@@ -0,0 +1,226 @@
+import asyncio
+
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from config.config import Settings
+from schemas.fan_out import FanOutResult
+from schema_types.fan_out import FanOutStatus
+
+T = TypeVar("T")
+
+# (key, peer, call) describing one call of a fan-out
+FanOutCall = Tuple[str, str, Callable[[], Awaitable[Any]]]
+
+async def gather_bounded(calls: Iterable[Callable[[], Awaitable[T]]], limit: int) -> List[T]:
+    """
+    Run the calls concurrently, at most limit at a time, and return their
+    results in the same order. The first exception raised is propagated.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(run(call) for call in calls))
+
+async def merge_iterators(*iterators: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    Merge async iterators, yielding each item as soon as any of them produces it.
+    """
+    pending: Dict[asyncio.Future, AsyncIterator[T]] = {
+        asyncio.ensure_future(iterator.__anext__()): iterator
+        for iterator in iterators
+    }
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                iterator = pending.pop(future)
+                try:
+                    item = future.result()
+                except StopAsyncIteration:
+                    continue
+
+                pending[asyncio.ensure_future(iterator.__anext__())] = iterator
+                yield item
+    finally:
+        for future in pending:
+            future.cancel()
+
+class FanOut:
+    """
+    Run calls to several USSs concurrently, bounded by a global and a per-peer
+    concurrency cap, with a timeout on every call.
+
+    The outcome of every call is collected, so a failing or slow peer does not
+    prevent the calls to the other peers from completing. A call waits for a
+    slot of its peer before taking a global slot, so the calls queued behind a
+    slow peer do not hold the global slots. The slots of a peer are dropped
+    once it has no call running or waiting.
+    """
+
+    def __init__(self, max_concurrency: int, max_concurrency_per_peer: int, timeout: float):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency_per_peer = max_concurrency_per_peer
+        self._peer_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Calls running or waiting for a slot of each peer
+        self._peer_calls: Dict[str, int] = {}
+        self._timeout = timeout
+
+    async def run(self, calls: Iterable[FanOutCall], budget: Optional[float] = None) -> List[FanOutResult]:
+        """
+        Run the calls concurrently and return their outcomes in the same order.
+        Calls still running when the overall budget, in seconds, is exhausted
+        are cancelled and reported as timed out.
+        """
+        calls = list(calls)
+        tasks = [
+            asyncio.create_task(self._run_call(key, peer, call))
+            for key, peer, call in calls
+        ]
+
+        if not tasks:
+            return []
+
+        _, pending = await asyncio.wait(tasks, timeout=budget)
+        for task in pending:
+            task.cancel()
+
+        return [
+            task.result() if task not in pending else self._budget_exhausted(key, peer, budget)
+            for task, (key, peer, _) in zip(tasks, calls)
+        ]
+
+    async def iterate(self, calls: Iterable[FanOutCall], budget: Optional[float] = None) -> AsyncIterator[FanOutResult]:
+        """
+        Run the calls concurrently and yield each outcome as soon as it is
+        available. Calls still running when the overall budget, in seconds, is
+        exhausted are cancelled and reported as timed out.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if budget is None else loop.time() + budget
+
+        tasks: Dict[asyncio.Task, Tuple[str, str]] = {
+            asyncio.create_task(self._run_call(key, peer, call)): (key, peer)
+            for key, peer, call in calls
+        }
+        pending = set(tasks)
+
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0, deadline - loop.time())
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    break
+
+                for task in done:
+                    yield task.result()
+
+            for task in pending:
+                task.cancel()
+                yield self._budget_exhausted(*tasks[task], budget)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _budget_exhausted(key: str, peer: str, budget: Optional[float]) -> FanOutResult:
+        return FanOutResult(
+            key=key,
+            peer=peer,
+            status=FanOutStatus.TIMEOUT,
+            error=f"Request budget of {budget} seconds exhausted",
+        )
+
+    @asynccontextmanager
+    async def _peer_slot(self, peer: str):
+        if peer not in self._peer_semaphores:
+            self._peer_semaphores[peer] = asyncio.Semaphore(self._max_concurrency_per_peer)
+        self._peer_calls[peer] = self._peer_calls.get(peer, 0) + 1
+
+        try:
+            async with self._peer_semaphores[peer]:
+                yield
+        finally:
+            self._peer_calls[peer] -= 1
+            if self._peer_calls[peer] == 0:
+                del self._peer_calls[peer]
+                del self._peer_semaphores[peer]
+
+    async def _run_call(self, key: str, peer: str, call: Callable[[], Awaitable[Any]]) -> FanOutResult:
+        async with self._peer_slot(peer), self._semaphore:
+            try:
+                value = await asyncio.wait_for(call(), timeout=self._timeout)
+            except asyncio.TimeoutError:
+                return FanOutResult(
+                    key=key,
+                    peer=peer,
+                    status=FanOutStatus.TIMEOUT,
+                    error=f"No response after {self._timeout} seconds",
+                )
+            except Exception as e:
+                return FanOutResult(
+                    key=key,
+                    peer=peer,
+                    status=FanOutStatus.ERROR,
+                    error=getattr(e, "detail", None) or str(e),
+                )
+
+        return FanOutResult(key=key, peer=peer, status=FanOutStatus.OK, value=value)
+
+class NotificationFanOut(FanOut):
+    """
+    Process-wide fan-out used to notify subscribers about changed entities.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        super().__init__(
+            max_concurrency=settings.NOTIFICATION_MAX_CONCURRENCY,
+            max_concurrency_per_peer=settings.NOTIFICATION_MAX_CONCURRENCY_PER_PEER,
+            timeout=settings.NOTIFICATION_TIMEOUT,
+        )
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+class RemoteQueryFanOut(FanOut):
+    """
+    Process-wide fan-out used to retrieve entities from the USSs managing them.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        super().__init__(
+            max_concurrency=settings.USS_QUERY_CONCURRENCY,
+            max_concurrency_per_peer=settings.USS_QUERY_CONCURRENCY_PER_PEER,
+            timeout=settings.USS_QUERY_TIMEOUT,
+        )
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
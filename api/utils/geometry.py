@@ -0,0 +1,327 @@
+import asyncio
+import math
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from config.config import Settings
+from schemas.area_of_interest import AreaOfInterestSchema
+from schemas.volume import EARTH_RADIUS, BoundingBox
+
+def get_bounding_box(area: AreaOfInterestSchema) -> BoundingBox:
+    """
+    Get the horizontal bounding box of the volume of the area.
+    """
+    return area.volume.bounding_box
+
+def get_altitude_range(area: AreaOfInterestSchema) -> Tuple[float, float]:
+    """
+    Get the lower and upper altitudes of the area in metres.
+    """
+    return area.volume.altitude_range
+
+def get_time_range(area: AreaOfInterestSchema) -> Tuple[float, float]:
+    """
+    Get the start and end of the area in epoch seconds.
+    """
+    return area.time_range
+
+def may_intersect(a: AreaOfInterestSchema, b: AreaOfInterestSchema) -> bool:
+    """
+    Check if the bounding boxes, altitudes and time ranges of the areas overlap.
+    """
+    a_box, b_box = get_bounding_box(a), get_bounding_box(b)
+    a_alt, b_alt = get_altitude_range(a), get_altitude_range(b)
+    a_time, b_time = get_time_range(a), get_time_range(b)
+
+    return (
+        a_box[0] <= b_box[2] and b_box[0] <= a_box[2]
+        and a_box[1] <= b_box[3] and b_box[1] <= a_box[3]
+        and a_alt[0] <= b_alt[1] and b_alt[0] <= a_alt[1]
+        and a_time[0] <= b_time[1] and b_time[0] <= a_time[1]
+    )
+
+# Horizontal shape of a volume projected in metres, a circle (centre, radius)
+# or a polygon (vertices)
+Circle = Tuple[np.ndarray, float]
+Polygon = np.ndarray
+Shape = Union[Circle, Polygon]
+
+def get_reference_point(areas: Sequence[AreaOfInterestSchema]) -> Tuple[float, float]:
+    """
+    Get the centre of the bounding boxes of the areas, used as origin of the
+    local projection.
+    """
+    boxes = np.array([get_bounding_box(area) for area in areas])
+    return (
+        float((boxes[:, 0].min() + boxes[:, 2].max()) / 2),
+        float((boxes[:, 1].min() + boxes[:, 3].max()) / 2),
+    )
+
+def project(area: AreaOfInterestSchema, origin: Tuple[float, float]) -> Shape:
+    """
+    Project the horizontal outline of the area on a plane tangent at the
+    origin, in metres. The distortion is negligible at the scale of an
+    operation.
+    """
+    lng0, lat0 = origin
+    scale_x = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(lat0))
+    scale_y = math.radians(1) * EARTH_RADIUS
+
+    circle = area.volume.outline_circle
+
+    if circle is not None:
+        centre = np.array([
+            (circle.center.lng - lng0) * scale_x,
+            (circle.center.lat - lat0) * scale_y,
+        ])
+        return centre, circle.radius_metres
+
+    return (area.volume.vertices - [lng0, lat0]) * [scale_x, scale_y]
+
+def _edges(polygon: Polygon) -> Tuple[np.ndarray, np.ndarray]:
+    return polygon, np.roll(polygon, -1, axis=0)
+
+def _contains_point(polygon: Polygon, point: np.ndarray) -> bool:
+    """
+    Even-odd rule on every edge at once.
+    """
+    start, end = _edges(polygon)
+    crosses = (start[:, 1] > point[1]) != (end[:, 1] > point[1])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = start[:, 0] + (point[1] - start[:, 1]) * (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+
+    return bool(np.count_nonzero(crosses & (point[0] < x)) % 2)
+
+def _distance_to_edges(polygon: Polygon, point: np.ndarray) -> float:
+    start, end = _edges(polygon)
+    edge = end - start
+    length = np.einsum("ij,ij->i", edge, edge)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.nan_to_num(np.clip(np.einsum("ij,ij->i", point - start, edge) / length, 0, 1))
+
+    closest = start + t[:, None] * edge
+    return float(np.min(np.linalg.norm(point - closest, axis=1)))
+
+def _edges_intersect(a: Polygon, b: Polygon) -> bool:
+    """
+    Test every edge of a against every edge of b at once.
+    """
+    a_start, a_end = (edge[:, None, :] for edge in _edges(a))
+    b_start, b_end = (edge[None, :, :] for edge in _edges(b))
+
+    def orientation(p, q, r):
+        return np.sign(
+            (q[..., 0] - p[..., 0]) * (r[..., 1] - p[..., 1])
+            - (q[..., 1] - p[..., 1]) * (r[..., 0] - p[..., 0])
+        )
+
+    o1 = orientation(a_start, a_end, b_start)
+    o2 = orientation(a_start, a_end, b_end)
+    o3 = orientation(b_start, b_end, a_start)
+    o4 = orientation(b_start, b_end, a_end)
+
+    # The boxes of the edges must overlap, for touching and collinear edges
+    boxes_overlap = (
+        (np.minimum(a_start[..., 0], a_end[..., 0]) <= np.maximum(b_start[..., 0], b_end[..., 0]))
+        & (np.minimum(b_start[..., 0], b_end[..., 0]) <= np.maximum(a_start[..., 0], a_end[..., 0]))
+        & (np.minimum(a_start[..., 1], a_end[..., 1]) <= np.maximum(b_start[..., 1], b_end[..., 1]))
+        & (np.minimum(b_start[..., 1], b_end[..., 1]) <= np.maximum(a_start[..., 1], a_end[..., 1]))
+    )
+
+    return bool(np.any((o1 * o2 <= 0) & (o3 * o4 <= 0) & boxes_overlap))
+
+def shapes_intersect(a: Shape, b: Shape) -> bool:
+    """
+    Check if two projected horizontal shapes intersect.
+    """
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return float(np.linalg.norm(a[0] - b[0])) <= a[1] + b[1]
+
+    if isinstance(a, tuple) or isinstance(b, tuple):
+        (centre, radius), polygon = (a, b) if isinstance(a, tuple) else (b, a)
+        return _contains_point(polygon, centre) or _distance_to_edges(polygon, centre) <= radius
+
+    return (
+        _edges_intersect(a, b)
+        or _contains_point(b, a[0])
+        or _contains_point(a, b[0])
+    )
+
+def shapes_contain(outer: Shape, inner: Shape) -> bool:
+    """
+    Check if a projected horizontal shape is strictly inside another one.
+    Shapes touching the outline of the outer shape are not contained.
+    """
+    if isinstance(outer, tuple):
+        centre, radius = outer
+        if isinstance(inner, tuple):
+            return float(np.linalg.norm(inner[0] - centre)) + inner[1] < radius
+
+        # A circle is convex, so it contains the polygon when it contains its vertices
+        return bool(np.all(np.linalg.norm(inner - centre, axis=1) < radius))
+
+    if isinstance(inner, tuple):
+        centre, radius = inner
+        return _contains_point(outer, centre) and _distance_to_edges(outer, centre) > radius
+
+    # Every vertex inside and no edge crossing or touching the outline, so
+    # the polygon does not leave a concave outer polygon between two vertices
+    return (
+        all(_contains_point(outer, vertex) for vertex in inner)
+        and not _edges_intersect(outer, inner)
+    )
+
+def contains(outer: AreaOfInterestSchema, inner: AreaOfInterestSchema) -> bool:
+    """
+    Check if the volume of the inner area is within the volume of the outer
+    area in space and time. The bounds are compared first, and the outlines
+    are then tested exactly.
+    """
+    outer_box, inner_box = get_bounding_box(outer), get_bounding_box(inner)
+    outer_alt, inner_alt = get_altitude_range(outer), get_altitude_range(inner)
+    outer_time, inner_time = get_time_range(outer), get_time_range(inner)
+
+    if not (
+        outer_box[0] <= inner_box[0] and outer_box[1] <= inner_box[1]
+        and inner_box[2] <= outer_box[2] and inner_box[3] <= outer_box[3]
+        and outer_alt[0] <= inner_alt[0] and inner_alt[1] <= outer_alt[1]
+        and outer_time[0] <= inner_time[0] and inner_time[1] <= outer_time[1]
+    ):
+        return False
+
+    origin = get_reference_point([outer, inner])
+    return shapes_contain(project(outer, origin), project(inner, origin))
+
+def intersects(a: AreaOfInterestSchema, b: AreaOfInterestSchema) -> bool:
+    """
+    Check if the volumes of the areas intersect in space and time.
+    """
+    if not may_intersect(a, b):
+        return False
+
+    origin = get_reference_point([a, b])
+    return shapes_intersect(project(a, origin), project(b, origin))
+
+def intersects_any(area: AreaOfInterestSchema, volumes: Sequence[AreaOfInterestSchema]) -> bool:
+    """
+    Check if any of the volumes intersects the area.
+    """
+    return bool(intersection_matrix([area], volumes).any())
+
+def _bounds(areas: Sequence[AreaOfInterestSchema]) -> np.ndarray:
+    """
+    Bounding box, altitude range and time range of each area, one per row.
+    """
+    return np.array([
+        (*get_bounding_box(area), *get_altitude_range(area), *get_time_range(area))
+        for area in areas
+    ]).reshape(len(areas), 8)
+
+def intersection_matrix(areas: Sequence[AreaOfInterestSchema], others: Sequence[AreaOfInterestSchema]) -> np.ndarray:
+    """
+    Check every area against every other area. The bounds of all the pairs
+    are compared at once, and only the pairs whose bounds overlap are tested
+    exactly.
+    """
+    result = np.zeros((len(areas), len(others)), dtype=bool)
+
+    if len(areas) == 0 or len(others) == 0:
+        return result
+
+    a = _bounds(areas)[:, None, :]
+    b = _bounds(others)[None, :, :]
+
+    candidates = (
+        (a[..., 0] <= b[..., 2]) & (b[..., 0] <= a[..., 2])
+        & (a[..., 1] <= b[..., 3]) & (b[..., 1] <= a[..., 3])
+        & (a[..., 4] <= b[..., 5]) & (b[..., 4] <= a[..., 5])
+        & (a[..., 6] <= b[..., 7]) & (b[..., 6] <= a[..., 7])
+    )
+
+    if not candidates.any():
+        return result
+
+    origin = get_reference_point([*areas, *others])
+    area_shapes: Dict[int, Shape] = {}
+    other_shapes: Dict[int, Shape] = {}
+
+    for i, j in np.argwhere(candidates):
+        if i not in area_shapes:
+            area_shapes[i] = project(areas[i], origin)
+        if j not in other_shapes:
+            other_shapes[j] = project(others[j], origin)
+
+        result[i, j] = shapes_intersect(area_shapes[i], other_shapes[j])
+
+    return result
+
+def _vertex_count(area: AreaOfInterestSchema) -> int:
+    if area.volume.outline_circle is not None:
+        return 1
+    return len(area.volume.vertices)
+
+class GeometryProcessPool:
+    """
+    Process pool for the intersection of very large sets of polygons, which
+    would otherwise block the event loop.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        settings = Settings()
+
+        self.workers = settings.GEOMETRY_PROCESS_POOL_WORKERS
+        self.threshold = settings.GEOMETRY_PROCESS_POOL_THRESHOLD
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+async def find_intersections(areas: Sequence[AreaOfInterestSchema], others: Sequence[AreaOfInterestSchema]) -> np.ndarray:
+    """
+    Compute the intersection matrix of the areas, split across the process
+    pool when the number of edges to compare is above the threshold. The
+    columns are split, since the callers check a single area of interest
+    against many entities.
+    """
+    pool = GeometryProcessPool.get_instance()
+    work = sum(map(_vertex_count, areas)) * sum(map(_vertex_count, others))
+
+    if pool.workers <= 0 or work < pool.threshold or len(areas) == 0 or len(others) == 0:
+        return intersection_matrix(areas, others)
+
+    loop = asyncio.get_running_loop()
+    executor = pool.get_executor()
+
+    results = await asyncio.gather(*(
+        loop.run_in_executor(
+            executor,
+            intersection_matrix,
+            list(areas),
+            [others[i] for i in chunk],
+        )
+        for chunk in np.array_split(np.arange(len(others)), min(len(others), pool.workers))
+    ))
+
+    return np.hstack(results)
@@ -0,0 +1,106 @@
+import base64
+import heapq
+import json
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.logger import AppLogger, LogWriter, format_timestamp
+
+# Log files are named after the local day, entries are timestamped in UTC
+DAY_MARGIN = timedelta(days=1)
+
+class LogCursor:
+    """
+    Position in the export after the last entry of a page: the day of its
+    files and the number of lines of that day already read from each file
+    of a logger and shard.
+
+    Lines are positions rather than timestamps, since the entries of a shard
+    are not strictly in timestamp order.
+    """
+
+    def __init__(self, day: date, positions: Dict[Tuple[str, str], int]):
+        self.day = day
+        self.positions = positions
+
+    def encode(self) -> str:
+        value = json.dumps([self.day.isoformat(), [[name, shard, number] for (name, shard), number in sorted(self.positions.items())]])
+        return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "LogCursor":
+        """
+        Decode a cursor, raising ValueError when it is not valid.
+        """
+        try:
+            day, positions = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return cls(
+                date.fromisoformat(day),
+                {(str(name), str(shard)): int(number) for name, shard, number in positions},
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def export_logs(
+        loggers: List[type[AppLogger]],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        cursor: Optional[LogCursor] = None,
+        limit: int = 1000,
+) -> Iterator[str]:
+    """
+    Export the entries of the loggers as NDJSON lines, in chronological
+    order. Each line is the entry with the name of its logger. The files of
+    every logger and shard of a day are merged by timestamp.
+
+    Only the files of the days between start and end are read, one line at a
+    time. When more entries than the limit match, the last line holds the
+    cursor of the next page instead of an entry.
+    """
+    LogWriter.get_instance().flush()
+
+    first_day = start.date() - DAY_MARGIN if start is not None else None
+    last_day = end.date() + DAY_MARGIN if end is not None else None
+
+    if cursor is not None and (first_day is None or first_day < cursor.day):
+        first_day = cursor.day
+
+    start_timestamp = format_timestamp(start) if start is not None else None
+    end_timestamp = format_timestamp(end) if end is not None else None
+
+    # Files of each shard of each logger by day
+    days: Dict[date, Dict[Tuple[type[AppLogger], str], List[str]]] = defaultdict(lambda: defaultdict(list))
+    for logger_type in loggers:
+        for day, shard, path in logger_type.get_instance().get_files(first_day, last_day):
+            days[day][(logger_type, shard)].append(path)
+
+    count = 0
+
+    for day in sorted(days):
+        positions = dict(cursor.positions) if cursor is not None and day == cursor.day else {}
+
+        entries = heapq.merge(*(
+            logger_type.get_instance().read_entries(shard, paths, positions.get((logger_type.NAME, shard), 0))
+            for (logger_type, shard), paths in days[day].items()
+        ))
+
+        for timestamp, name, shard, number, line in entries:
+            matches = (
+                (start_timestamp is None or start_timestamp <= timestamp)
+                and (end_timestamp is None or timestamp <= end_timestamp)
+            )
+
+            if matches and count == limit:
+                yield json.dumps({"cursor": LogCursor(day, positions).encode()}) + "\n"
+                return
+
+            positions[(name, shard)] = number + 1
+
+            if not matches:
+                continue
+
+            # The entry is not parsed again, its name is spliced in front of it
+            yield f'{{"logger": "{name}", {line[1:]}\n'
+            count += 1
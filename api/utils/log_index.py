@@ -0,0 +1,157 @@
+import heapq
+import json
+import os
+
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from jmespath.parser import ParsedResult
+
+from config.config import Settings
+from config.logger import AppLogger, LogWriter, format_timestamp, get_index_path, read_log_lines
+from utils.log_export import DAY_MARGIN
+
+class LogIndex:
+    """
+    Sidecar index of a log file loaded in memory: the offset and timestamp of
+    each entry, and the entries of each key.
+
+    Only the rows appended since the last refresh are read, so the index of
+    the current log file stays up to date.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets: List[int] = []
+        self.timestamps: List[str] = []
+        self.rows: Dict[str, List[int]] = defaultdict(list)
+        self._position = 0
+
+    def refresh(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == self._position:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._position)
+
+            for line in f:
+                # The last row may still be partially written
+                if not line.endswith(b"\n"):
+                    break
+
+                self._position += len(line)
+
+                offset, timestamp, keys = line.decode("utf-8").rstrip("\n").split("\t")
+                row = len(self.offsets)
+
+                self.offsets.append(int(offset))
+                self.timestamps.append(timestamp)
+                for key in keys.split():
+                    self.rows[key].append(row)
+
+    def find(self, keys: List[str], start: Optional[str] = None, end: Optional[str] = None) -> List[int]:
+        """
+        Get the rows of the entries with every key, between the start and
+        end timestamps, in ascending order.
+        """
+        if keys:
+            postings = sorted((self.rows.get(key, []) for key in keys), key=len)
+            rows = sorted(set(postings[0]).intersection(*postings[1:]))
+        else:
+            rows = range(len(self.offsets))
+
+        # Entries written while the queue was full may be slightly out of order
+        return [
+            row for row in rows
+            if (start is None or start <= self.timestamps[row]) and (end is None or self.timestamps[row] <= end)
+        ]
+
+class LogIndexStore:
+    """
+    Bounded cache of the sidecar indexes of the log files, the least
+    recently queried index is evicted first.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        self._size = Settings().LOG_INDEX_CACHE_SIZE
+        self._indexes: OrderedDict[str, LogIndex] = OrderedDict()
+        self._indexes_lock = Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get(self, path: str) -> LogIndex:
+        """
+        Get the index at the path, with the rows appended since it was loaded.
+        """
+        # Queries run in the threadpool
+        with self._indexes_lock:
+            index = self._indexes.pop(path, None) or LogIndex(path)
+            index.refresh()
+
+            self._indexes[path] = index
+            while len(self._indexes) > self._size:
+                self._indexes.popitem(last=False)
+
+        return index
+
+def _read_entries(logger_type: type[AppLogger], shard: str, path: str, index: LogIndex, rows: List[int]) -> Iterator[Tuple[str, str, str, int, str]]:
+    lines = read_log_lines(path, [index.offsets[row] for row in rows])
+    for row, line in zip(rows, lines):
+        yield index.timestamps[row], logger_type.NAME, shard, index.offsets[row], line
+
+def query_logs(
+        loggers: List[type[AppLogger]],
+        keys: List[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        expression: Optional[ParsedResult] = None,
+        limit: int = 1000,
+) -> Iterator[str]:
+    """
+    Query the entries of the loggers with every key, such as "id:<uuid>" or
+    "peer:<host>", as NDJSON lines in chronological order. Only the entries
+    found in the sidecar indexes are read, and the ones not matching the
+    compiled JMESPath expression are discarded. The files of every logger
+    and shard are merged by timestamp.
+    """
+    LogWriter.get_instance().flush()
+
+    first_day = start.date() - DAY_MARGIN if start is not None else None
+    last_day = end.date() + DAY_MARGIN if end is not None else None
+
+    start_timestamp = format_timestamp(start) if start is not None else None
+    end_timestamp = format_timestamp(end) if end is not None else None
+
+    store = LogIndexStore.get_instance()
+    sources = []
+
+    for logger_type in loggers:
+        for _, shard, path in logger_type.get_instance().get_files(first_day, last_day):
+            index = store.get(get_index_path(path))
+            rows = index.find(keys, start_timestamp, end_timestamp)
+
+            if rows:
+                sources.append(_read_entries(logger_type, shard, path, index, rows))
+
+    count = 0
+
+    for _, name, _, _, line in heapq.merge(*sources):
+        if count == limit:
+            return
+
+        if expression is not None and not expression.search(json.loads(line)):
+            continue
+
+        # The entry is not serialized again, its name is spliced in front of it
+        yield f'{{"logger": "{name}", {line[1:]}\n'
+        count += 1
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.responses import JSONResponse
+from typing import Any, Mapping, Optional
+
+class ModelResponse(JSONResponse):
+    """
+    JSON response rendered straight from pydantic models.
+
+    The content is serialized to bytes once by pydantic, without being dumped
+    to dicts first or validated again against the response_model of the route.
+    Routes keep the response_model for the documentation.
+    """
+
+    def __init__(self, content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None):
+        # Kept for the route logs
+        self.model = content
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return to_json(content)
@@ -275,33 +275,30 @@ export class Map {
           },
         };
 
-        const conflicts = await this.ussService.queryConflicts(payload);
-
         this.cylinderTool.cleanRequestedRegions();
         this.polygonTool.cleanRequestedRegions();
 
-        conflicts.data.constraints.forEach((constraint) => {
-          // How to verify the type CylinderVolumeSchema or PolygonVolumeSchema?
-          if ("outline_circle" in constraint.volume) {
-            this.cylinderTool.drawConflictRegion(
-              constraint as CylinderVolumeSchema,
-            );
-          } else if ("outline_polygon" in constraint.volume) {
-            this.polygonTool.drawConflictRegion(
-              constraint as PolygonVolumeSchema,
+        // Draw the volumes of each entity as soon as its USS answers
+        await this.ussService.queryConflictsStream(payload, (entity) => {
+          if (entity.status !== "ok") {
+            console.warn(
+              `Could not retrieve ${entity.type} ${entity.entity_id} from ${entity.uss_base_url}:`,
+              entity.error,
             );
           }
-        });
 
-        conflicts.data.operational_intents.forEach((intent) => {
-          // How to verify the type CylinderVolumeSchema or PolygonVolumeSchema?
-          if ("outline_circle" in intent.volume) {
-            this.cylinderTool.drawConflictRegion(
-              intent as CylinderVolumeSchema,
-            );
-          } else if ("outline_polygon" in intent.volume) {
-            this.polygonTool.drawConflictRegion(intent as PolygonVolumeSchema);
-          }
+          entity.volumes.forEach((volume) => {
+            // How to verify the type CylinderVolumeSchema or PolygonVolumeSchema?
+            if ("outline_circle" in volume.volume) {
+              this.cylinderTool.drawConflictRegion(
+                volume as CylinderVolumeSchema,
+              );
+            } else if ("outline_polygon" in volume.volume) {
+              this.polygonTool.drawConflictRegion(
+                volume as PolygonVolumeSchema,
+              );
+            }
+          });
         });
       } catch (error) {
         console.error("Error querying conflicts:", error);
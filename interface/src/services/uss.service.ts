@@ -7,12 +7,29 @@ import {
 import { PolygonVolumeSchema } from "../models/polygon";
 import { PolygonVolumeRequestPayload } from "../models/polygon";
 
+export interface RemoteEntityStatus {
+  entity_id: string;
+  uss_base_url: string;
+  status: "ok" | "timeout" | "error";
+  error?: any;
+}
+
+export interface ConflictStreamEntity extends RemoteEntityStatus {
+  type: "constraint" | "operational_intent";
+  volumes: Array<CylinderVolumeSchema | PolygonVolumeSchema>;
+}
+
 export interface QueryConflictsResponse {
   status: number;
   message: string;
   data: {
     operational_intents: Array<CylinderVolumeSchema | PolygonVolumeSchema>;
     constraints: Array<CylinderVolumeSchema | PolygonVolumeSchema>;
+    // Retrieval status of each entity. Volumes of failed entities are missing
+    entities?: {
+      operational_intents: RemoteEntityStatus[];
+      constraints: RemoteEntityStatus[];
+    };
   };
 }
 
@@ -90,4 +107,50 @@ export class USSService {
       throw error;
     }
   }
+
+  async queryConflictsStream(
+    payload: CylinderVolumeRequestPayload | PolygonVolumeRequestPayload,
+    onEntity: (entity: ConflictStreamEntity) => void,
+  ): Promise<void> {
+    // axios does not expose the response stream in the browser, so fetch is
+    // used to render each entity as soon as its USS answers
+    const response = await fetch(
+      `${this.baseUrl}/uss/v1/flight_plan/query_conflicts?stream=true`,
+      {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify(payload),
+      },
+    );
+
+    if (response.status !== 200 || !response.body) {
+      throw new Error(`Expected status 200, but got ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) {
+        break;
+      }
+
+      buffer += decoder.decode(value, { stream: true });
+
+      const lines = buffer.split("\n");
+      buffer = lines.pop() ?? "";
+
+      lines
+        .filter((line) => line.trim().length > 0)
+        .forEach((line) => onEntity(JSON.parse(line) as ConflictStreamEntity));
+    }
+
+    if (buffer.trim().length > 0) {
+      onEntity(JSON.parse(buffer) as ConflictStreamEntity);
+    }
+  }
 }